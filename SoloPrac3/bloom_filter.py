@@ -0,0 +1,148 @@
+""" Bloom Filter ADT
+
+Defines a Bloom filter: a bit array that answers whether a key might have
+been added (possibly wrongly) or definitely was not (always rightly).
+Each key sets hash_count bits, picked by double hashing from two hashes of
+the key that don't depend on any hash table's hash base, so the filter
+still separates keys that a poor hash base sends to the same place.
+"""
+__docformat__ = 'reStructuredText'
+
+from typing import Tuple
+import math
+import unittest
+
+
+class BloomFilter:
+    """
+    Bloom Filter
+
+    constants:
+        HASH_BASE: hash base of the polynomial hash, above every code point
+        FIRST_MODULUS: prime the hash picking the first bit is reduced by
+        SECOND_MODULUS: prime the hash picking the distance between bits is reduced by
+
+    attributes:
+        capacity: number of keys the filter is sized for
+        false_positive_rate: chance that a key never added is reported as maybe added,
+                             once capacity keys have been added
+        bit_count: number of bits
+        hash_count: number of bits set for each key
+        bits: the bit array
+        count: number of keys added
+        hits: number of lookups answered with maybe
+        misses: number of lookups answered with definitely not
+    """
+    HASH_BASE = 0x110000
+    FIRST_MODULUS = 2 ** 61 - 1
+    SECOND_MODULUS = 2 ** 64 - 59
+
+    def __init__(self, capacity: int, false_positive_rate: float) -> None:
+        """
+        Sizes the filter so that after adding capacity keys a key never added
+        is reported as maybe added with the given probability
+        :raises ValueError: when false_positive_rate is not between 0 and 1
+        :complexity: O(M) where M is the number of bits
+        """
+        if not 0 < false_positive_rate < 1:
+            raise ValueError("False positive rate should be between 0 and 1")
+        self.capacity = max(1, capacity)
+        self.false_positive_rate = false_positive_rate
+        self.bit_count = max(8, math.ceil(-self.capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.bit_count / self.capacity * math.log(2)))
+        self.bits = bytearray((self.bit_count + 7) // 8)
+        self.count = 0
+        self.hits = 0
+        self.misses = 0
+
+    def statistics(self) -> Tuple[int, int]:
+        """
+        Returns the number of lookups answered with maybe (hits) and with definitely not (misses)
+        :complexity: O(1)
+        """
+        return self.hits, self.misses
+
+    def __hashes(self, key: str) -> Tuple[int, int]:
+        """
+        Returns the bit picked first for the key, and the distance between its bits
+        :complexity: O(K) where K is the size of the key
+        """
+        value = 0
+        for c in key:
+            value = value * self.HASH_BASE + ord(c)
+        first = self.__mix(value % self.FIRST_MODULUS) % self.bit_count
+        step = self.__mix(value % self.SECOND_MODULUS) % (self.bit_count - 1) + 1
+        return first, step
+
+    def __mix(self, value: int) -> int:
+        """
+        Scrambles the bits of a 64 bit value (the splitmix64 finaliser)
+        :complexity: O(1)
+        """
+        value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+        value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+        return value ^ (value >> 31)
+
+    def add(self, key: str) -> None:
+        """
+        Sets the bits of the key
+        :complexity: O(K + H) where K is the size of the key and H the hash_count
+        """
+        (bit, step) = self.__hashes(key)
+        for _ in range(self.hash_count):
+            self.bits[bit >> 3] |= 1 << (bit & 7)
+            bit = (bit + step) % self.bit_count
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        """
+        Returns False when the key was definitely never added, and True when it might have been
+        :complexity best: O(K) the first bit is not set, where K is the size of the key
+        :complexity worst: O(K + H) every bit is set, where H is the hash_count
+        """
+        (bit, step) = self.__hashes(key)
+        for _ in range(self.hash_count):
+            if not self.bits[bit >> 3] & (1 << (bit & 7)):
+                self.misses += 1
+                return False
+            bit = (bit + step) % self.bit_count
+        self.hits += 1
+        return True
+
+    def __len__(self) -> int:
+        """
+        Returns the number of keys added
+        :complexity: O(1)
+        """
+        return self.count
+
+
+class TestBloomFilter(unittest.TestCase):
+    def test_init(self):
+        """ Testing the filter is sized from its capacity and false positive rate """
+        bloom = BloomFilter(1000, 0.01)
+        self.assertEqual(bloom.bit_count, 9586)
+        self.assertEqual(bloom.hash_count, 7)
+        self.assertEqual(len(bloom), 0)
+        with self.assertRaises(ValueError):
+            BloomFilter(1000, 0)
+
+    def test_contains(self):
+        """ Testing there are no false negatives and about the expected number of false positives """
+        bloom = BloomFilter(2000, 0.05)
+        for i in range(2000):
+            bloom.add(str(i))
+        for i in range(2000):
+            self.assertTrue(str(i) in bloom, "False negative: " + str(i))
+        self.assertEqual(bloom.statistics(), (2000, 0))
+
+        false_positives = 0
+        for i in range(2000, 12000):
+            if str(i) in bloom:
+                false_positives += 1
+        self.assertLess(false_positives, 1000, "Should be around 500")
+        self.assertEqual(bloom.statistics(), (2000 + false_positives, 10000 - false_positives))
+
+
+if __name__ == '__main__':
+    unittest.main()
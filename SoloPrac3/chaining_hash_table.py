@@ -0,0 +1,471 @@
+""" Separate Chaining Hash Table ADT
+
+Defines a Hash Table using Separate Chaining for conflict resolution.
+Each bucket is a single array holding its keys and data interleaved
+(key, data, key, data, ...), so there is no Node or tuple per entry.
+Deleting moves the last pair of the bucket into the gap, so it never
+has to touch any other bucket. A BloomFilter can be put in front of
+the lookups, as for LinearProbeHashTable (see add_prefilter).
+"""
+__docformat__ = 'reStructuredText'
+
+from referential_array import ArrayR
+from hash_table import LinearProbeHashTable, full_hashes, HASH_MASK
+from perfect_hash_table import PerfectHashTable
+from bloom_filter import BloomFilter
+from typing import TypeVar, Generic, Tuple, Iterable
+import unittest
+T = TypeVar('T')
+
+
+class SeparateChainingHashTable(Generic[T]):
+    """
+    Separate Chaining Hash Table
+
+    constants:
+        MIN_CAPACITY: smallest valid table size
+        MIN_BUCKET_CAPACITY: number of entries a new bucket has room for
+        DEFAULT_TABLE_SIZE: default table size used in the __init__
+        DEFAULT_HASH_BASE: default hash base used for the hash function
+        DEFAULT_MAX_LOAD_FACTOR: default load factor at which the table grows
+        PRIMES: list of prime numbers to use for resizing
+
+    attributes:
+        count: number of elements in the hash table
+        buckets: array of buckets, each None or an array of interleaved keys and data
+        bucket_sizes: number of entries in each bucket
+        hash_base: base prime used in hash function
+        table_size: current number of buckets
+        max_load_factor: load factor at which the table grows, may be above 1
+        next_prime: next prime number to use when resizing
+        prefilter: BloomFilter holding every key ever inserted, or None
+    """
+    MIN_CAPACITY = 1
+    MIN_BUCKET_CAPACITY = 2
+
+    DEFAULT_TABLE_SIZE = 17
+    DEFAULT_HASH_BASE = 31
+    DEFAULT_MAX_LOAD_FACTOR = 2.0
+    PRIMES = LinearProbeHashTable.PRIMES
+
+    def __init__(self, hash_base: int = DEFAULT_HASH_BASE, table_size: int = DEFAULT_TABLE_SIZE,
+                 max_load_factor: float = DEFAULT_MAX_LOAD_FACTOR) -> None:
+        """
+        :complexity: O(N) where N is the table_size
+        """
+        self.count = 0
+        self.hash_base = hash_base
+        self.max_load_factor = max_load_factor
+        self.prefilter = None
+        self.__allocate(max(self.MIN_CAPACITY, table_size))
+        self.next_prime = 0
+
+        while SeparateChainingHashTable.PRIMES[self.next_prime] <= table_size:
+            self.next_prime += 1
+
+        self.conflict_count = 0
+        self.probe_total = 0
+        self.probe_max = 0
+        self.rehash_count = 0
+
+    def statistics(self):
+        """
+        Returns the conflict count, probe total, probe max and rehash count,
+        followed by the prefilter hits and misses when there is a prefilter
+        :see: #BloomFilter.statistics()
+        """
+        if self.prefilter is not None:
+            return (self.conflict_count, self.probe_total, self.probe_max, self.rehash_count) + self.prefilter.statistics()
+        return self.conflict_count, self.probe_total, self.probe_max, self.rehash_count
+
+    def add_prefilter(self, false_positive_rate: float, capacity: int = None) -> None:
+        """
+        Puts a BloomFilter in front of the lookups, holding the current keys and
+        then every key inserted, sized for capacity keys (by default the current number of keys)
+        :raises ValueError: when false_positive_rate is not between 0 and 1
+        :see: #LinearProbeHashTable.add_prefilter(false_positive_rate: float, capacity: int)
+        """
+        if capacity is None:
+            capacity = self.count
+        self.prefilter = BloomFilter(capacity, false_positive_rate)
+        for bucket in range(self.table_size):
+            entries = self.buckets[bucket]
+            for i in range(self.bucket_sizes[bucket]):
+                self.prefilter.add(entries[2 * i])
+
+    def __rules_out(self, key: str) -> bool:
+        """
+        Returns whether the prefilter shows that the key is definitely missing
+        :see: #BloomFilter.__contains__(key: str)
+        """
+        return self.prefilter is not None and key not in self.prefilter
+
+    def __allocate(self, table_size: int) -> None:
+        """
+        Creates the given number of empty buckets
+        :complexity: O(N) where N is the table_size
+        """
+        self.table_size = table_size
+        self.buckets = ArrayR(table_size)
+        self.bucket_sizes = ArrayR(table_size)
+        for i in range(table_size):
+            self.bucket_sizes[i] = 0
+
+    def __len__(self) -> int:
+        """
+        Returns number of elements in the hash table
+        :complexity: O(1)
+        """
+        return self.count
+
+    def __find(self, bucket: int, key: str) -> int:
+        """
+        Returns the index of the key within the given bucket, or -1 if it is not there
+        :complexity best: O(K) the key is first in the bucket, where K is the size of the key
+        :complexity worst: O(K * B) the key is last or missing, where B is the size of the bucket
+        """
+        entries = self.buckets[bucket]
+        for i in range(self.bucket_sizes[bucket]):
+            if entries[2 * i] == key:
+                return i
+        return -1
+
+    def __delitem__(self, key: str) -> None:
+        """
+        Deletes an item from our hash table by moving the last entry
+        of its bucket into its place
+        :raises KeyError: when the key doesn't exist
+        :see: #self.__find(bucket: int, key: str)
+        """
+        if self.__rules_out(key):
+            raise KeyError(key)
+        bucket = self.hash(key)
+        index = self.__find(bucket, key)
+        if index < 0:
+            raise KeyError(key)
+
+        entries = self.buckets[bucket]
+        last = self.bucket_sizes[bucket] - 1
+        entries[2 * index] = entries[2 * last]
+        entries[2 * index + 1] = entries[2 * last + 1]
+        entries[2 * last] = None
+        entries[2 * last + 1] = None
+        self.bucket_sizes[bucket] = last
+        self.count -= 1
+
+    def __rehash(self) -> None:
+        """
+        Need to resize table and reinsert all values
+        :complexity: O(N + M) where N is the table size and M the number of elements
+        """
+        self.rehash_count += 1
+        old_buckets = self.buckets
+        old_sizes = self.bucket_sizes
+        old_table_size = self.table_size
+        self.__allocate(SeparateChainingHashTable.PRIMES[self.next_prime])
+        self.next_prime += 1
+
+        for bucket in range(old_table_size):
+            entries = old_buckets[bucket]
+            for i in range(old_sizes[bucket]):
+                self.__append(self.hash(entries[2 * i]), entries[2 * i], entries[2 * i + 1])
+
+    def __append(self, bucket: int, key: str, data: T) -> None:
+        """
+        Adds a (key, data) pair to the end of the given bucket, doubling its array when full
+        :complexity best: O(1) there is room left in the bucket
+        :complexity worst: O(B) the bucket array is copied, where B is the size of the bucket
+        """
+        entries = self.buckets[bucket]
+        size = self.bucket_sizes[bucket]
+        if entries is None:
+            entries = ArrayR(2 * self.MIN_BUCKET_CAPACITY)
+            self.buckets[bucket] = entries
+        elif 2 * size == len(entries):
+            entries = ArrayR(4 * size)
+            old_entries = self.buckets[bucket]
+            for i in range(2 * size):
+                entries[i] = old_entries[i]
+            self.buckets[bucket] = entries
+        entries[2 * size] = key
+        entries[2 * size + 1] = data
+        self.bucket_sizes[bucket] = size + 1
+
+    def __contains__(self, key: str) -> bool:
+        """
+        Checks to see if the given key is in the Hash Table
+        :see: #self.__find(bucket: int, key: str)
+        """
+        if self.__rules_out(key):
+            return False
+        return self.__find(self.hash(key), key) >= 0
+
+    def __getitem__(self, key: str) -> T:
+        """
+        Get the item at a certain key
+        :see: #self.__find(bucket: int, key: str)
+        :raises KeyError: when the item doesn't exist
+        """
+        if self.__rules_out(key):
+            raise KeyError(key)
+        bucket = self.hash(key)
+        index = self.__find(bucket, key)
+        if index < 0:
+            raise KeyError(key)
+        return self.buckets[bucket][2 * index + 1]
+
+    def __setitem__(self, key: str, data: T) -> None:
+        """
+        Set an (key, data) pair in our hash table
+        :see: #self.__find(bucket: int, key: str)
+        :see: #self.__rehash()
+        """
+        self.__set(key, data, self.full_hash(key))
+
+    def insert_many(self, keys: list, data: T) -> None:
+        """
+        Set every key in keys to data, hashing the whole batch at once.
+        The table grows at most once, before any key is placed.
+        :see: #full_hashes(keys: list, hash_base: int)
+        :see: #self.__reserve(count: int)
+        """
+        self.__reserve(self.count + len(keys))
+        hashes = self.full_hash_many(keys)
+        for i in range(len(keys)):
+            self.__set(keys[i], data, hashes[i])
+
+    def update(self, pairs: Iterable[Tuple[str, T]]) -> None:
+        """
+        Set every (key, data) pair in pairs, in order. The table grows at most
+        once, before any pair is placed, to fit them all as new keys.
+        :see: #self.__reserve(count: int)
+        """
+        keys = []
+        values = []
+        for (key, data) in pairs:
+            keys.append(key)
+            values.append(data)
+        self.__reserve(self.count + len(keys))
+        hashes = self.full_hash_many(keys)
+        for i in range(len(keys)):
+            self.__set(keys[i], values[i], hashes[i])
+
+    @classmethod
+    def from_iterable(cls, pairs: Iterable[Tuple[str, T]], size_hint: int = None,
+                      hash_base: int = DEFAULT_HASH_BASE,
+                      max_load_factor: float = DEFAULT_MAX_LOAD_FACTOR) -> 'SeparateChainingHashTable[T]':
+        """
+        Creates a hash table holding the (key, data) pairs, sized from PRIMES
+        up front to fit size_hint entries (or all the pairs when there is no hint)
+        :see: #self.update(pairs: Iterable[Tuple[str, T]])
+        """
+        if size_hint is None:
+            pairs = list(pairs)
+            size_hint = len(pairs)
+        table = cls(hash_base, cls.MIN_CAPACITY, max_load_factor)
+        table.__reserve(size_hint)
+        table.update(pairs)
+        return table
+
+    def __reserve(self, count: int) -> None:
+        """
+        Grows the table once, straight to the first prime in PRIMES with room for
+        count entries under the max load factor, unless they fit already.
+        An empty table has nothing to move, so it is allocated afresh rather than rehashed.
+        :see: #self.__rehash()
+        """
+        if count <= self.max_load_factor * self.table_size:
+            return
+        while self.next_prime < len(self.PRIMES) - 1 and count > self.max_load_factor * self.PRIMES[self.next_prime]:
+            self.next_prime += 1
+        if self.count == 0:
+            self.__allocate(self.PRIMES[self.next_prime])
+            self.next_prime += 1
+        else:
+            self.__rehash()
+
+    def __set(self, key: str, data: T, key_hash: int) -> None:
+        """
+        Set an (key, data) pair in our hash table, given the full hash of the key
+        :see: #self.__find(bucket: int, key: str)
+        :see: #self.__rehash()
+        """
+        bucket = key_hash % self.table_size
+        index = self.__find(bucket, key)
+        if index >= 0:
+            self.buckets[bucket][2 * index + 1] = data
+            return
+
+        if self.count + 1 > self.max_load_factor * self.table_size:
+            self.__rehash()
+            bucket = key_hash % self.table_size
+
+        chain_length = self.bucket_sizes[bucket]
+        if chain_length > 0: # increment conflict count when inserting into a non-empty bucket
+            self.conflict_count += 1
+        if chain_length > self.probe_max:
+            self.probe_max = chain_length
+        self.probe_total += chain_length
+        self.__append(bucket, key, data)
+        self.count += 1
+        if self.prefilter is not None:
+            self.prefilter.add(key)
+
+    def is_empty(self) -> bool:
+        """
+        Returns whether the hash table is empty
+        :complexity: O(1)
+        """
+        return self.count == 0
+
+    def is_full(self) -> bool:
+        """
+        Returns whether the hash table is full, which never happens as buckets grow
+        :complexity: O(1)
+        """
+        return False
+
+    def hash(self, key: str) -> int:
+        """
+        Universal Hash function
+        :post: returns a valid bucket (0 <= value < table_size)
+        :see: #self.full_hash(key: str)
+        """
+        return self.full_hash(key) % self.table_size
+
+    def full_hash(self, key: str) -> int:
+        """
+        Universal Hash function before it is reduced by the table size, kept to 64 bits
+        :post: full_hash(key) % table_size == hash(key) and 0 <= full_hash(key) <= HASH_MASK
+        :complexity: O(K) where K is the size of the key
+        """
+        value = 0
+        for c in key:
+            value = (value * self.hash_base + ord(c)) & HASH_MASK
+        return value
+
+    def full_hash_many(self, keys: list) -> list:
+        """
+        Returns the full hash of every key in keys
+        :see: #full_hashes(keys: list, hash_base: int)
+        """
+        return full_hashes(keys, self.hash_base)
+
+    def insert(self, key: str, data: T) -> None:
+        """
+        Utility method to call our setitem method
+        :see: #__setitem__(self, key: str, data: T)
+        """
+        self[key] = data
+
+    def freeze(self) -> PerfectHashTable[T]:
+        """
+        Returns a read-only copy of the table, which finds or rules out
+        any key by looking at a single slot
+        :see: #PerfectHashTable.__init__(keys: list, values: list)
+        """
+        keys = []
+        values = []
+        for bucket in range(self.table_size):
+            entries = self.buckets[bucket]
+            for i in range(self.bucket_sizes[bucket]):
+                keys.append(entries[2 * i])
+                values.append(entries[2 * i + 1])
+        return PerfectHashTable(keys, values)
+
+    def __str__(self) -> str:
+        """
+        Returns all they key/value pairs in our hash table (no particular order)
+        :complexity: O(N + M) where N is the table size and M the number of elements
+        """
+        result = ""
+        for bucket in range(self.table_size):
+            entries = self.buckets[bucket]
+            for i in range(self.bucket_sizes[bucket]):
+                result += "(" + str(entries[2 * i]) + "," + str(entries[2 * i + 1]) + ")\n"
+        return result
+
+
+class TestSeparateChainingHashTable(unittest.TestCase):
+    def test_init(self):
+        """ Basic test to ensure the table is initialised """
+        dictionary = SeparateChainingHashTable()
+        self.assertEqual(len(dictionary), 0, "Dictionary should be empty")
+        self.assertTrue(dictionary.is_empty())
+
+    def test_hash(self):
+        """ Testing the get item and contains with far more items than buckets """
+        dictionary = SeparateChainingHashTable(31, 5, 4.0)
+        for i in range(20):
+            dictionary[str(i)] = i
+        self.assertEqual(dictionary.table_size, 5, "Table should not grow below its max load factor")
+        self.assertFalse(dictionary.is_full())
+
+        for i in range(20):
+            self.assertEqual(dictionary[str(i)], i, "Could not find item: " + str(i))
+            self.assertTrue(str(i) in dictionary, "Could not find item: " + str(i))
+        self.assertFalse("20" in dictionary)
+
+        dictionary["20"] = 20
+        self.assertEqual(dictionary.table_size, 7)
+        self.assertEqual(dictionary.rehash_count, 1)
+        self.assertEqual(len(dictionary), 21)
+        for i in range(21):
+            self.assertEqual(dictionary[str(i)], i, "Could not find item: " + str(i))
+
+    def test_update(self):
+        """ Testing bulk construction sizes the table up front instead of rehashing along the way """
+        pairs = [(str(i), i) for i in range(100)]
+        dictionary = SeparateChainingHashTable.from_iterable(pairs)
+        self.assertEqual(dictionary.table_size, 59)
+        self.assertEqual(dictionary.rehash_count, 0)
+
+        dictionary = SeparateChainingHashTable(31, 5)
+        dictionary["0"] = "zero"
+        dictionary.update(pairs)
+        self.assertEqual(dictionary.rehash_count, 1, "Should only grow once")
+        self.assertEqual(len(dictionary), 100)
+        for i in range(100):
+            self.assertEqual(dictionary[str(i)], i, "Could not find item: " + str(i))
+
+    def test_del(self):
+        """ Adding 10 items, removing the first 5 and ensuring the state of the Hash Table is correct afterwards """
+        dictionary = SeparateChainingHashTable(1, 3)  # hash base 1 keeps the buckets long
+        for i in range(10):
+            dictionary[str(i)] = i
+
+        for i in range(5):
+            del dictionary[str(i)]
+        with self.assertRaises(KeyError):
+            del dictionary["0"]
+
+        self.assertEqual(len(dictionary), 5)
+        for i in range(10):
+            if i < 5:
+                with self.assertRaises(KeyError):
+                    _ = dictionary[str(i)]
+            else:
+                self.assertEqual(dictionary[str(i)], i, "Could not find item: " + str(i))
+
+    def test_statistics(self):
+        """ Testing the conflict and probe counters follow the bucket lengths """
+        dictionary = SeparateChainingHashTable(1, 7)
+        for key in ["ab", "ba", "abc", "cab", "bca"]:  # anagrams share a bucket with hash base 1
+            dictionary[key] = key
+        dictionary["ab"] = "again"
+        self.assertEqual(dictionary.statistics(), (3, 4, 2, 0))
+        self.assertEqual(dictionary["ab"], "again")
+
+    def test_str(self):
+        """ Testing an empty table and one with 5 elements """
+        dictionary = SeparateChainingHashTable(31, 5)
+        self.assertEqual(str(dictionary), "", "Dictionary should be empty")
+
+        for i in range(5):
+            dictionary[str(i)] = i
+        for i in range(5):
+            self.assertIn("(" + str(i) + "," + str(i) + ")", str(dictionary))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,10 @@
-from hash_table import LinearProbeHashTable
-from typing import Tuple
+from hash_table import LinearProbeHashTable, Layout, Deletion, Insertion, PROBING
+from chaining_hash_table import SeparateChainingHashTable
+from typing import Tuple, Iterator
+import mmap
+import operator
+import os
+import struct
 import timeit
 
 
@@ -7,10 +12,12 @@ class Statistics:
     FILES = ['english_large.txt','english_small.txt','french.txt']
     HASH_BASES = [1,27183,250726]
     TABLESIZES = [250727,402221,1000081]
+    PROBING = ['linear', 'quadratic', 'double', 'chaining']
     
-    def load_statistics(self, hash_base: int, table_size: int, filename: str, max_time: int) -> Tuple:
+    def load_statistics(self, hash_base: int, table_size: int, filename: str, max_time: int,
+                        insertion: Insertion = Insertion.FIRST_COME, probing: str = 'linear') -> Tuple:
         # TODO: Define method
-        dict = Dictionary(hash_base, table_size)
+        dict = Dictionary(hash_base, table_size, insertion=insertion, probing=probing)
 
         start_time = timeit.default_timer()
 
@@ -23,14 +30,18 @@ class Statistics:
         return (len(dict.hash_table), time_taken, dict.hash_table.conflict_count, dict.hash_table.probe_total, dict.hash_table.probe_max, dict.hash_table.rehash_count)
         
 
-    def table_load_statistics(self, max_time:int) -> None:
+    def table_load_statistics(self, max_time:int, insertion: Insertion = Insertion.FIRST_COME) -> None:
         """
         This method reads files from the file list defined above and creates
         hash tables with specific hash bases and tablesizes mentioned above by
         calling the load statistics method and then loading the statistics
         to a csv file, which is then saved as output_task2.csv
+        (or output_task2_robin_hood.csv for Robin Hood insertion).
+        Every probing strategy (and separate chaining) is swept, except that
+        Robin Hood insertion only runs with linear probing.
 
         :param max_time: The maximum time to be given while reading the files
+        :param insertion: The insertion policy used by the hash tables
         :raises: None
         :returns: None
         :Best case: TODO: Add complexity
@@ -38,63 +49,200 @@ class Statistics:
         """
 
         filename = 'output_task2.csv'
+        if insertion != Insertion.FIRST_COME:
+            filename = 'output_task2_' + insertion.name.lower() + '.csv'
         csv_file = open(filename,"w")
         #Adding headers to csv file
-        csv_file.write("Hash Base,Table Size,Label,Filename,Word Count,Time,Conflicts,Probe Count,Probe Max,Rehash Count\n")
+        csv_file.write("Probing,Hash Base,Table Size,Label,Filename,Word Count,Time,Conflicts,Probe Count,Probe Max,Rehash Count\n")
         
-        for i in range(len(Statistics.FILES)):
-            for j in range(len(Statistics.FILES)):
-                for k in range(len(Statistics.FILES)):
-                    data = self.load_statistics(Statistics.HASH_BASES[i], Statistics.TABLESIZES[j],Statistics.FILES[k], max_time)
-                    csv_file.write(str(Statistics.HASH_BASES[i]) + "," + str(Statistics.TABLESIZES[j]) + ",")
-                    if k == 0:
-                        csv_file.write("B = " + str(Statistics.HASH_BASES[i]) + " / " + "TS = " + str(Statistics.TABLESIZES[j]) + ",")
-                    else:
-                        csv_file.write(",")
-                    csv_file.write(Statistics.FILES[k] + "," + str(data[0]) + "," + str(data[1]) + "," + str(data[2]) + "," + str(data[3]) + "," + str(data[4]) + "," + str(data[5]) + "\n")
+        for probing in Statistics.PROBING:
+            if insertion == Insertion.ROBIN_HOOD and probing != 'linear':
+                continue
+            for i in range(len(Statistics.FILES)):
+                for j in range(len(Statistics.FILES)):
+                    for k in range(len(Statistics.FILES)):
+                        data = self.load_statistics(Statistics.HASH_BASES[i], Statistics.TABLESIZES[j],Statistics.FILES[k], max_time, insertion, probing)
+                        csv_file.write(probing + "," + str(Statistics.HASH_BASES[i]) + "," + str(Statistics.TABLESIZES[j]) + ",")
+                        if k == 0:
+                            csv_file.write("B = " + str(Statistics.HASH_BASES[i]) + " / " + "TS = " + str(Statistics.TABLESIZES[j]) + ",")
+                        else:
+                            csv_file.write(",")
+                        csv_file.write(Statistics.FILES[k] + "," + str(data[0]) + "," + str(data[1]) + "," + str(data[2]) + "," + str(data[3]) + "," + str(data[4]) + "," + str(data[5]) + "\n")
         csv_file.close()
 
 
+def read_words(filename: str, chunk_size: int, encoding: str) -> Iterator[list]:
+    """
+    Reads a word list file, one word per line, a chunk at a time.
+    The file is memory mapped, and each chunk is cut at a line break and
+    decoded and split in one go, instead of reading it line by line.
+
+    :param filename: The filename of the word list
+    :param chunk_size: The number of bytes in a chunk, which is stretched to the next line break
+    :param encoding: The encoding of the file
+    :returns: A generator of the lists of stripped words in each chunk
+    :complexity: O(N) where N is the size of the file
+    """
+    with open(filename, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:  # an empty file can't be mapped
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            start = 0
+            while start < len(mapped):
+                end = min(start + chunk_size, len(mapped))
+                if end < len(mapped):  # cut after the last line break, or the first one after the chunk
+                    cut = mapped.rfind(b'\n', start, end)
+                    if cut < 0:
+                        cut = mapped.find(b'\n', end)
+                    end = len(mapped) if cut < 0 else cut + 1
+                lines = mapped[start:end].decode(encoding).split('\n')
+                if lines[-1] == '':  # the chunk ends with a line break
+                    lines.pop()
+                yield [line.strip() for line in lines]
+                start = end
+
+
 class Dictionary:
     DEFAULT_ENCODING = 'utf-8'
-    def __init__(self, hash_base: int, table_size: int) -> None:
+    CHUNK_SIZE = 1 << 20
+    BATCH_SIZE = 256
+    SNAPSHOT_MAGIC = b'DICT'
+    SNAPSHOT_VERSION = 1
+    # magic, version, size and modification time (in ns) of the word list, number of words read;
+    # followed by the snapshot of the hash table
+    SNAPSHOT_HEADER = struct.Struct('<4sHQQQ')
+    def __init__(self, hash_base: int, table_size: int, layout: Layout = Layout.TUPLE,
+                 deletion: Deletion = Deletion.TOMBSTONE, insertion: Insertion = Insertion.FIRST_COME,
+                 probing: str = 'linear', false_positive_rate: float = None) -> None:
         """
         This method creates a new Hash Table with the given hash base and
         initial table size, and uses it to initialize the instance variable
         self.hash_table
 
+        :param layout: How the hash table stores its entries, Layout.FLAT
+        avoids allocating a tuple per word for large word lists
+        :param deletion: How the hash table deletes words, tombstones keep
+        delete_word from rehashing whole clusters
+        :param insertion: Which word keeps a contested slot, Robin Hood
+        insertion evens out the probe lengths
+        :param probing: Name of the probing strategy ('linear', 'quadratic' or 'double'),
+        or 'chaining' for a separate chaining table, which ignores layout, deletion and insertion
+        :param false_positive_rate: When given, load_dictionary puts a Bloom filter with this
+        false positive rate in front of the hash table, so most words that aren't there
+        are ruled out without probing (its hits and misses end its statistics())
         :complexity: 
         """
-        self.hash_table = LinearProbeHashTable(hash_base, table_size)
+        self.false_positive_rate = false_positive_rate
+        if probing == 'chaining':
+            self.hash_table = SeparateChainingHashTable(hash_base, table_size)
+        else:
+            self.hash_table = PROBING[probing](hash_base, table_size, layout, deletion, insertion=insertion)
 
-    def load_dictionary(self, filename: str, time_limit: int = None) -> int:
+    def load_dictionary(self, filename: str, time_limit: int = None, snapshot: str = None) -> int:
         """
         This method helps load a dictionary file and reads its contents 
-        into a hash table. Each line contains one singular word
+        into a hash table. Each line contains one singular word.
+        The file is read a chunk of CHUNK_SIZE bytes at a time (see read_words),
+        and the words are hashed and inserted BATCH_SIZE at a time, checking
+        the time limit after each batch.
+        Given a snapshot file, the hash table is loaded from it instead when it
+        is still valid, and otherwise it is saved there once the words are read.
+        The Bloom filter (see false_positive_rate) is built once the words are in
 
         :param filename: The filename of the dictionary file being read
         :param time_limit: The max time on which a TimeoutError is raised
+        :param snapshot: The filename of the snapshot of the hash table, or None
         :raises TimeoutError: If given time limit is exceeded
         :returns: The number of words being read by the function
         :Best Case: TODO: 
         :Worst Case: TODO: 
         """
+        if snapshot is not None:
+            words = self.load_snapshot(snapshot, filename)
+            if words is not None:
+                if self.false_positive_rate is not None:
+                    self.hash_table.add_prefilter(self.false_positive_rate)
+                return words
+
         start_time = timeit.default_timer()
 
         words = 0
-        with open(filename, 'r', encoding=Dictionary.DEFAULT_ENCODING) as file_read:
-            line = file_read.readline()
-            while line:
-                line = line.strip()
-                self.hash_table[line] = 1
+        for chunk in read_words(filename, Dictionary.CHUNK_SIZE, Dictionary.DEFAULT_ENCODING):
+            for start in range(0, len(chunk), Dictionary.BATCH_SIZE):
+                batch = chunk[start:start + Dictionary.BATCH_SIZE]
+                self.hash_table.insert_many(batch, 1)
+                words += len(batch)
                 if time_limit is not None and timeit.default_timer() - start_time > time_limit:
                     raise TimeoutError("Exceeded time limit: " + str(time_limit))
-                words += 1
-                line = file_read.readline()
 
+        if snapshot is not None:
+            self.save_snapshot(snapshot, filename, words)
+        if self.false_positive_rate is not None:
+            self.hash_table.add_prefilter(self.false_positive_rate)
+        return words
+
+    def save_snapshot(self, filename: str, source: str, words: int) -> None:
+        """
+        This method saves the hash table to a binary snapshot file, along with
+        the size and modification time of the dictionary file it was read from
+
+        :param filename: The filename of the snapshot
+        :param source: The filename of the dictionary file the words were read from
+        :param words: The number of words read from it
+        :raises TypeError: If the hash table doesn't use open addressing, or holds data other than ints
+        :complexity: O(N) where N is the table size
+        """
+        if not isinstance(self.hash_table, LinearProbeHashTable):
+            raise TypeError("Only open addressing hash tables can be saved")
+        status = os.stat(source)
+        table = self.hash_table.snapshot()
+        with open(filename, 'wb') as file:
+            file.write(Dictionary.SNAPSHOT_HEADER.pack(Dictionary.SNAPSHOT_MAGIC, Dictionary.SNAPSHOT_VERSION,
+                                                       status.st_size, status.st_mtime_ns, words))
+            file.write(table)
+
+    def load_snapshot(self, filename: str, source: str) -> int:
+        """
+        This method loads the hash table from a binary snapshot file, which is
+        memory mapped so nothing is hashed again. The snapshot is ignored when
+        it is missing, when the dictionary file has changed size or modification
+        time since it was saved, or when it can't be restored into this hash table
+        (for instance one with another hash base, layout, deletion or insertion)
+
+        :param filename: The filename of the snapshot
+        :param source: The filename of the dictionary file the snapshot was saved from
+        :returns: The number of words read from the dictionary file, or None if the snapshot was ignored
+        :complexity: O(N) where N is the table size
+        """
+        if not isinstance(self.hash_table, LinearProbeHashTable) or not os.path.isfile(filename):
+            return None
+        status = os.stat(source)
+        with open(filename, 'rb') as file:
+            if os.fstat(file.fileno()).st_size < Dictionary.SNAPSHOT_HEADER.size:
+                return None
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                (magic, version, size, mtime, words) = Dictionary.SNAPSHOT_HEADER.unpack_from(mapped)
+                if (magic, version, size, mtime) != (Dictionary.SNAPSHOT_MAGIC, Dictionary.SNAPSHOT_VERSION,
+                                                     status.st_size, status.st_mtime_ns):
+                    return None
+                try:
+                    self.hash_table.restore(mapped, Dictionary.SNAPSHOT_HEADER.size)
+                except ValueError:
+                    return None
         return words
     
     
+    def freeze(self) -> None:
+        """
+        This method replaces the hash table with a read-only copy (see PerfectHashTable)
+        that always finds a word, or rules it out, by looking at a single slot.
+        Words can't be added or deleted afterwards.
+
+        :raises TypeError: If add_word or delete_word is called afterwards
+        :complexity: O(N) where N is the number of words, with high probability
+        """
+        self.hash_table = self.hash_table.freeze()
+
     def add_word(self, word: str) -> None:
         """
         This method adds the given word to the hash table with integer 1 as the 
@@ -120,13 +268,125 @@ class Dictionary:
     def delete_word(self, word: str) -> None:
         """
         This method deletes the given word from the hash table.
+        The slot is left as a tombstone unless the table uses Deletion.REHASH.
 
         :complexity: Best/Worst case is O(1)
         """
         word = word.strip()
         word = word.lower()
         del self.hash_table[word]
-    
+
+
+class Registry:
+    """
+    Word lists in several languages sharing one hash table, which maps each
+    word to a bit mask of the languages containing it (bit i for the i-th
+    language registered). A word found in several languages is stored once,
+    and a language is only read the first time it is needed.
+    The table grows at MAX_LOAD_FACTOR, as together the languages can hold
+    more words than a table sized for one of them.
+    """
+    DEFAULT_LANGUAGES = {'english': 'english_large.txt', 'french': 'french.txt'}
+    MAX_LOAD_FACTOR = 0.5
+
+    def __init__(self, hash_base: int, table_size: int, languages: dict = None) -> None:
+        """
+        This method creates the shared hash table and registers the given
+        languages (DEFAULT_LANGUAGES when None), without reading any of them
+
+        :param languages: The filename of the word list of each language, by name
+        :complexity: O(N + L) where N is the table size and L the number of languages
+        """
+        if languages is None:
+            languages = Registry.DEFAULT_LANGUAGES
+        self.hash_table = LinearProbeHashTable(hash_base, table_size, max_load_factor=Registry.MAX_LOAD_FACTOR)
+        self.languages = []
+        self.filenames = []
+        self.word_counts = []  # words read from each language, or None until it is loaded
+        for language in languages:
+            self.register(language, languages[language])
+
+    def register(self, language: str, filename: str) -> None:
+        """
+        This method adds a language, to be read from filename the first time it is needed
+
+        :raises ValueError: If the language is already registered
+        :complexity: O(L) where L is the number of languages
+        """
+        if language in self.languages:
+            raise ValueError("Language already registered: " + language)
+        self.languages.append(language)
+        self.filenames.append(filename)
+        self.word_counts.append(None)
+
+    def load(self, language: str) -> int:
+        """
+        This method reads the word list of a language into the shared hash table,
+        unless it has been read already. The words are lowered and hashed a chunk at a time,
+        and each one is probed once to add the bit of the language to its mask
+        (see LinearProbeHashTable.merge_many).
+
+        :raises KeyError: If the language isn't registered
+        :returns: The number of words read for the language
+        :complexity: O(W) where W is the number of words in the list, with a good hash base
+        """
+        index = self.__index(language)
+        if self.word_counts[index] is None:
+            bit = 1 << index
+            words = 0
+            for chunk in read_words(self.filenames[index], Dictionary.CHUNK_SIZE, Dictionary.DEFAULT_ENCODING):
+                self.hash_table.merge_many([word.lower() for word in chunk], bit, operator.or_)
+                words += len(chunk)
+            self.word_counts[index] = words
+        return self.word_counts[index]
+
+    def is_loaded(self, language: str) -> bool:
+        """
+        This method returns whether the word list of the language has been read
+
+        :raises KeyError: If the language isn't registered
+        :complexity: O(L) where L is the number of languages
+        """
+        return self.word_counts[self.__index(language)] is not None
+
+    def __index(self, language: str) -> int:
+        """
+        This method returns the position of the language, which is also its bit in the masks
+
+        :raises KeyError: If the language isn't registered
+        :complexity: O(L) where L is the number of languages
+        """
+        if language not in self.languages:
+            raise KeyError(language)
+        return self.languages.index(language)
+
+    def find_word(self, word: str, language: str) -> bool:
+        """
+        This method returns True if the word is in the given language, reading it first if needed
+
+        :raises KeyError: If the language isn't registered
+        :complexity: O(1) with a good hash base, once the language is loaded
+        """
+        self.load(language)
+        word = word.strip()
+        word = word.lower()
+        return bool(self.hash_table.get_or_default(word, 0) & (1 << self.__index(language)))
+
+    def languages_of(self, word: str) -> list:
+        """
+        This method returns the languages containing the word, in the order they
+        were registered, with a single probe of the shared hash table.
+        Every language is read first if it hasn't been already.
+
+        :complexity: O(L) where L is the number of languages, once they are loaded
+        """
+        for language in self.languages:
+            self.load(language)
+        word = word.strip()
+        word = word.lower()
+        mask = self.hash_table.get_or_default(word, 0)
+        return [self.languages[i] for i in range(len(self.languages)) if mask & (1 << i)]
+
 
 def process_option(dictionary : Dictionary, method_name: str) -> None:
     """ Helper code for processing menu options."""
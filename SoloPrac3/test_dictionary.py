@@ -4,9 +4,14 @@ __docformat__ = 'reStructuredText'
 __modified__ = '20/05/2020'
 __since__ = '22/05/2020'
 
+import os
+import shutil
+import tempfile
 import unittest
-from hash_table import LinearProbeHashTable
-from dictionary import Statistics, Dictionary
+from hash_table import LinearProbeHashTable, PROBING, Deletion, Insertion
+from chaining_hash_table import SeparateChainingHashTable
+from perfect_hash_table import PerfectHashTable
+from dictionary import Statistics, Dictionary, Registry, read_words
 
 
 def file_len(filename: str) -> int:
@@ -42,6 +47,45 @@ class TestDictionary(unittest.TestCase):
             lines = file_len(filename)
             self.assertEqual(words, lines, "Number of words should match number of lines")
 
+    def test_read_words(self) -> None:
+        """ Reading a word list in chunks of any size gives the same words as reading it line by line """
+        with open('english_small.txt', encoding=Dictionary.DEFAULT_ENCODING) as file:
+            lines = [line.strip() for line in file]
+        for chunk_size in [1, 1000, Dictionary.CHUNK_SIZE]:
+            words = [word for chunk in read_words('english_small.txt', chunk_size, Dictionary.DEFAULT_ENCODING) for word in chunk]
+            self.assertEqual(words, lines)
+
+    def test_snapshot(self) -> None:
+        """ Loading from a snapshot gives the same table, until the dictionary file changes """
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, 'english_small.txt')
+            snapshot = os.path.join(directory, 'english_small.snapshot')
+            shutil.copyfile('english_small.txt', source)
+            words = self.dictionary.load_dictionary(source, snapshot=snapshot)
+            self.assertTrue(os.path.isfile(snapshot))
+
+            restored = Dictionary(TestDictionary.DEFAULT_HASH_BASE, TestDictionary.DEFAULT_TABLE_SIZE)
+            self.assertEqual(restored.load_snapshot(snapshot, source), words)
+            self.assertEqual(len(restored.hash_table), len(self.dictionary.hash_table))
+            self.assertEqual(restored.hash_table.statistics(), self.dictionary.hash_table.statistics())
+            self.assertTrue(restored.find_word('Test'))
+            self.assertFalse(restored.find_word(TestDictionary.RANDOM_STR))
+
+            other_base = Dictionary(TestDictionary.DEFAULT_HASH_BASE + 1, TestDictionary.DEFAULT_TABLE_SIZE)
+            self.assertIsNone(other_base.load_snapshot(snapshot, source))
+            for policy in [{'deletion': Deletion.REHASH}, {'insertion': Insertion.ROBIN_HOOD}]:
+                other_policy = Dictionary(TestDictionary.DEFAULT_HASH_BASE, TestDictionary.DEFAULT_TABLE_SIZE, **policy)
+                self.assertIsNone(other_policy.load_snapshot(snapshot, source))
+                self.assertEqual(other_policy.load_dictionary(source, snapshot=snapshot), words)
+                self.assertTrue(other_policy.find_word('Test'))
+
+            with open(source, 'a', encoding=Dictionary.DEFAULT_ENCODING) as file:
+                file.write(TestDictionary.RANDOM_STR.lower() + '\n')
+            changed = Dictionary(TestDictionary.DEFAULT_HASH_BASE, TestDictionary.DEFAULT_TABLE_SIZE)
+            self.assertIsNone(changed.load_snapshot(snapshot, source))
+            self.assertEqual(changed.load_dictionary(source, snapshot=snapshot), words + 1)
+            self.assertTrue(changed.find_word(TestDictionary.RANDOM_STR))
+
     def test_add_word(self) -> None:
         """ Testing the ability to add words """
         # TODO: Add your own test cases
@@ -100,5 +144,87 @@ class TestDictionary(unittest.TestCase):
         self.dictionary.delete_word('GooGle')
         self.assertEqual(len(self.dictionary.hash_table), table_size - 2, "Table size not decreasing properly when deletion occurs")
 
+    def test_freeze(self) -> None:
+        """ Finding words in a frozen dictionary, which can't be changed any more """
+        words = self.dictionary.load_dictionary('english_small.txt')
+        self.dictionary.freeze()
+        self.assertEqual(type(self.dictionary.hash_table), PerfectHashTable)
+        self.assertEqual(len(self.dictionary.hash_table), words)
+        self.assertTrue(self.dictionary.find_word('Test'))
+        self.assertFalse(self.dictionary.find_word(TestDictionary.RANDOM_STR))
+        with self.assertRaises(TypeError):
+            self.dictionary.add_word('papaya')
+        with self.assertRaises(TypeError):
+            self.dictionary.delete_word('test')
+
+    def test_prefilter(self) -> None:
+        """ Every word is still found behind the Bloom filter, which rules out most other words """
+        for probing in ['linear', 'chaining']:
+            self.dictionary = Dictionary(TestDictionary.DEFAULT_HASH_BASE, TestDictionary.DEFAULT_TABLE_SIZE,
+                                         probing=probing, false_positive_rate=0.01)
+            self.dictionary.load_dictionary('english_small.txt')
+            self.assertEqual(len(self.dictionary.hash_table.statistics()), 6)
+            for chunk in read_words('english_small.txt', Dictionary.CHUNK_SIZE, Dictionary.DEFAULT_ENCODING):
+                for word in chunk:
+                    self.assertTrue(self.dictionary.find_word(word), "Could not find word: " + word)
+            self.assertFalse(self.dictionary.find_word(TestDictionary.RANDOM_STR))
+            self.dictionary.add_word('papaya')
+            self.assertTrue(self.dictionary.find_word('papaya'))
+            (hits, misses) = self.dictionary.hash_table.statistics()[4:]
+            self.assertEqual(misses, 1)
+
+    def test_probing(self) -> None:
+        """ Loading and querying a dictionary with each probing strategy and separate chaining """
+        for probing, table_type in list(PROBING.items()) + [('chaining', SeparateChainingHashTable)]:
+            self.dictionary = Dictionary(TestDictionary.DEFAULT_HASH_BASE, TestDictionary.DEFAULT_TABLE_SIZE, probing=probing)
+            self.assertEqual(type(self.dictionary.hash_table), table_type)
+            words = self.dictionary.load_dictionary('english_small.txt')
+            self.assertEqual(len(self.dictionary.hash_table), words)
+            self.assertTrue(self.dictionary.find_word('Test'))
+            self.assertFalse(self.dictionary.find_word(TestDictionary.RANDOM_STR))
+            self.dictionary.delete_word('test')
+            self.assertFalse(self.dictionary.find_word('test'))
+
+
+class TestRegistry(unittest.TestCase):
+    LANGUAGES = {'small': 'english_small.txt', 'french': 'french.txt'}
+
+    def setUp(self) -> None:
+        """ Used by our test cases """
+        self.registry = Registry(TestDictionary.DEFAULT_HASH_BASE, TestDictionary.DEFAULT_TABLE_SIZE,
+                                 TestRegistry.LANGUAGES)
+
+    def test_lazy_load(self) -> None:
+        """ A language is only read when it is first needed, and only once """
+        self.assertFalse(self.registry.is_loaded('small'))
+        self.assertTrue(self.registry.find_word('Test', 'small'))
+        self.assertTrue(self.registry.is_loaded('small'))
+        self.assertFalse(self.registry.is_loaded('french'))
+        self.assertEqual(self.registry.load('small'), file_len('english_small.txt'))
+        with self.assertRaises(KeyError):
+            self.registry.find_word('test', 'german')
+        with self.assertRaises(ValueError):
+            self.registry.register('small', 'english_large.txt')
+
+    def test_languages_of(self) -> None:
+        """ Each word is stored once and maps to every language listing it """
+        self.assertEqual(self.registry.languages_of(TestDictionary.RANDOM_STR), [])
+        self.assertTrue(self.registry.is_loaded('french'))
+        words = set()
+        for filename in TestRegistry.LANGUAGES.values():
+            for chunk in read_words(filename, Dictionary.CHUNK_SIZE, Dictionary.DEFAULT_ENCODING):
+                words.update(word.lower() for word in chunk)
+        self.assertEqual(len(self.registry.hash_table), len(words))
+
+        both = 0
+        for chunk in read_words('french.txt', Dictionary.CHUNK_SIZE, Dictionary.DEFAULT_ENCODING):
+            for word in chunk:
+                languages = self.registry.languages_of(word)
+                self.assertEqual(languages[-1], 'french', "Could not find word: " + word)
+                self.assertEqual(self.registry.find_word(word, 'small'), len(languages) == 2)
+                both += len(languages) == 2
+        self.assertGreater(both, 0)
+
+
 if __name__ == '__main__':
     unittest.main()
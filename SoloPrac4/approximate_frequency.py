@@ -0,0 +1,184 @@
+""" Approximate word frequencies, for corpora too big to count every word of.
+
+ApproximateFrequency keeps no count for each word. A Count-Min sketch
+estimates the count of any word, and a Space-Saving summary keeps the words
+with the highest counts for ranking, so it takes the same memory however many
+distinct words there are (see sketch.py for the error bounds). Frequencies
+built by different workers on different parts of a corpus can be merged.
+"""
+__docformat__ = 'reStructuredText'
+
+from frequency import Frequency, Rarity, rarity_code
+from sketch import CountMinSketch, SpaceSaving
+from list_adt import ArrayList
+from sorting import stable_sort
+from typing import Tuple, Iterator, Iterable
+from array import array
+
+
+class ApproximateFrequency(Frequency):
+    """
+    Frequency of the words, estimated
+
+    attributes (besides those of Frequency, whose hash_table is None here):
+        sketch: CountMinSketch of the counted words
+        heavy: SpaceSaving summary of the words with the highest counts
+    max_word is the monitored word with the highest count, which is at most
+    heavy.error() over its true count.
+    """
+    DEFAULT_EPSILON = 1e-4
+    DEFAULT_DELTA = 1e-3
+    DEFAULT_CAPACITY = 1000
+
+    def __init__(self, epsilon: float = DEFAULT_EPSILON, delta: float = DEFAULT_DELTA,
+                 capacity: int = DEFAULT_CAPACITY, hash_base: int = Frequency.INIT_HASH_BASE,
+                 table_size: int = Frequency.INIT_TABLE_SIZE, snapshot: str = None) -> None:
+        """
+        :param epsilon: Error allowed for an estimate, as a fraction of the number of words counted
+        :param delta: Chance of an estimate going over the error allowed
+        :param capacity: Number of words kept for ranking
+        :param table_size: Initial size of the dictionary's hash table (no counts are kept in a hash table)
+        :raises ValueError: when epsilon or delta is not between 0 and 1, or capacity is under 1
+        :see: Frequency.__init__
+        """
+        self.sketch = CountMinSketch(epsilon, delta)
+        self.heavy = SpaceSaving(capacity, hash_base)
+        Frequency.__init__(self, hash_base, table_size, snapshot)
+
+    def _make_table(self, hash_base: int, table_size: int) -> None:
+        """
+        Returns None, as the counts are kept in the sketch and the summary
+        :complexity: O(1)
+        """
+        return None
+
+    def _count(self, words: list) -> None:
+        """
+        Adds a batch of words to the sketch and the summary
+        :complexity: O(N * (D + log C)) where N is the total size of the words, D the depth
+        of the sketch and C the capacity of the summary
+        """
+        for word in words:
+            self.__add(word, 1)
+
+    def _merge_counts(self, results: Iterable[Tuple[str, bytes, bytes]]) -> None:
+        """
+        Adds the counts of the dictionary words of each range (see count_range), in order.
+        Unlike Frequency, max_word ties go to the word whose range is added first.
+        :complexity: O(D) where D is the number of distinct tokens in the ranges
+        """
+        for (text, count_bytes, _) in results:
+            words = text.split('\n') if text != '' else []
+            counts = array('q')
+            counts.frombytes(count_bytes)
+            for i in range(len(words)):
+                if words[i] in self.dictionary.hash_table:
+                    self.__add(words[i], counts[i])
+
+    def __add(self, word: str, count: int) -> None:
+        """
+        Adds count to the word in the sketch and the summary
+        :complexity: O(K + D + log C) where K is the size of the word, D the depth of the
+        sketch and C the capacity of the summary
+        """
+        self.sketch.add(word, count)
+        total = self.heavy.add(word, count)
+        if total > self.max_word[1]:
+            self.max_word = (word, total)
+
+    def merge(self, other: 'ApproximateFrequency') -> None:
+        """
+        Adds the counts of another approximate frequency with the same epsilon, delta
+        and capacity, such as one built by another worker on another part of the corpus
+        :raises ValueError: when the sketches or the summaries are not the same size
+        :complexity: O(W * D + C log C) where W * D is the size of the sketch and C the capacity
+        """
+        self.sketch.merge(other.sketch)
+        self.heavy.merge(other.heavy)
+        self.max_word = (None, 0)
+        for (word, count, _) in self.heavy.items():
+            if count > self.max_word[1] or (count == self.max_word[1] and word < self.max_word[0]):
+                self.max_word = (word, count)
+
+    def estimate(self, word: str) -> int:
+        """
+        Returns the estimate of the word's count, which is never under its true count
+        :see: CountMinSketch.__getitem__
+        """
+        return self.sketch[word]
+
+    def error_bounds(self) -> Tuple[float, float]:
+        """
+        Returns the most an estimate is over the true count (except with probability delta),
+        and the most a count in the ranking is over the true count
+        :complexity: O(1)
+        """
+        return self.sketch.error(), self.heavy.error()
+
+    def rarity(self, word: str) -> Rarity:
+        """
+        Returns how common a word is, as Frequency.rarity does, from its estimate and the
+        count of max_word. As estimates can only be over the true counts, a word may come
+        out as more common than it is, but a word that is not in the dictionary is always MISSPELT.
+        :complexity: O(K + D) where K is the size of the word and D the depth of the sketch
+        """
+        (common_from, rare_below) = self._thresholds()
+        return Rarity(rarity_code(self._counts([word])[0], common_from, rare_below))
+
+    def rarity_counts(self) -> Tuple[int, int, int]:
+        """
+        Returns the number of COMMON, UNCOMMON and RARE words among the words kept for ranking
+        :complexity: O(C) where C is the capacity
+        """
+        (common_from, rare_below) = self._thresholds()
+        tally = [0, 0, 0]
+        for (_, count, _) in self.heavy.items():
+            tally[rarity_code(count, common_from, rare_below)] += 1
+        return tally[0], tally[1], tally[2]
+
+    def _counts(self, words: list) -> list:
+        """
+        Returns the estimate of each word, 0 for the words not in the dictionary
+        :complexity: O(N * D) where N is the total size of the words and D the depth of the sketch
+        """
+        return [self.sketch[word] if word in self.dictionary.hash_table else 0 for word in words]
+
+    def _thresholds(self) -> Tuple[float, float]:
+        """
+        Returns the lowest COMMON count, and the count the RARE counts are under
+        :complexity: O(1)
+        """
+        return self.max_word[1] / 100, self.max_word[1] / 1000
+
+    def ranking(self) -> ArrayList[tuple]:
+        """
+        Returns the (word, count) pairs of the words kept for ranking, most frequent first
+        (ties go to the word first in alphabetical order). Every word whose true count is
+        over heavy.error() is there, and each count is at most that much over the true count.
+        :complexity: O(C log C) where C is the capacity
+        """
+        rank_list = ArrayList(len(self.heavy))
+        for (word, count, _) in self.heavy.items():
+            rank_list.append((word, count))
+        stable_sort(rank_list, key=lambda entry: (-entry[1], entry[0]))
+        return rank_list
+
+    def top_k(self, k: int) -> ArrayList[tuple]:
+        """
+        Returns the first k pairs of the ranking; all of them when k is over the capacity
+        :complexity: O(C log C) where C is the capacity
+        """
+        rank_list = self.ranking()
+        top = ArrayList(min(k, len(rank_list)))
+        for i in range(min(k, len(rank_list))):
+            top.append(rank_list[i])
+        return top
+
+    def iter_ranking(self) -> Iterator[tuple]:
+        """
+        Yields the pairs of the ranking, one at a time
+        :complexity: O(C log C) where C is the capacity
+        """
+        rank_list = self.ranking()
+        for i in range(len(rank_list)):
+            yield rank_list[i]
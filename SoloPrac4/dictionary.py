@@ -1,30 +1,140 @@
 from hash_table import LinearProbeHashTable
-from typing import Tuple
+from typing import Tuple, Iterator
+import mmap
+import os
+import struct
 import timeit
 
+
+def read_words(filename: str, chunk_size: int, encoding: str) -> Iterator[list]:
+    """
+    Reads a word list file, one word per line, a chunk at a time.
+    The file is memory mapped, and each chunk is cut at a line break and
+    decoded and split in one go, instead of reading it line by line.
+
+    :param filename: The filename of the word list
+    :param chunk_size: The number of bytes in a chunk, which is stretched to the next line break
+    :param encoding: The encoding of the file
+    :returns: A generator of the lists of stripped words in each chunk
+    :complexity: O(N) where N is the size of the file
+    """
+    with open(filename, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:  # an empty file can't be mapped
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            start = 0
+            while start < len(mapped):
+                end = min(start + chunk_size, len(mapped))
+                if end < len(mapped):  # cut after the last line break, or the first one after the chunk
+                    cut = mapped.rfind(b'\n', start, end)
+                    if cut < 0:
+                        cut = mapped.find(b'\n', end)
+                    end = len(mapped) if cut < 0 else cut + 1
+                lines = mapped[start:end].decode(encoding).split('\n')
+                if lines[-1] == '':  # the chunk ends with a line break
+                    lines.pop()
+                yield [line.strip() for line in lines]
+                start = end
+
+
 class Dictionary:
     DEFAULT_ENCODING = 'utf-8'
+    CHUNK_SIZE = 1 << 20
+    BATCH_SIZE = 256
+    SNAPSHOT_MAGIC = b'DICT'
+    SNAPSHOT_VERSION = 1
+    # magic, version, size and modification time (in ns) of the word list, number of words read;
+    # followed by the snapshot of the hash table
+    SNAPSHOT_HEADER = struct.Struct('<4sHQQQ')
 
-    def __init__(self, hash_base: int, table_size: int) -> None:
+    def __init__(self, hash_base: int, table_size: int, false_positive_rate: float = None) -> None:
         self.hash_table = LinearProbeHashTable(hash_base, table_size)
+        self.false_positive_rate = false_positive_rate
 
-    def load_dictionary(self, filename: str, time_limit: int = None) -> int:
+    def load_dictionary(self, filename: str, time_limit: int = None, snapshot: str = None) -> int:
         # self.table = LinearProbeHashTable(self.hash_base, self.table_size)
+        if snapshot is not None:
+            words = self.load_snapshot(snapshot, filename)
+            if words is not None:
+                if self.false_positive_rate is not None:
+                    self.hash_table.add_prefilter(self.false_positive_rate)
+                return words
+
         start_time = timeit.default_timer()
 
         words = 0
-        with open(filename, 'r', encoding=Dictionary.DEFAULT_ENCODING) as file:
-            line = file.readline()
-            while line:
-                line = line.strip()
-                self.hash_table[line] = 1
+        for chunk in read_words(filename, Dictionary.CHUNK_SIZE, Dictionary.DEFAULT_ENCODING):
+            for start in range(0, len(chunk), Dictionary.BATCH_SIZE):
+                batch = chunk[start:start + Dictionary.BATCH_SIZE]
+                self.hash_table.insert_many(batch, 1)
+                words += len(batch)
                 if time_limit is not None and timeit.default_timer() - start_time > time_limit:
                     raise TimeoutError("Exceeded time limit: " + str(time_limit))
-                words += 1
-                line = file.readline()
 
+        if snapshot is not None:
+            self.save_snapshot(snapshot, filename, words)
+        if self.false_positive_rate is not None:
+            self.hash_table.add_prefilter(self.false_positive_rate)
         return words
 
+    def save_snapshot(self, filename: str, source: str, words: int) -> None:
+        """
+        This method saves the hash table to a binary snapshot file, along with
+        the size and modification time of the dictionary file it was read from
+
+        :param filename: The filename of the snapshot
+        :param source: The filename of the dictionary file the words were read from
+        :param words: The number of words read from it
+        :raises TypeError: If the hash table doesn't use open addressing, or holds data other than ints
+        :complexity: O(N) where N is the table size
+        """
+        if not isinstance(self.hash_table, LinearProbeHashTable):
+            raise TypeError("Only open addressing hash tables can be saved")
+        status = os.stat(source)
+        table = self.hash_table.snapshot()
+        with open(filename, 'wb') as file:
+            file.write(Dictionary.SNAPSHOT_HEADER.pack(Dictionary.SNAPSHOT_MAGIC, Dictionary.SNAPSHOT_VERSION,
+                                                       status.st_size, status.st_mtime_ns, words))
+            file.write(table)
+
+    def load_snapshot(self, filename: str, source: str) -> int:
+        """
+        This method loads the hash table from a binary snapshot file, which is
+        memory mapped so nothing is hashed again. The snapshot is ignored when
+        it is missing, when the dictionary file has changed size or modification
+        time since it was saved, or when it can't be restored into this hash table
+        (for instance one with another hash base, layout, deletion or insertion)
+
+        :param filename: The filename of the snapshot
+        :param source: The filename of the dictionary file the snapshot was saved from
+        :returns: The number of words read from the dictionary file, or None if the snapshot was ignored
+        :complexity: O(N) where N is the table size
+        """
+        if not isinstance(self.hash_table, LinearProbeHashTable) or not os.path.isfile(filename):
+            return None
+        status = os.stat(source)
+        with open(filename, 'rb') as file:
+            if os.fstat(file.fileno()).st_size < Dictionary.SNAPSHOT_HEADER.size:
+                return None
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                (magic, version, size, mtime, words) = Dictionary.SNAPSHOT_HEADER.unpack_from(mapped)
+                if (magic, version, size, mtime) != (Dictionary.SNAPSHOT_MAGIC, Dictionary.SNAPSHOT_VERSION,
+                                                     status.st_size, status.st_mtime_ns):
+                    return None
+                try:
+                    self.hash_table.restore(mapped, Dictionary.SNAPSHOT_HEADER.size)
+                except ValueError:
+                    return None
+        return words
+
+    def freeze(self) -> None:
+        """
+        This method replaces the hash table with a read-only copy (see PerfectHashTable)
+        that always finds a word, or rules it out, by looking at a single slot.
+        Words can't be added or deleted afterwards.
+        """
+        self.hash_table = self.hash_table.freeze()
+
     def add_word(self, word: str) -> None:
         self.hash_table[word.lower()] = 1
 
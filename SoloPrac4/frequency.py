@@ -1,10 +1,16 @@
 from hash_table import LinearProbeHashTable
 from dictionary import Dictionary
 from list_adt import ArrayList
+from heap import Heap
+from sorting import sort, stable_sort
 from enum import Enum
-from typing import Tuple
+from typing import Tuple, Iterator, Iterable
 from string import punctuation
-import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+import codecs
+import os
+import timeit
 
 from referential_array import ArrayR
 
@@ -16,138 +22,623 @@ class Rarity(Enum):
     MISSPELT = 3
 
 
+def rarity_code(count: float, common_from: float, rare_below: float) -> int:
+    """
+    Returns the value of the Rarity of a word with the given count, where counts
+    from common_from up are COMMON, counts under rare_below are RARE and a count
+    of 0 (or less) is MISSPELT
+
+    :complexity: O(1)
+    """
+    if count <= 0:
+        return Rarity.MISSPELT.value
+    if count >= common_from:
+        return Rarity.COMMON.value
+    if count < rare_below:
+        return Rarity.RARE.value
+    return Rarity.UNCOMMON.value
+
+
+class CountHistogram:
+    """
+    The number of words with each count, kept up to date as counts change, so
+    how many words are COMMON, UNCOMMON or RARE (see Frequency.rarity) is known
+    at any time without going through the words. A word is COMMON when its
+    count is at least max_count / COMMON_DIVISOR, and RARE when it is under
+    max_count / RARE_DIVISOR. The two thresholds only move when max_count does,
+    and then only the counts between the old and new thresholds are looked at.
+    Counts under DENSE_LIMIT are kept in an array indexed by count, and the few
+    higher ones in a dict, so the memory used doesn't grow with max_count.
+
+    attributes:
+        array: array[c] is the number of words with count c, for c under DENSE_LIMIT
+        sparse: sparse[c] is the number of words with count c, for the counts c
+                of at least DENSE_LIMIT that some word has
+        words: number of words with a count over 0
+        max_count: highest count of any word, 0 when there are none
+        common_from: lowest COMMON count
+        rare_below: the counts under it are RARE
+        common: number of COMMON words
+        rare: number of RARE words
+    """
+    COMMON_DIVISOR = 100
+    RARE_DIVISOR = 1000
+    DENSE_LIMIT = 1 << 16
+
+    def __init__(self) -> None:
+        self.array = array('q', [0, 0])
+        self.sparse = {}
+        self.words = 0
+        self.max_count = 0
+        self.common_from = 0
+        self.rare_below = 0
+        self.common = 0
+        self.rare = 0
+
+    def __getitem__(self, count: int) -> int:
+        """
+        Returns the number of words with the given count
+        :complexity: O(1)
+        """
+        if count < len(self.array):
+            return self.array[count]
+        return self.sparse.get(count, 0)
+
+    def move(self, old: int, new: int) -> None:
+        """
+        Records a word's count changing from old to new, where a count of 0
+        means the word isn't there (so it was just added, or just removed)
+        :complexity: O(1) amortised while counts only go up; otherwise O(D) when
+        max_count goes down by D, or O(S) when it goes down from a count of at
+        least DENSE_LIMIT, where S is the number of such counts
+        """
+        if old > 0:
+            self.__add(old, -1)
+            self.words -= 1
+            self.common -= old >= self.common_from
+            self.rare -= old < self.rare_below
+        if new > self.max_count:
+            if len(self.array) <= new and len(self.array) < CountHistogram.DENSE_LIMIT:
+                size = min(CountHistogram.DENSE_LIMIT, max(2 * len(self.array), new + 1))
+                self.array.extend(array('q', [0]) * (size - len(self.array)))
+            self.__set_max(new)
+        if new > 0:
+            self.__add(new, 1)
+            self.words += 1
+            self.common += new >= self.common_from
+            self.rare += new < self.rare_below
+        if old == self.max_count and new < old and self[old] == 0:
+            highest = old
+            if highest >= len(self.array):
+                highest = max(self.sparse) if len(self.sparse) > 0 else len(self.array) - 1
+            while highest > 0 and self[highest] == 0:
+                highest -= 1
+            self.__set_max(highest)
+
+    def classify(self, count: int) -> int:
+        """
+        Returns the value of the Rarity of a word with the given count
+        :complexity: O(1)
+        """
+        return rarity_code(count, self.common_from, self.rare_below)
+
+    def tally(self) -> Tuple[int, int, int]:
+        """
+        Returns the number of COMMON, UNCOMMON and RARE words
+        :complexity: O(1)
+        """
+        return self.common, self.words - self.common - self.rare, self.rare
+
+    def __add(self, count: int, amount: int) -> None:
+        """
+        Adds amount to the number of words with the given count, dropping
+        the counts of the sparse part that no word has any more
+        :complexity: O(1)
+        """
+        if count < len(self.array):
+            self.array[count] += amount
+        elif self.sparse.get(count, 0) + amount == 0:
+            del self.sparse[count]
+        else:
+            self.sparse[count] = self.sparse.get(count, 0) + amount
+
+    def __set_max(self, max_count: int) -> None:
+        """
+        Sets max_count, moving the thresholds and the words between their old and new places
+        :complexity: O(D) where D is how far the thresholds move
+        """
+        common_from = -(-max_count // CountHistogram.COMMON_DIVISOR)
+        rare_below = -(-max_count // CountHistogram.RARE_DIVISOR)
+        self.common -= self.__words_between(self.common_from, common_from)
+        self.rare += self.__words_between(self.rare_below, rare_below)
+        (self.max_count, self.common_from, self.rare_below) = (max_count, common_from, rare_below)
+
+    def __words_between(self, low: int, high: int) -> int:
+        """
+        Returns the number of words with counts from low up to (not including) high,
+        negated when high is below low
+        :complexity: O(min(|high - low|, S)) where S is the number of counts in the sparse part
+        """
+        if low > high:
+            return -self.__words_between(high, low)
+        dense = len(self.array)
+        total = sum(self.array[min(low, dense):min(high, dense)])
+        low = max(low, dense)
+        if high - low <= len(self.sparse):
+            return total + sum(self.sparse.get(count, 0) for count in range(low, high))
+        return total + sum(words for (count, words) in self.sparse.items() if low <= count < high)
+
+
+class Throughput:
+    """
+    Counts the items a stage of the add_file pipeline has produced, and the
+    time spent producing them. Stages pull from each other, so the time
+    measured around a stage includes the stages before it (inclusive_seconds),
+    and its own share is what is left once theirs is taken off (seconds).
+    """
+    def __init__(self, name: str, upstream: 'Throughput' = None) -> None:
+        """
+        :param name: The name of the stage
+        :param upstream: The throughput of the stage before, or None for the first stage
+        """
+        self.name = name
+        self.upstream = upstream
+        self.items = 0
+        self.inclusive_seconds = 0.0
+
+    def seconds(self) -> float:
+        """
+        Returns the time spent in this stage alone
+        :complexity: O(1)
+        """
+        if self.upstream is None:
+            return self.inclusive_seconds
+        return self.inclusive_seconds - self.upstream.inclusive_seconds
+
+    def rate(self) -> float:
+        """
+        Returns the number of items produced per second spent in this stage alone
+        :complexity: O(1)
+        """
+        seconds = self.seconds()
+        return self.items / seconds if seconds > 0 else 0.0
+
+    def __str__(self) -> str:
+        return '{}: {} items in {:.3f}s ({:.0f} items/s)'.format(self.name, self.items, self.seconds(), self.rate())
+
+
+def metered(batches: Iterable[list], throughput: Throughput) -> Iterator[list]:
+    """
+    Passes the batches of a pipeline stage on, adding the size of each batch
+    and the time taken to produce it to throughput
+
+    :complexity: O(B) where B is the number of batches
+    """
+    iterator = iter(batches)
+    while True:
+        start = timeit.default_timer()
+        try:
+            batch = next(iterator)
+        except StopIteration:
+            throughput.inclusive_seconds += timeit.default_timer() - start
+            return
+        throughput.inclusive_seconds += timeit.default_timer() - start
+        throughput.items += len(batch)
+        yield batch
+
+
+def read_text(filename: str, chunk_size: int, encoding: str) -> Iterator[str]:
+    """
+    Reads a text file chunk_size characters at a time, so the whole file is never in memory
+
+    :complexity: O(N) where N is the size of the file
+    """
+    with open(filename, 'r', encoding=encoding) as file:
+        chunk = file.read(chunk_size)
+        while chunk:
+            yield chunk
+            chunk = file.read(chunk_size)
+
+
+def tokenize(chunks: Iterable[str]) -> Iterator[list]:
+    """
+    Splits each chunk of text on whitespace. A token cut off at the end
+    of a chunk is held back and joined to the start of the next one.
+
+    :complexity: O(N) where N is the number of characters
+    """
+    carry = ''
+    for chunk in chunks:
+        tokens = (carry + chunk).split()
+        carry = ''
+        if len(tokens) > 0 and not chunk[-1].isspace():
+            carry = tokens.pop()
+        yield tokens
+    if carry != '':
+        yield [carry]
+
+
+def normalise(batches: Iterable[list]) -> Iterator[list]:
+    """
+    Lowers each token and strips the punctuation around it
+
+    :complexity: O(N) where N is the number of characters
+    """
+    for tokens in batches:
+        yield [token.lower().strip(punctuation) for token in tokens]
+
+
+def read_range(filename: str, start: int, end: int, chunk_size: int, encoding: str) -> Iterator[str]:
+    """
+    Reads the bytes from start to end of a text file chunk_size bytes at a time,
+    decoding them as it goes (a character split between chunks is kept back for the next)
+
+    :complexity: O(N) where N is end - start
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        position = start
+        while position < end:
+            data = file.read(min(chunk_size, end - position))
+            if not data:
+                break
+            position += len(data)
+            yield decoder.decode(data, position >= end)
+
+
+def shard_ranges(filename: str, shard_size: int) -> list:
+    """
+    Cuts a file into byte ranges of about shard_size bytes, each ending just after
+    an ASCII whitespace byte (or at the end of the file), so no token or encoded
+    character is split between ranges
+
+    :returns: A list of (start, end) pairs covering the file in order
+    :complexity: O(N / S + W) where N is the size of the file, S the shard size and W the length of the longest token
+    """
+    size = os.path.getsize(filename)
+    ranges = []
+    start = 0
+    with open(filename, 'rb') as file:
+        while start < size:
+            end = start + shard_size
+            if end >= size:
+                end = size
+            else:
+                file.seek(end)
+                while end < size and not file.read(1).isspace():
+                    end += 1
+                end = min(end + 1, size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def count_range(filename: str, start: int, end: int, hash_base: int, chunk_size: int, encoding: str) -> Tuple[str, bytes, bytes]:
+    """
+    Counts the normalised tokens in a byte range of a file (see shard_ranges),
+    without looking them up in any dictionary. Runs in the worker processes of Frequency.add_files.
+
+    :returns: The distinct tokens in the order they first appear, joined by newlines
+    (which no token contains), then the count of each and the position (among the
+    tokens of the range) of its last occurrence, both as the bytes of an int64 array
+    :complexity: O(N) where N is end - start, with a good hash base
+    """
+    first = LinearProbeHashTable(hash_base, (end - start) // 8)  # token -> index of the token in words, sized so it rarely grows
+    words = []
+    counts = array('q')
+    lasts = array('q')
+    position = 0
+    for tokens in normalise(tokenize(read_range(filename, start, end, chunk_size, encoding))):
+        for word in tokens:
+            if word == '':
+                continue
+            index = first.merge(word, len(words), lambda index, new_index: index)
+            if index == len(words):
+                words.append(word)
+                counts.append(0)
+                lasts.append(0)
+            counts[index] += 1
+            lasts[index] = position
+            position += 1
+    return '\n'.join(words), counts.tobytes(), lasts.tobytes()
+
+
+def ranks_before(a: Tuple[str, int], b: Tuple[str, int]) -> bool:
+    """
+    Returns whether the (word, count) pair a ranks before b: it has the higher count,
+    or the same count and a word first in alphabetical order
+
+    :complexity: O(K) where K is the size of the words
+    """
+    return a[1] > b[1] or (a[1] == b[1] and a[0] < b[0])
+
+
+def top_pairs(pairs: Iterable[tuple], size: int, k: int) -> ArrayList[tuple]:
+    """
+    Returns the k pairs that rank first (see ranks_before) out of size pairs, in
+    order, keeping the best k so far in a min-heap with the weakest on top
+
+    :complexity: O(N log k) where N is the number of pairs
+    """
+    k = min(k, size)
+    heap = Heap(k, lambda a, b: ranks_before(b, a))
+    for entry in pairs:
+        if not heap.is_full():
+            heap.add(entry)
+        elif ranks_before(entry, heap.peek()):
+            heap.replace(entry)
+    top = ArrayList(k)
+    for _ in range(k):
+        top.append(None)
+    for i in range(k - 1, -1, -1):  # the weakest pair comes out of the heap first
+        top[i] = heap.extract()
+    return top
+
+
 class Frequency:
     INIT_HASH_BASE = 31
     INIT_TABLE_SIZE = 250727
-    def __init__(self, hash_base: int = INIT_HASH_BASE, table_size: int = INIT_TABLE_SIZE) -> None:
+    CHUNK_SIZE = 1 << 16
+    SHARD_SIZE = 1 << 20
+    STAGES = ['read', 'tokenize', 'normalise', 'filter', 'count']
+    def __init__(self, hash_base: int = INIT_HASH_BASE, table_size: int = INIT_TABLE_SIZE,
+                 snapshot: str = None) -> None:
         """
         Constructor for the frequency class, creates a dictionary using the English large file
         :param hash_base: Sets the base for the hash table, defaults to the default value mentioned in
         the Linear Probe Hash Table
         :param table_size: Sets the size for the hash table, defaults to the default value mentioned in
         the Linear Probe Hash Table
+        :param snapshot: Snapshot file the dictionary is loaded from while it is valid, and saved to
+        otherwise (see Dictionary.load_dictionary), or None to always read the English large file
         """
-        self.hash_table = LinearProbeHashTable(hash_base, table_size)
+        self.hash_table = self._make_table(hash_base, table_size)
         self.dictionary = Dictionary(hash_base, table_size)
-        self.dictionary.load_dictionary('english_large.txt')
+        self.dictionary.load_dictionary('english_large.txt', snapshot=snapshot)
         self.max_word = (None, 0)
-    
+        self.histogram = CountHistogram()
+        self.throughput = {}
+        upstream = None
+        for name in Frequency.STAGES:
+            upstream = Throughput(name, upstream)
+            self.throughput[name] = upstream
+
+    def _make_table(self, hash_base: int, table_size: int) -> LinearProbeHashTable[int]:
+        """
+        Returns the hash table the counts are kept in
+
+        :complexity: O(N) where N is the table size
+        """
+        return LinearProbeHashTable(hash_base, table_size)
+
     def add_file(self, filename: str) -> None:
-        # TODO: Implement this method
         """
-        
+        Counts the words of a file that are in the dictionary, streaming it through
+        the stages read -> tokenize -> normalise -> filter -> count a chunk of
+        CHUNK_SIZE characters at a time, so memory use doesn't grow with the file.
+        The items and time of each stage add up in self.throughput across files.
+
+        :param filename: The filename of the text being counted
+        :complexity: O(N) where N is the number of characters in the file, with a good hash base
+        """
+        batches = metered(read_text(filename, Frequency.CHUNK_SIZE, Dictionary.DEFAULT_ENCODING), self.throughput['read'])
+        batches = metered(tokenize(batches), self.throughput['tokenize'])
+        batches = metered(normalise(batches), self.throughput['normalise'])
+        batches = metered(self.__in_dictionary(batches), self.throughput['filter'])
+        counted = self.throughput['count']
+        start = timeit.default_timer()
+        for words in batches:
+            self._count(words)
+            counted.items += len(words)
+        counted.inclusive_seconds += timeit.default_timer() - start
+
+    def _count(self, words: list) -> None:
+        """
+        Counts a batch of words of the file being added, the last stage of add_file
+
+        :complexity: O(N) where N is the total size of the words, with a good hash base
+        """
+        for word in words:
+            count = self.hash_table.increment(word)
+            self.histogram.move(count - 1, count)
+            if count > self.max_word[1]:
+                self.max_word = (word, count)
+
+    def add_files(self, filenames: list, workers: int = None, shard_size: int = SHARD_SIZE) -> None:
+        """
+        Counts the words of several files that are in the dictionary, giving the same
+        counts and max_word as calling add_file on each file in turn. The files are cut
+        into byte ranges of about shard_size bytes (see shard_ranges), which are counted
+        in a pool of worker processes (see count_range). Their counts are merged into
+        self.hash_table in file order, keeping only the dictionary words, so each distinct
+        word is looked up once per range rather than once per occurrence.
+        self.throughput is not updated.
+
+        :param filenames: The filenames of the texts being counted, in order
+        :param workers: The number of worker processes, by default one per CPU;
+        with 1 worker (or a single range) the ranges are counted in this process
+        :param shard_size: The approximate number of bytes in a range
+        :complexity: O(N / P + D) where N is the total size of the files, P the number of
+        workers and D the number of distinct tokens in the ranges, with a good hash base
         """
-        with open(filename, 'r', encoding=Dictionary.DEFAULT_ENCODING) as file:
-            line = file.readline()
-            while line:
-                line = line.split()
-                if line != []:
-                    for i in range(len(line)):
-                        word = line[i]
-                        word = word.lower()
-                        word = word.strip(punctuation)
-                        
-                        if self.dictionary.find_word(word) == True:
-                            if word in self.hash_table:
-                                self.hash_table[word] = self.hash_table[word] + 1
+        shards = []
+        for filename in filenames:
+            for (start, end) in shard_ranges(filename, shard_size):
+                shards.append((filename, start, end))
+        arguments = [[shard[i] for shard in shards] for i in range(3)]
+        size = len(shards)
+        arguments += [[self.dictionary.hash_table.hash_base] * size, [Frequency.CHUNK_SIZE] * size,
+                      [Dictionary.DEFAULT_ENCODING] * size]
+        if workers == 1 or len(shards) <= 1:
+            results = map(count_range, *arguments)
+            self._merge_counts(results)
+        else:
+            with ProcessPoolExecutor(workers) as pool:
+                self._merge_counts(pool.map(count_range, *arguments))
 
-                                if self.hash_table[word] > self.max_word[1]:
-                                    self.max_word = (word, self.hash_table[word])
+    def _merge_counts(self, results: Iterable[Tuple[str, bytes, bytes]]) -> None:
+        """
+        Adds the counts of the dictionary words of each range (see count_range), in order, to self.hash_table.
+        Adding a file token by token updates max_word when a word's count passes the
+        highest so far, so among the words with the highest final count, the one whose
+        last occurrence comes first wins (unless none passes the max_word held before).
 
-                            else:
-                                self.hash_table[word] = 1
+        :complexity: O(D) where D is the number of distinct tokens in the ranges, with a good hash base
+        """
+        latest = LinearProbeHashTable(self.hash_table.hash_base)  # word -> (range, position) of its last occurrence
+        merged = []
+        shard = 0
+        for (text, count_bytes, last_bytes) in results:
+            words = text.split('\n') if text != '' else []
+            counts = array('q')
+            counts.frombytes(count_bytes)
+            lasts = array('q')
+            lasts.frombytes(last_bytes)
+            for i in range(len(words)):
+                word = words[i]
+                if word in self.dictionary.hash_table:
+                    count = self.hash_table.increment(word, counts[i])
+                    self.histogram.move(count - counts[i], count)
+                    if word not in latest:
+                        merged.append(word)
+                    latest[word] = (shard, lasts[i])
+            shard += 1
+
+        (best_word, best_count) = self.max_word
+        best_last = None
+        for word in merged:
+            count = self.hash_table[word]
+            last = latest[word]
+            if count > best_count or (count == best_count and best_last is not None and last < best_last):
+                (best_word, best_count, best_last) = (word, count, last)
+        self.max_word = (best_word, best_count)
 
-                line = file.readline()
+    def __in_dictionary(self, batches: Iterable[list]) -> Iterator[list]:
+        """
+        Keeps the normalised words that are in the dictionary
+
+        :complexity: O(N) where N is the number of words, with a good hash base
+        """
+        for words in batches:
+            yield [word for word in words if word != '' and word in self.dictionary.hash_table]
 
     def rarity(self, word: str) -> Rarity:
-        # TODO: Implement this method
         """
+        Returns how common a word is: COMMON when its count is at least 1/100 of the
+        highest count, RARE when under 1/1000 of it, UNCOMMON in between, and MISSPELT
+        when it hasn't been counted. The thresholds are kept by self.histogram.
+
+        :complexity: O(K) where K is the size of the word, with a good hash base
         """
-        if word in self.hash_table:
-            count = self.hash_table[word]
-            max = self.max_word[1]
-            type = None
-
-            if count >= max/100:
-                type = 0
-            elif count < max/1000:
-                type = 2
-            elif count < max/100 and count >= max/1000:
-                type = 1
-        else:
-            type = 3
+        (common_from, rare_below) = self._thresholds()
+        return Rarity(rarity_code(self.hash_table.get_or_default(word, 0), common_from, rare_below))
 
-        return(Rarity(type))
+    def rarities(self, words: Iterable[str]) -> Iterator[Rarity]:
+        """
+        Yields the rarity of each word in turn (see rarity)
 
-    
-    def ranking(self) -> ArrayList[tuple]:
-        # TODO: Implement this method
-        rank_list = ArrayList(len(self.hash_table))
-        array = str(self.hash_table)
-        array = array.split()
+        :see: #self.rarity_many(words: Iterable[str])
+        """
+        for code in self.rarity_many(words):
+            yield Rarity(code)
+
+    def rarity_many(self, words: Iterable[str]) -> array:
+        """
+        Returns the rarities of the words as the values of their Rarity (see rarity),
+        in a typed array of bytes with one code per word. The words are hashed all at
+        once (see LinearProbeHashTable.get_many) and looked up once each, and the
+        thresholds are read once for the whole batch.
+
+        :param words: A list, ArrayR, ArrayList or any other iterable of words
+        :complexity: O(N) where N is the total size of the words, with a good hash base
+        """
+        if isinstance(words, (ArrayList, ArrayR)):  # iterating an ArrayList runs on past its length
+            words = [words[i] for i in range(len(words))]
+        elif not isinstance(words, list):
+            words = list(words)
+        counts = self._counts(words)
+        (common_from, rare_below) = self._thresholds()
+        codes = array('b', bytes(len(counts)))
+        for i in range(len(counts)):
+            codes[i] = rarity_code(counts[i], common_from, rare_below)
+        return codes
+
+    def rarity_counts(self) -> Tuple[int, int, int]:
+        """
+        Returns the number of COMMON, UNCOMMON and RARE words right now
 
-        # Create the Unsorted ArrayList of Tuples
-        for i in range(len(self.hash_table)):
-            array[i] = array[i].strip(punctuation)
-            
-            word = ''
-            num = ''
+        :complexity: O(1)
+        """
+        return self.histogram.tally()
 
-            j=0
-            while array[i][j] != ',':
-                word += array[i][j]
-                j+= 1
+    def _counts(self, words: list) -> list:
+        """
+        Returns the count of each word, 0 for the words not counted
 
-            for k in range(j+1, len(array[i])):
-                num += array[i][k]
-            num = int(num)
+        :see: LinearProbeHashTable.get_many
+        """
+        return self.hash_table.get_many(words, 0)
 
-            add_me = (word, num)
-            rank_list.append(add_me)
+    def _thresholds(self) -> Tuple[float, float]:
+        """
+        Returns the lowest COMMON count, and the count the RARE counts are under
 
-        self.qsort(rank_list)
-        return rank_list
+        :complexity: O(1)
+        """
+        return self.histogram.common_from, self.histogram.rare_below
 
-    def qsort(self, array: ArrayList[tuple]) -> None:
-        """ QuickSort public interface. """
+    def ranking(self) -> ArrayList[tuple]:
+        """
+        Returns every (word, count) pair, most frequent first (ties go to the word
+        first in alphabetical order), sorted with stable_sort on (-count, word)
 
-        #random.seed()
-        self._qsort_aux(array, 0, len(array) - 1)
+        :complexity: O(N log N) where N is the number of distinct words
+        """
+        rank_list = self.__entries()
+        stable_sort(rank_list, key=lambda entry: (-entry[1], entry[0]))
+        return rank_list
 
-    def _qsort_aux(self, array: ArrayList[tuple], low: int, high: int) -> None:
-        """ Actual implementation of QuickSort.
-            Sorts a list of elements in-place.
+    def top_k(self, k: int) -> ArrayList[tuple]:
         """
+        Returns the k most frequent (word, count) pairs, most frequent first (ties go
+        to the word first in alphabetical order), without sorting the other words.
+        A min-heap holds the best k pairs so far, with the weakest on top, and each
+        other pair only goes in when it beats the weakest.
 
-        if low < high:
-            boundary = self.partition(array, low, high)
-            self._qsort_aux(array, low, boundary-1)
-            self._qsort_aux(array, boundary+1, high)
-    
-    def partition(self, array: ArrayList[tuple], low: int, high: int) -> int:
-        """ Randomly selects a pivot element and
-                1. moves smaller elements to the left
-                2. moves greater elements to the right
-            Returns the position of the pivot element.
+        :param k: The number of pairs wanted; all of them when there are fewer words
+        :complexity: O(N log k) where N is the number of distinct words
         """
+        return top_pairs(self.hash_table.items(), len(self.hash_table), k)
 
-        # set pivot as mid
-        pivot = (low+high)//2
+    def iter_ranking(self) -> Iterator[tuple]:
+        """
+        Yields the (word, count) pairs in the order of top_k, one at a time: the
+        pairs are heapified at once, and each one is only taken off the heap
+        when it is asked for.
 
-        # TODO
-        array[low], array[pivot] = array[pivot], array[low]
-        boundary = low
+        :complexity: O(N + R log N) where N is the number of distinct words and R the number of pairs taken
+        """
+        heap = Heap(len(self.hash_table), ranks_before, self.hash_table.items())
+        while not heap.is_empty():
+            yield heap.extract()
+
+    def __entries(self) -> ArrayList[tuple]:
+        """
+        Returns the (word, count) pairs of the hash table, in no particular order
 
-        for k in range(low+1, high+1):
-            if array[k][1] > array[low][1]:
-                boundary += 1
-                array[k], array[boundary] = array[boundary], array[k]
+        :complexity: O(N) where N is the table size
+        """
+        rank_list = ArrayList(len(self.hash_table))
+        for entry in self.hash_table.items():
+            rank_list.append(entry)
+        return rank_list
 
-        array[low], array[boundary] = array[boundary], array[low]
-        return boundary
+    def qsort(self, array: ArrayList[tuple]) -> None:
+        """ Sorts (word, count) pairs in place, most frequent first. See sorting.sort """
+        sort(array, key=lambda entry: entry[1], reverse=True)
 
 def frequency_analysis() -> None:
-    sys.setrecursionlimit(10000)
     frequency = Frequency()
     try:
         frequency.add_file('215-0.txt')
@@ -155,21 +646,14 @@ def frequency_analysis() -> None:
         print(e)
 
     if frequency.max_word is not None:
-        most_common_words = frequency.ranking()
-        
         # Print the top 10 words
         max_rank = 10
-        top = 0
-        for word, word_frequency in most_common_words:
+        for word, word_frequency in frequency.top_k(max_rank):
             print('[{}] {} -> {}'.format(word, word_frequency, frequency.rarity(word)))
-            top += 1
-            if top >= max_rank:
-                break
 
 
 if __name__ == '__main__':
     #frequency_analysis()
-    #sys.setrecursionlimit(100000000)
     
     f = Frequency()
     f.add_file("215-0.txt")
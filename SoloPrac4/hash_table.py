@@ -1,7 +1,21 @@
 """ Hash Table ADT
 
-Defines a Hash Table using Linear Probing for conflict resolution.
-It currently rehashes the primary cluster to handle deletion.
+Defines a Hash Table using Linear Probing for conflict resolution,
+along with Quadratic Probing and Double Hashing variants sharing its API.
+Deletion either rehashes the rest of the primary cluster or leaves a
+tombstone behind, compacting the table once tombstones build up (see Deletion).
+Insertion is either first come first served or Robin Hood, which keeps the
+probe distances even and deletes by shifting entries back (see Insertion).
+Entries can be stored either as (key, data, hash) tuples or flat, with the
+keys and values side by side in one list and the hashes in a typed array (see Layout). The hash kept with each
+entry is full_hash(key), kept to 64 bits, which does not depend on the table size, so entries
+are moved around (rehash, migration, deletion) without hashing their keys again.
+The table grows once it passes its max load factor, either all at once
+or incrementally by migrating a bounded batch of slots per operation.
+Batches of keys can be hashed together (see full_hashes), which uses NumPy
+when it is installed. A table whose keys won't change any more can be frozen
+into a read-only PerfectHashTable. A BloomFilter can be put in front of
+the lookups to rule out most missing keys without probing (see add_prefilter).
 """
 __author__ = 'Brendon Taylor'
 __docformat__ = 'reStructuredText'
@@ -9,120 +23,662 @@ __modified__ = '21/05/2020'
 __since__ = '14/05/2020'
 
 from referential_array import ArrayR
-from typing import TypeVar, Generic
+from perfect_hash_table import PerfectHashTable
+from bloom_filter import BloomFilter
+from typing import TypeVar, Generic, Tuple, Iterable, Iterator, Callable
+from enum import Enum
+from array import array
+import operator
+import struct
 import unittest
+try:
+    import numpy
+except ImportError:  # full_hashes falls back on hashing one key at a time
+    numpy = None
 T = TypeVar('T')
 
 
+class Layout(Enum):
+    """ How the hash table stores its entries """
+    TUPLE = 1   # one (key, data, hash) tuple per slot of self.table
+    FLAT = 2    # keys and values side by side in self.entry_array, hashes in self.hash_array
+
+
+class Deletion(Enum):
+    """ How the hash table deletes its entries """
+    REHASH = 1      # re-insert the rest of the primary cluster
+    TOMBSTONE = 2   # mark the slot as deleted and compact the table later
+
+
+class Insertion(Enum):
+    """ Which entry keeps a contested slot when inserting """
+    FIRST_COME = 1  # the entry already there, the new one moves on
+    ROBIN_HOOD = 2  # the entry closer to its home position moves on
+
+
+# Marks a slot whose entry has been deleted under Deletion.TOMBSTONE
+TOMBSTONE = object()
+
+# Full hashes are kept to 64 bits, so they fit a machine word however long the key
+HASH_MASK = 0xFFFFFFFFFFFFFFFF
+
+# Snapshot layout (see LinearProbeHashTable.snapshot), all little endian:
+# magic, version, class name, hash_base, layout, deletion, insertion, table_size, count,
+# tombstones, next_prime, conflict_count, probe_total, probe_max, rehash_count
+SNAPSHOT_HEADER = struct.Struct('<4sH32sqBBBQQQIQQQQ')
+# position, size of the key, full hash, data; followed by the key bytes
+SNAPSHOT_ENTRY = struct.Struct('<IIQq')
+
+
+def full_hashes(keys: list, hash_base: int) -> list:
+    """
+    Computes the polynomial hash of every key before it is reduced by a table
+    size (see LinearProbeHashTable.full_hash) for a whole batch of keys.
+    With NumPy the keys are encoded into a matrix of code points, right aligned
+    so the zeros padding shorter keys don't change their hash, and Horner's rule
+    runs down the columns for all the keys at once in uint64, whose wrap around
+    is the reduction modulo 2 ** 64 of the full hash.
+    Without NumPy the keys are hashed in turn.
+    :post: returns a list whose i-th item is the full hash of keys[i]
+    :complexity: O(N * L) where N is the number of keys and L is the size of the longest key
+    """
+    if numpy is None or len(keys) == 0:
+        hashes = []
+        for key in keys:
+            value = 0
+            for c in key:
+                value = (value * hash_base + ord(c)) & HASH_MASK
+            hashes.append(value)
+        return hashes
+
+    lengths = numpy.fromiter(map(len, keys), dtype=numpy.int64, count=len(keys))
+    width = int(lengths.max())
+    codes = numpy.frombuffer(''.join(keys).encode('utf-32-le', 'surrogatepass'), dtype=numpy.uint32)
+    matrix = numpy.zeros((len(keys), width), dtype=numpy.uint64)
+    matrix[numpy.repeat(numpy.arange(len(keys)), lengths),
+           numpy.arange(len(codes)) - numpy.repeat(numpy.cumsum(lengths) - width, lengths)] = codes
+
+    base = numpy.uint64(hash_base & HASH_MASK)
+    hashes = numpy.zeros(len(keys), dtype=numpy.uint64)
+    for column in range(width):
+        hashes = hashes * base + matrix[:, column]
+    return hashes.tolist()
+
+
 class LinearProbeHashTable(Generic[T]):
     """
     Linear Probe Hash Table
 
+    Subclasses change the probe sequence through _probe_step and STEP_GROWTH:
+    the i-th probe moves _probe_step(key) + i * STEP_GROWTH slots further on.
+
     constants:
         MIN_CAPACITY: smallest valid table size
         DEFAULT_TABLE_SIZE: default table size used in the __init__
         DEFAULT_HASH_TABLE: default hash base used for the hash function
+        DEFAULT_TOMBSTONE_FRACTION: default fraction of the table that may hold tombstones
+        DEFAULT_MAX_LOAD_FACTOR: default load factor at which the table grows
+        DEFAULT_MIGRATION_BATCH: default number of old slots migrated per operation
+        DEFAULT_DELETION: default deletion mode
+        MAX_LOAD_FACTOR_LIMIT: largest load factor the probe sequence can cope with
+        STEP_GROWTH: how much the probe step grows after each probe
+        CONSECUTIVE_PROBES: whether probes visit consecutive slots, which
+                            Deletion.REHASH and Insertion.ROBIN_HOOD rely on
+        SNAPSHOT_MAGIC: first bytes of a snapshot
+        SNAPSHOT_VERSION: version of the snapshot layout
         PRIMES: list of prime numbers to use for resizing
 
     attributes:
-        count: number of elements in the hash table
-        table: used to represent our internal array
+        count: number of elements in the hash table (excluding those still in old_table)
+        layout: storage layout of the entries (see Layout)
+        table: used to represent our internal array (TUPLE layout only)
+        entry_array: key of each slot at 2 * position and its data at 2 * position + 1 (FLAT layout only)
+        hash_array: full hash of the key of each slot (FLAT layout only)
+        deletion: how entries are deleted (see Deletion), ignored under Insertion.ROBIN_HOOD
+        insertion: which entry keeps a contested slot (see Insertion)
+        tombstones: number of slots currently holding a tombstone
+        tombstone_fraction: fraction of the table that may hold tombstones before compacting
+        max_load_factor: load factor at which the table grows
+        incremental: whether growing migrates the old table a batch at a time
+        migration_batch: number of old slots migrated per operation
+        old_table: table still being migrated, or None
+        migrate_position: next slot of old_table to migrate
         hash_base: base prime used in hash function
         table_size: current size of the hash table
         next_prime: next prime number to use when resizing
+        prefilter: BloomFilter holding every key ever inserted, or None
     """
     MIN_CAPACITY = 1
 
     DEFAULT_TABLE_SIZE = 17
     DEFAULT_HASH_BASE = 31
+    DEFAULT_TOMBSTONE_FRACTION = 0.25
+    DEFAULT_MAX_LOAD_FACTOR = 0.5
+    DEFAULT_MIGRATION_BATCH = 32
+    DEFAULT_DELETION = Deletion.REHASH
+    MAX_LOAD_FACTOR_LIMIT = 1.0
+    STEP_GROWTH = 0
+    CONSECUTIVE_PROBES = True
+    SNAPSHOT_MAGIC = b'LPHT'
+    SNAPSHOT_VERSION = 3
     PRIMES = [3, 7, 11, 17, 23, 29, 37, 47, 59, 71, 89, 107, 131, 163, 197, 239, 293, 353, 431, 521, 631, 761, 919,
               1103, 1327, 1597, 1931, 2333, 2801, 3371, 4049, 4861, 5839, 7013, 8419, 10103, 12143, 14591, 17519, 21023,
               25229, 30313, 36353, 43627, 52361, 62851, 75521, 90523, 108631, 130363, 156437, 187751, 225307, 270371,
               324449, 389357, 467237, 560689, 672827, 807403, 968897, 1162687, 1395263, 1674319, 2009191, 2411033,
               2893249, 3471899, 4166287, 4999559, 5999471, 7199369]
 
-    def __init__(self, hash_base: int = DEFAULT_HASH_BASE, table_size: int = DEFAULT_TABLE_SIZE) -> None:
+    def __init__(self, hash_base: int = DEFAULT_HASH_BASE, table_size: int = DEFAULT_TABLE_SIZE,
+                 layout: Layout = Layout.TUPLE, deletion: Deletion = None,
+                 tombstone_fraction: float = DEFAULT_TOMBSTONE_FRACTION,
+                 max_load_factor: float = None, incremental: bool = False,
+                 migration_batch: int = DEFAULT_MIGRATION_BATCH,
+                 insertion: Insertion = Insertion.FIRST_COME) -> None:
         """
+        deletion and max_load_factor default to the DEFAULT_DELETION and
+        DEFAULT_MAX_LOAD_FACTOR of the class
+        :raises ValueError: when the probe sequence doesn't support the
+                            deletion, insertion or max_load_factor given
         :complexity: O(N) where N is the table_size
         """
+        if deletion is None:
+            deletion = self.DEFAULT_DELETION
+        if max_load_factor is None:
+            max_load_factor = self.DEFAULT_MAX_LOAD_FACTOR
+        if not self.CONSECUTIVE_PROBES and deletion == Deletion.REHASH:
+            raise ValueError("Deletion.REHASH needs consecutive probes")
+        if not self.CONSECUTIVE_PROBES and insertion == Insertion.ROBIN_HOOD:
+            raise ValueError("Insertion.ROBIN_HOOD needs consecutive probes")
+        if max_load_factor > self.MAX_LOAD_FACTOR_LIMIT:
+            raise ValueError("Max load factor should be at most " + str(self.MAX_LOAD_FACTOR_LIMIT))
+
         self.count = 0
-        self.table = ArrayR(max(self.MIN_CAPACITY, table_size))
+        self.layout = layout
+        # the slot loop of __probe for the layout, so it doesn't check the layout at every slot
+        self.__scan = LinearProbeHashTable.__scan_flat if layout == Layout.FLAT else LinearProbeHashTable.__scan_tuple
+        self.deletion = deletion
+        self.insertion = insertion
+        self.tombstones = 0
+        self.tombstone_fraction = tombstone_fraction
+        self.max_load_factor = max_load_factor
+        self.incremental = incremental
+        self.migration_batch = migration_batch
+        self.old_table = None
+        self.migrate_position = 0
         self.hash_base = hash_base
+        self.prefilter = None
+        self.__allocate(max(self.MIN_CAPACITY, table_size))
         self.next_prime = 0
 
         while LinearProbeHashTable.PRIMES[self.next_prime] <= table_size:
             self.next_prime += 1
+        
+        self.conflict_count = 0
+        self.probe_total = 0
+        self.probe_max = 0
+        self.rehash_count = 0
+        self.compaction_count = 0
+    
+    def statistics(self):
+        """
+        Returns the conflict count, probe total, probe max and rehash count,
+        followed by the prefilter hits and misses when there is a prefilter
+        :see: #BloomFilter.statistics()
+        """
+        if self.prefilter is not None:
+            return (self.conflict_count, self.probe_total, self.probe_max, self.rehash_count) + self.prefilter.statistics()
+        return self.conflict_count, self.probe_total, self.probe_max, self.rehash_count
+
+    def add_prefilter(self, false_positive_rate: float, capacity: int = None) -> None:
+        """
+        Puts a BloomFilter in front of the lookups, holding the current keys and
+        then every key inserted, so that most missing keys are ruled out without
+        hashing them with hash_base or probing. It is sized for capacity keys
+        (by default the current number of keys); past that its false positive rate
+        climbs. Deleted keys stay in the filter, so they still cost a probe.
+        :raises ValueError: when false_positive_rate is not between 0 and 1
+        :complexity: O(N + M) where N is the table size and M the size of the filter
+        """
+        self.__finish_migration()
+        if capacity is None:
+            capacity = self.count
+        self.prefilter = BloomFilter(capacity, false_positive_rate)
+        for key in self.keys():
+            self.prefilter.add(key)
+
+    def __rules_out(self, key: str) -> bool:
+        """
+        Returns whether the prefilter shows that the key is definitely missing
+        :see: #BloomFilter.__contains__(key: str)
+        """
+        return self.prefilter is not None and key not in self.prefilter
+
+    def _probe_step(self, key: str) -> int:
+        """
+        Returns the first step of the probe sequence of the key
+        :complexity: O(1)
+        """
+        return 1
+
+    def _empty_table(self, table_size: int, deletion: Deletion, tombstone_fraction: float,
+                     insertion: Insertion) -> 'LinearProbeHashTable[T]':
+        """
+        Returns an empty table of the given size that probes like this one
+        :complexity: O(N) where N is the table_size
+        """
+        return type(self)(self.hash_base, table_size, self.layout, deletion, tombstone_fraction,
+                          self.max_load_factor, insertion=insertion)
+
+    def __allocate(self, table_size: int) -> None:
+        """
+        Creates empty storage of the given size for the current layout.
+        The FLAT layout keeps its keys and values in a plain list, as an ArrayR
+        also holds a reference to every object stored in it in a dict of its own,
+        and its hashes unboxed in an array of 64 bit integers.
+        :complexity: O(N) where N is the table_size
+        """
+        self.table_size = table_size
+        if self.layout == Layout.FLAT:
+            self.table = None
+            self.entry_array = [None] * (2 * table_size)
+            self.hash_array = array('Q', bytes(8 * table_size))
+        else:
+            self.table = ArrayR(table_size)
+
+    def __is_empty_slot(self, position: int) -> bool:
+        """
+        Returns whether nothing is stored at the given position
+        :complexity: O(1)
+        """
+        if self.layout == Layout.FLAT:
+            return self.entry_array[2 * position] is None
+        return self.table[position] is None
+
+    def __is_tombstone(self, position: int) -> bool:
+        """
+        Returns whether the slot at the given position holds a tombstone
+        :complexity: O(1)
+        """
+        if self.layout == Layout.FLAT:
+            return self.entry_array[2 * position] is TOMBSTONE
+        return self.table[position] is TOMBSTONE
+
+    def __is_occupied(self, position: int) -> bool:
+        """
+        Returns whether the slot at the given position holds an entry
+        :complexity: O(1)
+        """
+        return not self.__is_empty_slot(position) and not self.__is_tombstone(position)
+
+    def __entry_hash(self, position: int) -> int:
+        """
+        Returns the full hash kept with the entry at the given (occupied) position
+        :complexity: O(1)
+        """
+        if self.layout == Layout.FLAT:
+            return self.hash_array[position]
+        return self.table[position][2]
+
+    def __distance(self, position: int) -> int:
+        """
+        Returns how far the entry at the given (occupied) position is from its hash
+        :see: #self.__entry_hash(position: int)
+        """
+        return (position - self.__entry_hash(position)) % self.table_size
+
+    def __has_key(self, position: int, key: str, key_hash: int) -> bool:
+        """
+        Returns whether the occupied slot at position holds the given key.
+        The full hashes are compared first, so the key string is only
+        touched when they match.
+        :complexity: O(K) where K is the size of the key
+        """
+        if self.layout == Layout.FLAT:
+            return self.hash_array[position] == key_hash and self.entry_array[2 * position] == key
+        item = self.table[position]
+        return item[2] == key_hash and item[0] == key
+
+    def __entry(self, position: int) -> Tuple[str, T]:
+        """
+        Returns the (key, data) pair stored at the given position
+        :complexity: O(1)
+        """
+        if self.layout == Layout.FLAT:
+            return self.entry_array[2 * position], self.entry_array[2 * position + 1]
+        item = self.table[position]
+        return item[0], item[1]
+
+    def __store(self, position: int, key: str, data: T, key_hash: int) -> None:
+        """
+        Stores the (key, data) pair and the full hash of the key at the given position
+        :complexity: O(1)
+        """
+        if self.layout == Layout.FLAT:
+            self.entry_array[2 * position] = key
+            self.entry_array[2 * position + 1] = data
+            self.hash_array[position] = key_hash
+        else:
+            self.table[position] = (key, data, key_hash)
+
+    def __clear_slot(self, position: int) -> None:
+        """
+        Empties the slot at the given position
+        :complexity: O(1)
+        """
+        if self.layout == Layout.FLAT:
+            self.entry_array[2 * position] = None
+            self.entry_array[2 * position + 1] = None
+            self.hash_array[position] = 0
+        else:
+            self.table[position] = None
+
+    def __bury(self, position: int) -> None:
+        """
+        Replaces the entry at the given position with a tombstone
+        :complexity: O(1)
+        """
+        self.__clear_slot(position)
+        if self.layout == Layout.FLAT:
+            self.entry_array[2 * position] = TOMBSTONE
+        else:
+            self.table[position] = TOMBSTONE
+        self.count -= 1
+        self.tombstones += 1
+
+    def __place(self, position: int, key: str, data: T, key_hash: int) -> None:
+        """
+        Stores the (key, data) pair at the position found by an inserting probe
+        :complexity: O(1)
+        """
+        if self.__is_tombstone(position):
+            self.tombstones -= 1
+        if not self.__is_occupied(position):
+            self.count += 1
+        self.__store(position, key, data, key_hash)
 
     def __len__(self) -> int:
         """
         Returns number of elements in the hash table
         :complexity: O(1)
         """
+        if self.old_table is not None:
+            return self.count + self.old_table.count
         return self.count
 
     def __delitem__(self, key: str) -> None:
         """
         Deletes an item from our hash table by rehashing the
-        remaining items in the current primary cluster
+        remaining items in the current primary cluster, or by leaving
+        a tombstone behind under Deletion.TOMBSTONE, or by shifting the
+        rest of the cluster back under Insertion.ROBIN_HOOD
         :raises KeyError: when the key doesn't exist
         :complexity best: O(K) finds the position straight away and doesn't have to rehash
                           where K is the size of the key
         :complexity worst: O(K + N) when it has to rehash all items in the hash table
-                          where N is the table size
+                          (or compact the table) where N is the table size
+        """
+        if self.__rules_out(key):
+            raise KeyError(key)
+        key_hash = self.full_hash(key)
+        if self.old_table is not None:
+            self.__migrate(self.migration_batch)
+        try:
+            self.__delete(key, key_hash)
+        except KeyError:
+            if self.old_table is None:
+                raise
+            self.old_table.__delete(key, key_hash)  # not migrated yet
+
+    def __delete(self, key: str, key_hash: int) -> None:
+        """
+        Deletes an item from the current storage, without looking at old_table
+        :raises KeyError: when the key doesn't exist
+        :see: #self.__delitem__(key: str)
+        """
+        self.__delete_at(self.__probe(key, False, key_hash))
+
+    def __delete_at(self, position: int) -> None:
+        """
+        Deletes the item at the given position of the current storage
+        :see: #self.__delitem__(key: str)
         """
-        position = self.__linear_probe(key, False)
-        self.table[position] = None
+        if self.insertion == Insertion.ROBIN_HOOD:
+            self.__backward_shift(position)
+            self.count -= 1
+            return
+
+        if self.deletion == Deletion.TOMBSTONE:
+            self.__bury(position)
+            if self.tombstones > self.tombstone_fraction * self.table_size:
+                self.__compact()
+            return
+
+        self.__clear_slot(position)
         self.count -= 1
 
-        position = (position + 1) % len(self.table)
-        while self.table[position] is not None:
-            item = self.table[position]
-            self.table[position] = None
+        position = (position + 1) % self.table_size
+        while not self.__is_empty_slot(position):
+            item = self.__entry(position)
+            item_hash = self.__entry_hash(position)
+            self.__clear_slot(position)
             self.count -= 1
-            self[str(item[0])] = item[1]
-            position = (position + 1) % len(self.table)
+            self.__insert(str(item[0]), item[1], item_hash)
+            position = (position + 1) % self.table_size
+
+    def __backward_shift(self, position: int) -> None:
+        """
+        Empties the slot at position and moves each following entry of the
+        cluster one slot back, until an empty slot or an entry already at
+        its home position is reached
+        :complexity best: O(1) when the next slot needs no shift
+        :complexity worst: O(N) when the whole table is one cluster, where N is the table size
+        """
+        self.__clear_slot(position)
+        next_position = (position + 1) % self.table_size
+        while self.__is_occupied(next_position) and self.__distance(next_position) > 0:
+            (key, data) = self.__entry(next_position)
+            self.__store(position, key, data, self.__entry_hash(next_position))
+            self.__clear_slot(next_position)
+            position = next_position
+            next_position = (next_position + 1) % self.table_size
 
     def __rehash(self) -> None:
         """
-        Need to resize table and reinsert all values
-        :complexity:
+        Need to resize table and reinsert all values, or start migrating
+        them a batch at a time when the table is incremental
+        :complexity: O(N) where N is the table size
         """
-        new_hash = LinearProbeHashTable(self.hash_base, LinearProbeHashTable.PRIMES[self.next_prime])
+        self.rehash_count += 1 # increment rehash count by 1 whenever this method is called
+        new_size = LinearProbeHashTable.PRIMES[self.next_prime]
         self.next_prime += 1
+        if self.incremental:
+            self.__start_migration(new_size)
+        else:
+            self.__rebuild(new_size)
 
-        for i in range(len(self.table)):
-            if self.table[i] is not None:
-                new_hash[str(self.table[i][0])] = self.table[i][1]
+    def __start_migration(self, table_size: int) -> None:
+        """
+        Moves the current entries into old_table and starts again with
+        empty storage of the given size. Entries are then migrated back
+        a batch at a time by __migrate.
+        :complexity: O(N) where N is the table size
+        """
+        self.__finish_migration()
+        old_table = self._empty_table(self.MIN_CAPACITY, Deletion.TOMBSTONE, 1.0, Insertion.FIRST_COME)
+        old_table.__adopt(self)  # deletes leave tombstones and never compact, so slots never move
+        self.__allocate(table_size)
+        self.count = 0
+        self.tombstones = 0
+        self.old_table = old_table
+        self.migrate_position = 0
+
+    def __migrate(self, batch: int) -> None:
+        """
+        Moves the entries in the next batch of slots of old_table into the table
+        :complexity: O(B) where B is the batch size
+        """
+        old_table = self.old_table
+        end = min(self.migrate_position + batch, old_table.table_size)
+        for position in range(self.migrate_position, end):
+            if old_table.__is_occupied(position):
+                item = old_table.__entry(position)
+                item_hash = old_table.__entry_hash(position)
+                old_table.__bury(position)
+                self.__insert(str(item[0]), item[1], item_hash, record=False)
+        self.migrate_position = end
+        if end == old_table.table_size:
+            self.old_table = None
+
+    def __finish_migration(self) -> None:
+        """
+        Migrates everything left in old_table
+        :complexity: O(N) where N is the size of old_table
+        """
+        if self.old_table is not None:
+            self.__migrate(self.old_table.table_size)
+
+    def __compact(self) -> None:
+        """
+        Reinserts all values into a table of the same size to clear the tombstones
+        :complexity: O(N) where N is the table size
+        """
+        self.compaction_count += 1
+        self.__rebuild(self.table_size)
+
+    def __rebuild(self, table_size: int) -> None:
+        """
+        Reinserts all values into a fresh table of the given size
+        :complexity: O(N) where N is the table size
+        """
+        self.__finish_migration()
+        new_hash = self._empty_table(table_size, self.deletion, self.tombstone_fraction, self.insertion)
+
+        for i in range(self.table_size):
+            if self.__is_occupied(i):
+                item = self.__entry(i)
+                new_hash.__insert(str(item[0]), item[1], self.__entry_hash(i), record=False)
+
+        self.__adopt(new_hash)
+
+    def __adopt(self, other: 'LinearProbeHashTable[T]') -> None:
+        """
+        Takes over the storage (and its entries) of another table
+        :complexity: O(1)
+        """
+        self.count = other.count
+        self.tombstones = other.tombstones
+        self.table_size = other.table_size
+        self.table = other.table
+        if self.layout == Layout.FLAT:
+            self.entry_array = other.entry_array
+            self.hash_array = other.hash_array
 
-        self.count = new_hash.count
-        self.table = new_hash.table
+    def __record_probe(self, probe_length: int) -> None:
+        """
+        Updates the probe statistics for an insertion
+        :complexity: O(1)
+        """
+        if probe_length > self.probe_max: # update probe max if probe length is the new max
+            self.probe_max = probe_length
+        self.probe_total += probe_length # increment probe total by probe length
 
-    def __linear_probe(self, key: str, is_insert: bool) -> int:
+    def __probe(self, key: str, is_insert: bool, key_hash: int = None, record: bool = True) -> int:
         """
-        Find the correct position for this key in the hash table using linear probing
+        Find the correct position for this key in the hash table by following
+        its probe sequence (consecutive slots for linear probing).
+        Lookups skip over tombstones, inserts reuse the first tombstone on the chain.
+        Under Insertion.ROBIN_HOOD a lookup stops as soon as it passes an entry
+        closer to its home than the key would be.
+        Insertions only update the statistics when record is True.
         :complexity best: O(K) first position is empty
                           where K is the size of the key
         :complexity worst: O(K + N) when we've searched the entire table
                            where N is the table_size
         :raises KeyError: When a position can't be found
         """
-        position = self.hash(key)  # get the position using hash
+        if key_hash is None:
+            key_hash = self.full_hash(key)
+        position = key_hash % self.table_size  # get the position using hash
+
+        if self.__is_occupied(position) and is_insert and record: # increment conflict count when trying to insert to a non-empty position
+            self.conflict_count += 1
 
         if is_insert and self.is_full():
             raise KeyError(key)
 
-        for _ in range(len(self.table)):  # start traversing
-            if self.table[position] is None:  # found empty slot
-                if is_insert:
-                    return position
-                else:
-                    raise KeyError(key)  # so the key is not in
-            elif self.table[position][0] == key:  # found key
-                return position
-            else:  # there is something but not the key, try next
-                position = (position + 1) % len(self.table)
+        robin_hood = self.insertion == Insertion.ROBIN_HOOD and not is_insert
+        # probe length of the probe chain, and position and probe length of the first tombstone seen
+        (found, position, probe_length, first_tombstone, tombstone_probe_length) = \
+            self.__scan(self, key, key_hash, position, self._probe_step(key), robin_hood)
+        if found:
+            return position
+        if not is_insert:
+            raise KeyError(key)  # so the key is not in
+        if first_tombstone is not None:  # reuse the first tombstone on the chain
+            position, probe_length = first_tombstone, tombstone_probe_length
+        elif position is None:  # searched the entire table
+            raise KeyError(key)
+        if record:
+            self.__record_probe(probe_length)
+        return position
 
-        raise KeyError(key)
+    def __scan_tuple(self, key: str, key_hash: int, position: int, step: int,
+                     robin_hood: bool) -> Tuple[bool, int, int, int, int]:
+        """
+        Follows the probe sequence of the key from position over the TUPLE layout.
+        Returns whether the key was found, the position of the key or of the empty
+        slot that ended the search (None when it ended otherwise), the number of
+        slots probed before it, and the position of the first tombstone seen (or None)
+        with the number of slots probed before that.
+        Under robin_hood it stops at an entry closer to its home than the key would be.
+        :complexity best: O(K) first position is empty
+                          where K is the size of the key
+        :complexity worst: O(K + N) when we've searched the entire table
+                           where N is the table_size
+        """
+        table = self.table
+        first_tombstone = None
+        tombstone_distance = 0
+        for distance in range(self.table_size):  # start traversing
+            item = table[position]
+            if item is None:  # found empty slot
+                return False, position, distance, first_tombstone, tombstone_distance
+            elif item is TOMBSTONE:  # deleted entry, the key may still be further on
+                if first_tombstone is None:
+                    first_tombstone, tombstone_distance = position, distance
+            elif item[2] == key_hash and item[0] == key:  # found key
+                return True, position, distance, first_tombstone, tombstone_distance
+            elif robin_hood and (position - item[2]) % self.table_size < distance:  # the key would have taken this slot
+                return False, None, distance, first_tombstone, tombstone_distance
+            # there is something but not the key, try next
+            position = (position + step) % self.table_size
+            step += self.STEP_GROWTH
+        return False, None, self.table_size, first_tombstone, tombstone_distance
+
+    def __scan_flat(self, key: str, key_hash: int, position: int, step: int,
+                    robin_hood: bool) -> Tuple[bool, int, int, int, int]:
+        """
+        Follows the probe sequence of the key from position over the FLAT layout
+        :see: #self.__scan_tuple(key: str, key_hash: int, position: int, step: int, robin_hood: bool)
+        """
+        entry_array = self.entry_array
+        hash_array = self.hash_array
+        first_tombstone = None
+        tombstone_distance = 0
+        for distance in range(self.table_size):  # start traversing
+            item_key = entry_array[2 * position]
+            if item_key is None:  # found empty slot
+                return False, position, distance, first_tombstone, tombstone_distance
+            elif item_key is TOMBSTONE:  # deleted entry, the key may still be further on
+                if first_tombstone is None:
+                    first_tombstone, tombstone_distance = position, distance
+            elif hash_array[position] == key_hash and item_key == key:  # found key
+                return True, position, distance, first_tombstone, tombstone_distance
+            elif robin_hood and (position - hash_array[position]) % self.table_size < distance:  # the key would have taken this slot
+                return False, None, distance, first_tombstone, tombstone_distance
+            # there is something but not the key, try next
+            position = (position + step) % self.table_size
+            step += self.STEP_GROWTH
+        return False, None, self.table_size, first_tombstone, tombstone_distance
 
     def __contains__(self, key: str) -> bool:
         """
@@ -139,51 +695,365 @@ class LinearProbeHashTable(Generic[T]):
     def __getitem__(self, key: str) -> T:
         """
         Get the item at a certain key
-        :see: #self.__linear_probe(key: str, is_insert: bool)
+        :see: #self.__probe(key: str, is_insert: bool)
         :raises KeyError: when the item doesn't exist
         """
-        position = self.__linear_probe(key, False)
-        return self.table[position][1]
+        if self.__rules_out(key):
+            raise KeyError(key)
+        key_hash = self.full_hash(key)
+        if self.old_table is not None:
+            self.__migrate(self.migration_batch)
+        return self.__lookup(key, key_hash)
+
+    def __lookup(self, key: str, key_hash: int) -> T:
+        """
+        Get the item at a certain key, falling back on old_table
+        :see: #self.__probe(key: str, is_insert: bool)
+        :raises KeyError: when the item doesn't exist
+        """
+        try:
+            position = self.__probe(key, False, key_hash)
+        except KeyError:
+            if self.old_table is None:
+                raise
+            return self.old_table.__lookup(key, key_hash)  # not migrated yet
+        return self.__entry(position)[1]
+
+    def get_or_default(self, key: str, default: T = None) -> T:
+        """
+        Get the item at a certain key, or default when the key doesn't exist
+        :see: #self.__getitem__(key: str)
+        """
+        return self.__get(key, default, self.full_hash(key))
+
+    def get_many(self, keys: list, default: T = None) -> list:
+        """
+        Get the item at every key in keys, or default for the keys that don't exist,
+        hashing the whole batch at once
+        :post: returns a list whose i-th item is the item at keys[i]
+        :see: #self.get_or_default(key: str, default: T)
+        """
+        hashes = self.full_hash_many(keys)
+        return [self.__get(keys[i], default, hashes[i]) for i in range(len(keys))]
+
+    def __get(self, key: str, default: T, key_hash: int) -> T:
+        """
+        Get the item at a certain key, or default when the key doesn't exist
+        :see: #self.__lookup(key: str, key_hash: int)
+        """
+        if self.__rules_out(key):
+            return default
+        if self.old_table is not None:
+            self.__migrate(self.migration_batch)
+        try:
+            return self.__lookup(key, key_hash)
+        except KeyError:
+            return default
 
     def __setitem__(self, key: str, data: T) -> None:
         """
         Set an (key, data) pair in our hash table
-        :see: #self.__linear_probe(key: str, is_insert: bool)
+        :see: #self.__probe(key: str, is_insert: bool)
+        :see: #self.__rehash()
+        """
+        self.__set(key, data, self.full_hash(key))
+
+    def insert_many(self, keys: list, data: T) -> None:
+        """
+        Set every key in keys to data, hashing the whole batch at once.
+        The table grows at most once, before any key is placed.
+        :see: #full_hashes(keys: list, hash_base: int)
+        :see: #self.__reserve(count: int)
+        """
+        self.__reserve(len(self) + len(keys))
+        hashes = self.full_hash_many(keys)
+        for i in range(len(keys)):
+            self.__set(keys[i], data, hashes[i])
+
+    def update(self, pairs: Iterable[Tuple[str, T]]) -> None:
+        """
+        Set every (key, data) pair in pairs, in order. The table grows at most
+        once, before any pair is placed, to fit them all as new keys, and the
+        keys are hashed as one batch.
+        :see: #full_hashes(keys: list, hash_base: int)
+        :see: #self.__reserve(count: int)
+        """
+        keys = []
+        values = []
+        for (key, data) in pairs:
+            keys.append(key)
+            values.append(data)
+        self.__reserve(len(self) + len(keys))
+        hashes = self.full_hash_many(keys)
+        for i in range(len(keys)):
+            self.__set(keys[i], values[i], hashes[i])
+
+    @classmethod
+    def from_iterable(cls, pairs: Iterable[Tuple[str, T]], size_hint: int = None,
+                      hash_base: int = DEFAULT_HASH_BASE, **kwargs) -> 'LinearProbeHashTable[T]':
+        """
+        Creates a hash table holding the (key, data) pairs, sized from PRIMES
+        up front to fit size_hint entries (or all the pairs when there is no hint),
+        so it doesn't rehash while it is being filled.
+        Any other arguments are passed on to the constructor.
+        :see: #self.update(pairs: Iterable[Tuple[str, T]])
+        """
+        if size_hint is None:
+            pairs = list(pairs)
+            size_hint = len(pairs)
+        table = cls(hash_base, cls.MIN_CAPACITY, **kwargs)
+        table.__reserve(size_hint)
+        table.update(pairs)
+        return table
+
+    def __reserve(self, count: int) -> None:
+        """
+        Grows the table once, straight to the first prime in PRIMES with room for
+        count entries under the max load factor, unless they fit already.
+        An empty table has nothing to move, so it is allocated afresh rather than rehashed.
         :see: #self.__rehash()
         """
-        if len(self) > (len(self.table) // 2):
+        if count <= self.max_load_factor * self.table_size:
+            return
+        while self.next_prime < len(self.PRIMES) - 1 and count > self.max_load_factor * self.PRIMES[self.next_prime]:
+            self.next_prime += 1
+        if self.is_empty():
+            self.old_table = None
+            self.__allocate(self.PRIMES[self.next_prime])
+            self.tombstones = 0
+            self.next_prime += 1
+        else:
             self.__rehash()
-        position = self.__linear_probe(key, True)
 
-        if self.table[position] is None:
-            self.count += 1
-        self.table[position] = (key, data)
+    def __set(self, key: str, data: T, key_hash: int) -> None:
+        """
+        Set an (key, data) pair in our hash table, given the full hash of the key
+        :see: #self.__probe(key: str, is_insert: bool)
+        :see: #self.__rehash()
+        """
+        self.__prepare_insert()
+        if self.old_table is not None:
+            try:
+                self.old_table.__delete(key, key_hash)  # the new data goes straight into the table
+            except KeyError:
+                pass
+        self.__insert(key, data, key_hash)
+        if self.prefilter is not None:
+            self.prefilter.add(key)
+
+    def increment(self, key: str, amount: int = 1) -> int:
+        """
+        Adds amount to the (numeric) data at a certain key, treating a missing
+        key as 0, and returns the new data
+        :see: #self.merge(key: str, data: T, combine: Callable[[T, T], T])
+        """
+        return self.merge(key, amount, operator.add)
+
+    def decrement(self, key: str, amount: int = 1) -> int:
+        """
+        Takes amount off the (numeric) data at a certain key and returns the new data,
+        deleting the key once its data reaches 0. Only hashes the key once and, unless
+        the table is migrating, only probes once.
+        :raises KeyError: when the key doesn't exist
+        :see: #self.__delitem__(key: str)
+        """
+        if self.__rules_out(key):
+            raise KeyError(key)
+        key_hash = self.full_hash(key)
+        if self.old_table is not None:
+            self.__migrate(self.migration_batch)
+        try:
+            return self.__decrement(key, amount, key_hash)
+        except KeyError:
+            if self.old_table is None:
+                raise
+            return self.old_table.__decrement(key, amount, key_hash)  # not migrated yet
+
+    def __decrement(self, key: str, amount: int, key_hash: int) -> int:
+        """
+        Takes amount off the data at a certain key in the current storage, without looking at old_table
+        :raises KeyError: when the key doesn't exist
+        :see: #self.decrement(key: str, amount: int)
+        """
+        position = self.__probe(key, False, key_hash)
+        data = self.__entry(position)[1] - amount
+        if data == 0:
+            self.__delete_at(position)
+        else:
+            self.__store(position, key, data, key_hash)
+        return data
+
+    def merge(self, key: str, data: T, combine: Callable[[T, T], T]) -> T:
+        """
+        Sets the data at a certain key to combine(current data, data), or to data
+        when the key is missing, and returns the new data. Only hashes the key once
+        and, unless the table uses Robin Hood insertion or is migrating, only probes once.
+        :see: #self.__probe(key: str, is_insert: bool)
+        :see: #self.__rehash()
+        """
+        return self.__merge(key, data, combine, self.full_hash(key))
+
+    def merge_many(self, keys: list, data: T, combine: Callable[[T, T], T]) -> None:
+        """
+        Merge data into every key in keys, hashing the whole batch at once.
+        The table grows at most once, before any key is placed, to fit them all as new keys.
+        :see: #self.merge(key: str, data: T, combine: Callable[[T, T], T])
+        :see: #self.__reserve(count: int)
+        """
+        self.__reserve(len(self) + len(keys))
+        hashes = self.full_hash_many(keys)
+        for i in range(len(keys)):
+            self.__merge(keys[i], data, combine, hashes[i])
+
+    def __merge(self, key: str, data: T, combine: Callable[[T, T], T], key_hash: int) -> T:
+        """
+        Merge data into a certain key, given the full hash of the key
+        :see: #self.merge(key: str, data: T, combine: Callable[[T, T], T])
+        """
+        self.__prepare_insert()
+        if self.prefilter is not None:
+            self.prefilter.add(key)
+        if self.old_table is not None:
+            try:
+                position = self.old_table.__probe(key, False, key_hash)
+            except KeyError:
+                pass
+            else:  # not migrated yet, so move it across
+                data = combine(self.old_table.__entry(position)[1], data)
+                self.old_table.__bury(position)
+
+        if self.insertion == Insertion.ROBIN_HOOD:
+            try:
+                position = self.__probe(key, False, key_hash)
+            except KeyError:
+                self.__robin_hood_insert(key, data, key_hash)
+                return data
+            data = combine(self.__entry(position)[1], data)
+            self.__store(position, key, data, key_hash)
+            return data
+
+        position = self.__probe(key, True, key_hash)
+        if self.__is_occupied(position):
+            data = combine(self.__entry(position)[1], data)
+        self.__place(position, key, data, key_hash)
+        return data
+
+    def __prepare_insert(self) -> None:
+        """
+        Migrates the next batch of old_table and grows the table if it has
+        reached its max load factor
+        :see: #self.__rehash()
+        """
+        if self.old_table is not None:
+            self.__migrate(self.migration_batch)
+        if len(self) >= self.max_load_factor * self.table_size:
+            self.__rehash()
+
+    def __insert(self, key: str, data: T, key_hash: int = None, record: bool = True) -> None:
+        """
+        Set an (key, data) pair in the current storage, without growing
+        the table or looking at old_table
+        :see: #self.__probe(key: str, is_insert: bool)
+        """
+        if key_hash is None:
+            key_hash = self.full_hash(key)
+        if self.insertion == Insertion.ROBIN_HOOD:
+            self.__robin_hood_insert(key, data, key_hash, record)
+            return
+        position = self.__probe(key, True, key_hash, record)
+        self.__place(position, key, data, key_hash)
+
+    def __robin_hood_insert(self, key: str, data: T, key_hash: int, record: bool = True) -> None:
+        """
+        Set an (key, data) pair in the current storage using Robin Hood insertion:
+        whenever the entry being placed is further from its home than the resident,
+        they swap and the resident carries on looking for a slot.
+        probe_total adds up the distance at which each new key is placed, while
+        probe_max covers every entry placed, including the displaced ones.
+        :complexity best: O(K) first position is empty
+                          where K is the size of the key
+        :complexity worst: O(K + N) when we've searched the entire table
+                           where N is the table_size
+        :raises KeyError: When a position can't be found
+        """
+        position = key_hash % self.table_size
+        if self.__is_occupied(position) and record: # increment conflict count when trying to insert to a non-empty position
+            self.conflict_count += 1
+
+        if self.is_full():
+            raise KeyError(key)
+
+        distance = 0    # distance of the entry being placed from its home
+        key_distance = None    # distance at which the new key was placed
+        longest = 0
+        for _ in range(self.table_size):
+            if self.__is_empty_slot(position):
+                self.__store(position, key, data, key_hash)
+                self.count += 1
+                if record:
+                    self.__record_probe(distance if key_distance is None else key_distance)
+                    self.probe_max = max(self.probe_max, longest, distance)
+                return
+            elif key_distance is None and self.__has_key(position, key, key_hash):  # found key
+                self.__store(position, key, data, key_hash)
+                return
+
+            resident_distance = self.__distance(position)
+            if resident_distance < distance:  # the resident is better off, so it gives up its slot
+                (resident_key, resident_data) = self.__entry(position)
+                resident_hash = self.__entry_hash(position)
+                self.__store(position, key, data, key_hash)
+                if key_distance is None:
+                    key_distance = distance
+                longest = max(longest, distance)
+                (key, data, key_hash, distance) = (resident_key, resident_data, resident_hash, resident_distance)
+            position = (position + 1) % self.table_size
+            distance += 1
+
+        raise KeyError(key)
 
     def is_empty(self):
         """
         Returns whether the hash table is empty
         :complexity: O(1)
         """
-        return self.count == 0
+        return len(self) == 0
 
     def is_full(self):
         """
         Returns whether the hash table is full
         :complexity: O(1)
         """
-        return self.count == len(self.table)
+        return len(self) == self.table_size
 
     def hash(self, key: str) -> int:
         """
         Universal Hash function
         :post: returns a valid position (0 <= value < table_size)
+        :see: #self.full_hash(key: str)
+        """
+        return self.full_hash(key) % self.table_size
+
+    def full_hash(self, key: str) -> int:
+        """
+        Universal Hash function before it is reduced by the table size, so it
+        stays valid when the table is resized. It is taken modulo 2 ** 64 along
+        the way, so it stays a fixed width whatever the size of the key.
+        :post: full_hash(key) % table_size == hash(key) and 0 <= full_hash(key) <= HASH_MASK
         :complexity: O(K) where K is the size of the key
         """
         value = 0
         for c in key:
-            value = (value * self.hash_base + ord(c)) % len(self.table)
+            value = (value * self.hash_base + ord(c)) & HASH_MASK
         return value
 
+    def full_hash_many(self, keys: list) -> list:
+        """
+        Returns the full hash of every key in keys
+        :see: #full_hashes(keys: list, hash_base: int)
+        """
+        return full_hashes(keys, self.hash_base)
+
     def insert(self, key: str, data: T) -> None:
         """
         Utility method to call our setitem method
@@ -191,17 +1061,228 @@ class LinearProbeHashTable(Generic[T]):
         """
         self[key] = data
 
+    def freeze(self) -> PerfectHashTable[T]:
+        """
+        Returns a read-only copy of the table, which finds or rules out
+        any key by looking at a single slot
+        :see: #PerfectHashTable.__init__(keys: list, values: list)
+        """
+        self.__finish_migration()
+        keys = []
+        values = []
+        for (key, data) in self.items():
+            keys.append(key)
+            values.append(data)
+        return PerfectHashTable(keys, values)
+
+    def items(self) -> Iterator[Tuple[str, T]]:
+        """
+        Yields every (key, data) pair in the table (no particular order), including
+        those still in old_table. The table should not change while this runs.
+        :complexity: O(N) where N is the table size
+        """
+        for position in range(self.table_size):
+            if self.__is_occupied(position):
+                yield self.__entry(position)
+        if self.old_table is not None:
+            yield from self.old_table.items()
+
+    def keys(self) -> Iterator[str]:
+        """
+        Yields every key in the table, in the order of items()
+        :see: #self.items()
+        """
+        for (key, _) in self.items():
+            yield key
+
+    def values(self) -> Iterator[T]:
+        """
+        Yields the data of every key in the table, in the order of items()
+        :see: #self.items()
+        """
+        for (_, data) in self.items():
+            yield data
+
+    def to_array(self) -> ArrayR[Tuple[str, T]]:
+        """
+        Returns an array of the len(self) (key, data) pairs, in the order of items()
+        (an empty table gives an array holding just None, as an ArrayR can't be empty)
+        :complexity: O(N) where N is the table size
+        """
+        array = ArrayR(max(1, len(self)))
+        i = 0
+        for item in self.items():
+            array[i] = item
+            i += 1
+        return array
+
+    def snapshot(self) -> bytes:
+        """
+        Returns the table as a flat binary snapshot: a header (see SNAPSHOT_HEADER),
+        then the position, key, full hash and data of every entry (see SNAPSHOT_ENTRY),
+        then the positions of the tombstones. Finishes any migration first.
+        :raises TypeError: when some data is not an int
+        :complexity: O(N) where N is the table size
+        """
+        self.__finish_migration()
+        parts = [SNAPSHOT_HEADER.pack(self.SNAPSHOT_MAGIC, self.SNAPSHOT_VERSION, type(self).__name__.encode('ascii'),
+                                      self.hash_base, self.layout.value, self.deletion.value, self.insertion.value,
+                                      self.table_size, self.count, self.tombstones, self.next_prime,
+                                      self.conflict_count, self.probe_total, self.probe_max, self.rehash_count)]
+        tombstones = []
+        for position in range(self.table_size):
+            if self.__is_tombstone(position):
+                tombstones.append(position)
+            elif self.__is_occupied(position):
+                (key, data) = self.__entry(position)
+                if not isinstance(data, int):
+                    raise TypeError("Only integer data can be saved, not " + type(data).__name__)
+                key_bytes = key.encode('utf-8', 'surrogatepass')
+                parts.append(SNAPSHOT_ENTRY.pack(position, len(key_bytes), self.__entry_hash(position), data))
+                parts.append(key_bytes)
+        parts.append(struct.pack('<' + str(len(tombstones)) + 'I', *tombstones))
+        return b''.join(parts)
+
+    def restore(self, buffer, offset: int = 0) -> int:
+        """
+        Replaces the contents of the table with the snapshot held in buffer
+        (for instance a memory mapped file) from offset onwards. Every entry goes
+        straight back into its slot with its full hash, so no key is hashed or probed.
+        The snapshot must come from a table of the same class, hash base, layout,
+        deletion and insertion, as the slots of its entries and tombstones only
+        make sense to a table that probes, deletes and stores them the same way.
+        A truncated snapshot leaves the table empty. A prefilter is rebuilt for the restored keys.
+        :raises ValueError: when buffer doesn't hold a snapshot this table can restore
+        :returns: the offset just past the snapshot
+        :complexity: O(N) where N is the table size
+        """
+        try:
+            (magic, version, name, hash_base, layout, deletion, insertion, table_size, count, tombstones,
+             next_prime, conflict_count, probe_total, probe_max, rehash_count) = SNAPSHOT_HEADER.unpack_from(buffer, offset)
+        except struct.error:
+            raise ValueError("Snapshot is truncated")
+        if magic != self.SNAPSHOT_MAGIC or version != self.SNAPSHOT_VERSION:
+            raise ValueError("Not a version " + str(self.SNAPSHOT_VERSION) + " snapshot")
+        if name.rstrip(b'\0') != type(self).__name__.encode('ascii') or hash_base != self.hash_base:
+            raise ValueError("Snapshot was saved from a table that probes differently")
+        if (layout, deletion, insertion) != (self.layout.value, self.deletion.value, self.insertion.value):
+            raise ValueError("Snapshot was saved from a table that stores, deletes or inserts differently")
+        offset += SNAPSHOT_HEADER.size
+
+        self.__allocate(table_size)
+        self.old_table = None
+        self.count = 0
+        self.tombstones = 0
+        try:
+            for _ in range(count):
+                (position, key_size, key_hash, data) = SNAPSHOT_ENTRY.unpack_from(buffer, offset)
+                offset += SNAPSHOT_ENTRY.size
+                key = bytes(buffer[offset:offset + key_size]).decode('utf-8', 'surrogatepass')
+                offset += key_size
+                self.__store(position, key, data, key_hash)
+            for position in struct.unpack_from('<' + str(tombstones) + 'I', buffer, offset):
+                self.__bury(position)
+        except (struct.error, IndexError, UnicodeDecodeError):
+            self.__allocate(table_size)
+            self.count = 0
+            self.tombstones = 0
+            raise ValueError("Snapshot is truncated")
+        offset += 4 * tombstones
+
+        self.count = count
+        self.tombstones = tombstones
+        self.next_prime = next_prime
+        self.conflict_count = conflict_count
+        self.probe_total = probe_total
+        self.probe_max = probe_max
+        self.rehash_count = rehash_count
+        if self.prefilter is not None:
+            self.add_prefilter(self.prefilter.false_positive_rate, max(count, self.prefilter.capacity))
+        return offset
+
     def __str__(self) -> str:
         """
         Returns all they key/value pairs in our hash table (no particular order)
         :complexity: O(N) where N is the table size
         """
-        result = ""
-        for item in self.table:
-            if item is not None:
-                (key, value) = item
-                result += "(" + str(key) + "," + str(value) + ")\n"
-        return result
+        return "".join("(" + str(key) + "," + str(value) + ")\n" for (key, value) in self.items())
+
+
+class QuadraticProbeHashTable(LinearProbeHashTable[T]):
+    """
+    Quadratic Probe Hash Table
+
+    The i-th probe lands i * i slots after the hash of the key. On a prime
+    sized table this only reaches about half of the slots, so the table
+    grows before it is half full, and entries are deleted with tombstones.
+    """
+    DEFAULT_DELETION = Deletion.TOMBSTONE
+    DEFAULT_MAX_LOAD_FACTOR = 0.5
+    MAX_LOAD_FACTOR_LIMIT = 0.5
+    STEP_GROWTH = 2
+    CONSECUTIVE_PROBES = False
+
+
+class DoubleHashingHashTable(LinearProbeHashTable[T]):
+    """
+    Double Hashing Hash Table
+
+    Each probe moves a fixed step further on, where the step is a second
+    hash of the key computed with step_base. On a prime sized table every
+    slot is reached. Entries are deleted with tombstones.
+
+    constants:
+        DEFAULT_STEP_BASE: default base used for the step hash
+
+    attributes:
+        step_base: base prime used in the step hash function
+    """
+    DEFAULT_DELETION = Deletion.TOMBSTONE
+    CONSECUTIVE_PROBES = False
+    DEFAULT_STEP_BASE = 37
+
+    def __init__(self, hash_base: int = LinearProbeHashTable.DEFAULT_HASH_BASE,
+                 table_size: int = LinearProbeHashTable.DEFAULT_TABLE_SIZE,
+                 layout: Layout = Layout.TUPLE, deletion: Deletion = None,
+                 tombstone_fraction: float = LinearProbeHashTable.DEFAULT_TOMBSTONE_FRACTION,
+                 max_load_factor: float = None, incremental: bool = False,
+                 migration_batch: int = LinearProbeHashTable.DEFAULT_MIGRATION_BATCH,
+                 insertion: Insertion = Insertion.FIRST_COME, step_base: int = DEFAULT_STEP_BASE) -> None:
+        """
+        :see: #LinearProbeHashTable.__init__
+        """
+        LinearProbeHashTable.__init__(self, hash_base, table_size, layout, deletion, tombstone_fraction,
+                                      max_load_factor, incremental, migration_batch, insertion)
+        self.step_base = step_base
+
+    def _probe_step(self, key: str) -> int:
+        """
+        Step hash function, never 0 so the probe always moves on
+        :post: returns a valid step (0 < value < table_size, or 1 for a single slot table)
+        :complexity: O(K) where K is the size of the key
+        """
+        if self.table_size == 1:
+            return 1
+        value = 0
+        for c in key:
+            value = (value * self.step_base + ord(c)) % (self.table_size - 1)
+        return value + 1
+
+    def _empty_table(self, table_size: int, deletion: Deletion, tombstone_fraction: float,
+                     insertion: Insertion) -> 'DoubleHashingHashTable[T]':
+        """
+        Returns an empty table of the given size that probes like this one
+        :complexity: O(N) where N is the table_size
+        """
+        table = LinearProbeHashTable._empty_table(self, table_size, deletion, tombstone_fraction, insertion)
+        table.step_base = self.step_base
+        return table
+
+
+# Hash tables by the name of their probing strategy
+PROBING = {'linear': LinearProbeHashTable,
+           'quadratic': QuadraticProbeHashTable,
+           'double': DoubleHashingHashTable}
 
 
 class TestLinearProbeHashTable(unittest.TestCase):
@@ -263,6 +1344,201 @@ class TestLinearProbeHashTable(unittest.TestCase):
             else:
                 self.assertEqual(dictionary[str(i)], i, "Could not find item: " + str(i))
 
+    def test_full_hash(self):
+        """ Testing the full hash reduces to the position hash, and is never recomputed when entries move """
+        dictionary = LinearProbeHashTable(250726, 5)
+        for key in ["", "a", "zebra", "FIT1008 is the best subject!", "z" * 1000]:
+            self.assertEqual(dictionary.full_hash(key) % dictionary.table_size, dictionary.hash(key))
+            self.assertLessEqual(dictionary.full_hash(key), HASH_MASK, "The full hash should fit in 64 bits")
+
+        hashed = []
+        dictionary.full_hash = lambda key: hashed.append(key) or LinearProbeHashTable.full_hash(dictionary, key)
+        for i in range(20):
+            dictionary[str(i)] = i
+        del dictionary["3"]
+        self.assertGreater(dictionary.rehash_count, 0)
+        self.assertEqual(len(hashed), 21, "Keys were hashed again when resizing or deleting")
+
+    def test_insert_many(self):
+        """ Testing batch hashing matches hashing one key at a time, and so does batch insertion """
+        keys = ["", "a", "zebra", "déjà vu", "FIT1008 is the best subject!", "\U0001F600" * 3] + [str(i) for i in range(40)]
+        for hash_base in [1, 31, 250726, 2 ** 40]:
+            dictionary = LinearProbeHashTable(hash_base)
+            self.assertEqual(dictionary.full_hash_many(keys), [dictionary.full_hash(key) for key in keys])
+        self.assertEqual(full_hashes([], 31), [])
+
+        one_by_one = LinearProbeHashTable(31, 53, max_load_factor=1.0)
+        for key in keys:
+            one_by_one[key] = 1
+        batched = LinearProbeHashTable(31, 53, max_load_factor=1.0)
+        batched.insert_many(keys, 1)
+        self.assertEqual(str(batched), str(one_by_one))
+        self.assertEqual(batched.statistics(), one_by_one.statistics())
+
+    def test_snapshot(self):
+        """ Testing a restored snapshot holds the same entries, tombstones and statistics """
+        for layout in Layout:
+            dictionary = LinearProbeHashTable(31, 11, layout, Deletion.TOMBSTONE, 0.5, incremental=True)
+            for key in ["", "déjà vu", "FIT1008 is the best subject!"] + [str(i) for i in range(20)]:
+                dictionary[key] = len(key) - 3
+            del dictionary["7"]
+            saved = dictionary.snapshot()
+
+            restored = LinearProbeHashTable(31, 5, layout, Deletion.TOMBSTONE)
+            self.assertEqual(restored.restore(b"padding" + saved, 7), 7 + len(saved))
+            self.assertEqual(str(restored), str(dictionary))
+            self.assertEqual(restored.statistics(), dictionary.statistics())
+            self.assertEqual((len(restored), restored.tombstones), (len(dictionary), dictionary.tombstones))
+            self.assertEqual(restored["déjà vu"], 4)
+            self.assertFalse("7" in restored)
+
+        with self.assertRaises(ValueError):
+            LinearProbeHashTable(37).restore(saved)
+        with self.assertRaises(ValueError):
+            QuadraticProbeHashTable(31).restore(saved)
+        for mismatched in [LinearProbeHashTable(31, 5, Layout.TUPLE, Deletion.TOMBSTONE),
+                           LinearProbeHashTable(31, 5, layout, Deletion.REHASH),
+                           LinearProbeHashTable(31, 5, layout, Deletion.TOMBSTONE, insertion=Insertion.ROBIN_HOOD)]:
+            with self.assertRaises(ValueError):
+                mismatched.restore(saved)
+            self.assertTrue(mismatched.is_empty())
+        with self.assertRaises(ValueError):
+            restored.restore(saved[:-20])
+        self.assertTrue(restored.is_empty())
+        dictionary["text"] = "not a number"
+        with self.assertRaises(TypeError):
+            dictionary.snapshot()
+
+    def test_freeze(self):
+        """ Testing a frozen table holds the same items and can't be changed """
+        dictionary = LinearProbeHashTable(31, 5, incremental=True)
+        for i in range(20):
+            dictionary[str(i)] = i
+        del dictionary["3"]
+        frozen = dictionary.freeze()
+        self.assertEqual(len(frozen), 19)
+        for i in range(20):
+            self.assertEqual(frozen.get_or_default(str(i)), None if i == 3 else i)
+        with self.assertRaises(TypeError):
+            frozen["3"] = 3
+
+    def test_prefilter(self):
+        """ Testing the prefilter never hides a key and counts its hits and misses """
+        dictionary = LinearProbeHashTable(1, 53)
+        for i in range(20):
+            dictionary[str(i)] = i
+        self.assertEqual(len(dictionary.statistics()), 4)
+        dictionary.add_prefilter(0.01, 40)
+        for i in range(20, 40):
+            dictionary.increment(str(i), i)
+        for i in range(40):
+            self.assertEqual(dictionary[str(i)], i, "Could not find item: " + str(i))
+        (hits, misses) = dictionary.statistics()[4:]
+        self.assertEqual((hits, misses), (40, 0))
+
+        for i in range(40, 1040):
+            self.assertFalse(str(i) in dictionary)
+            self.assertIsNone(dictionary.get_or_default(str(i)))
+        (hits, misses) = dictionary.statistics()[4:]
+        self.assertGreater(misses, 1900, "Should rule out about 99% of the missing keys")
+        self.assertEqual(hits + misses, 2040)
+
+        del dictionary["3"]
+        self.assertFalse("3" in dictionary)
+        with self.assertRaises(KeyError):
+            del dictionary["1040"]
+
+    def test_items(self):
+        """ Testing items, keys, values and to_array cover every entry once, including those not migrated yet """
+        for layout in Layout:
+            dictionary = LinearProbeHashTable(31, 5, layout, incremental=True, migration_batch=1)
+            self.assertEqual(list(dictionary.items()), [])
+            self.assertIsNone(dictionary.to_array()[0])
+            expected = []
+            for i in range(30):
+                dictionary["(" + str(i) + ",)"] = i
+                expected.append(("(" + str(i) + ",)", i))
+            self.assertIsNotNone(dictionary.old_table)
+            self.assertEqual(sorted(dictionary.items()), sorted(expected))
+            self.assertEqual(list(dictionary.keys()), [key for (key, _) in dictionary.items()])
+            self.assertEqual(list(dictionary.values()), [data for (_, data) in dictionary.items()])
+            array = dictionary.to_array()
+            self.assertEqual(len(array), 30)
+            self.assertEqual(sorted(array[i] for i in range(30)), sorted(expected))
+
+    def test_update(self):
+        """ Testing bulk construction sizes the table up front instead of rehashing along the way """
+        pairs = [(str(i), i) for i in range(100)]
+        dictionary = LinearProbeHashTable.from_iterable(pairs, max_load_factor=1.0)
+        self.assertEqual(dictionary.table_size, 107, "Should pick the first prime that fits every pair")
+        self.assertEqual(dictionary.rehash_count, 0)
+        self.assertEqual(len(dictionary), 100)
+
+        dictionary = LinearProbeHashTable.from_iterable(iter(pairs), 100, layout=Layout.FLAT, max_load_factor=0.5)
+        self.assertEqual(dictionary.table_size, 239)
+        self.assertEqual(dictionary.rehash_count, 0)
+
+        dictionary = LinearProbeHashTable(31, 5)
+        dictionary["0"] = "zero"
+        dictionary.update(pairs)
+        self.assertEqual(dictionary.rehash_count, 1, "Should only grow once")
+        self.assertEqual(len(dictionary), 100)
+        for i in range(100):
+            self.assertEqual(dictionary[str(i)], i, "Could not find item: " + str(i))
+
+    def test_get_or_default(self):
+        """ Testing get_or_default for present and missing keys """
+        dictionary = LinearProbeHashTable(31, 5)
+        dictionary["test"] = 3
+        self.assertEqual(dictionary.get_or_default("test"), 3)
+        self.assertIsNone(dictionary.get_or_default("missing"))
+        self.assertEqual(dictionary.get_or_default("missing", 0), 0)
+        self.assertFalse("missing" in dictionary)
+        self.assertEqual(dictionary.get_many(["missing", "test", "test"], 0), [0, 3, 3])
+        self.assertEqual(dictionary.get_many([]), [])
+
+    def test_increment(self):
+        """ Testing increment counts like a lookup followed by an update, in every insertion mode """
+        for insertion in Insertion:
+            for incremental in [False, True]:
+                dictionary = LinearProbeHashTable(31, 3, insertion=insertion, incremental=incremental,
+                                                  max_load_factor=0.5, migration_batch=1)
+                for i in range(30):
+                    for j in range(i % 4 + 1):
+                        self.assertEqual(dictionary.increment(str(i)), j + 1)
+                self.assertEqual(dictionary.increment("0", 10), 11)
+                self.assertEqual(len(dictionary), 30)
+                for i in range(1, 30):
+                    self.assertEqual(dictionary[str(i)], i % 4 + 1, "Wrong count for item: " + str(i))
+
+    def test_decrement(self):
+        """ Testing decrement deletes a key when its data reaches 0, in every insertion and deletion mode """
+        for insertion in Insertion:
+            for deletion in Deletion:
+                dictionary = LinearProbeHashTable(31, 3, insertion=insertion, deletion=deletion,
+                                                  incremental=True, max_load_factor=0.5, migration_batch=1)
+                for i in range(30):
+                    dictionary.increment(str(i), i % 3 + 1)
+                for i in range(30):
+                    self.assertEqual(dictionary.decrement(str(i)), i % 3)
+                self.assertEqual(len(dictionary), 20)
+                self.assertEqual(dictionary.decrement("2", 2), 0)
+                for i in range(30):
+                    self.assertEqual(dictionary.get_or_default(str(i), 0), i % 3 if i != 2 else 0)
+                with self.assertRaises(KeyError):
+                    dictionary.decrement("0")
+
+    def test_merge(self):
+        """ Testing merge combines the data of a key already there and stores the data of a new one """
+        dictionary = LinearProbeHashTable(31, 3, incremental=True, migration_batch=1)
+        for i in range(20):
+            for bit in [1, 2, 1]:
+                dictionary.merge(str(i), bit << (i % 3), operator.or_)
+        self.assertEqual(len(dictionary), 20)
+        for i in range(20):
+            self.assertEqual(dictionary[str(i)], 3 << (i % 3), "Wrong mask for item: " + str(i))
+        self.assertEqual(dictionary.merge("0", "x", lambda current, data: data), "x")
+
     def test_str(self):
         """ Testing an empty table and one with 5 elements """
         dictionary = LinearProbeHashTable(31, 5)
@@ -273,6 +1549,157 @@ class TestLinearProbeHashTable(unittest.TestCase):
         for i in range(5):
             self.assertIn("(" + str(i) + "," + str(i) + ")", str(dictionary))
 
+    def test_flat_layout(self):
+        """ Testing the FLAT layout behaves like the TUPLE layout through inserts, rehashes and deletes """
+        flat = LinearProbeHashTable(31, 5, Layout.FLAT)
+        tuples = LinearProbeHashTable(31, 5, Layout.TUPLE)
+        self.assertIsNone(flat.table)
+        for i in range(20):
+            flat[str(i)] = i
+            tuples[str(i)] = i
+        for i in range(0, 20, 3):
+            del flat[str(i)]
+            del tuples[str(i)]
+
+        self.assertEqual(len(flat), len(tuples))
+        self.assertEqual(flat.statistics(), tuples.statistics())
+        for i in range(20):
+            if i % 3 == 0:
+                self.assertFalse(str(i) in flat)
+            else:
+                self.assertEqual(flat[str(i)], i, "Could not find item: " + str(i))
+                position = flat.hash(str(i))
+                while flat.entry_array[2 * position] != str(i):
+                    position = (position + 1) % flat.table_size
+                self.assertEqual(flat.entry_array[2 * position + 1], i)
+                self.assertEqual(flat.hash_array[position], flat.full_hash(str(i)), "Cached hash is out of date")
+        self.assertEqual(flat.hash_array.typecode, 'Q')
+
+    def test_del_tombstone(self):
+        """ Testing tombstone deletion in both layouts, including reuse of tombstones and compaction """
+        for layout in Layout:
+            dictionary = LinearProbeHashTable(1, 20, layout, Deletion.TOMBSTONE, 0.4)
+            for i in range(10):
+                dictionary[str(i)] = i   # single digit keys form one cluster of neighbouring slots
+
+            for i in range(5):
+                del dictionary[str(i)]
+            self.assertEqual(len(dictionary), 5)
+            self.assertEqual(dictionary.tombstones, 5)
+            for i in range(10):
+                if i < 5:
+                    self.assertFalse(str(i) in dictionary)
+                    with self.assertRaises(KeyError):
+                        del dictionary[str(i)]
+                else:
+                    self.assertEqual(dictionary[str(i)], i, "Could not find item: " + str(i))
+
+            dictionary["2"] = 20    # reuses a tombstone instead of extending the cluster
+            self.assertEqual(dictionary.tombstones, 4)
+            self.assertEqual(dictionary["2"], 20)
+
+            for i in range(5, 10):
+                del dictionary[str(i)]
+            self.assertEqual(dictionary.compaction_count, 1)
+            self.assertEqual(dictionary.tombstones, 0)
+            self.assertEqual(len(dictionary), 1)
+            self.assertEqual(dictionary["2"], 20)
+            self.assertEqual(str(dictionary), "(2,20)\n")
+
+    def test_robin_hood(self):
+        """ Testing Robin Hood insertion and backward shift deletion against first come insertion """
+        words = [chr(ord('a') + i % 7) + chr(ord('a') + i // 7) for i in range(35)]
+        for layout in Layout:
+            linear = LinearProbeHashTable(1, 53, layout)
+            robin_hood = LinearProbeHashTable(1, 53, layout, insertion=Insertion.ROBIN_HOOD)
+            for i, word in enumerate(words):  # hash base 1 makes anagrams collide
+                linear[word] = i
+                robin_hood[word] = i
+            self.assertEqual(robin_hood.conflict_count, linear.conflict_count)
+            self.assertLessEqual(robin_hood.probe_max, linear.probe_max)
+
+            for word in words[::3]:
+                del robin_hood[word]
+            self.assertEqual(robin_hood.tombstones, 0)
+            self.assertEqual(len(robin_hood), len(words) - len(words[::3]))
+            for i, word in enumerate(words):
+                if i % 3 == 0:
+                    self.assertFalse(word in robin_hood)
+                    self.assertFalse(word[::-1] + "z" in robin_hood)
+                else:
+                    self.assertEqual(robin_hood[word], i, "Could not find item: " + word)
+
+            robin_hood["ba"] = -1
+            self.assertEqual(robin_hood["ba"], -1)
+            self.assertEqual(len(robin_hood), len(words) - len(words[::3]) + ("ba" in words[::3]))
+
+    def test_probing(self):
+        """ Testing every probing strategy through inserts, rehashes, updates and deletes """
+        for name, table_type in PROBING.items():
+            for layout in Layout:
+                dictionary = table_type(31, 5, layout)
+                for i in range(50):
+                    dictionary[str(i)] = i
+                for i in range(0, 50, 2):
+                    del dictionary[str(i)]
+                for i in range(0, 50, 4):
+                    dictionary[str(i)] = -i
+
+                self.assertGreater(dictionary.rehash_count, 0)
+                self.assertEqual(len(dictionary), 38)
+                self.assertEqual(len(dictionary.statistics()), 4)
+                for i in range(50):
+                    if i % 4 == 0:
+                        self.assertEqual(dictionary[str(i)], -i, name + " could not find item: " + str(i))
+                    elif i % 2 == 0:
+                        self.assertFalse(str(i) in dictionary, name + " found deleted item: " + str(i))
+                    else:
+                        self.assertEqual(dictionary[str(i)], i, name + " could not find item: " + str(i))
+
+        with self.assertRaises(ValueError):
+            QuadraticProbeHashTable(max_load_factor=0.75)
+        with self.assertRaises(ValueError):
+            DoubleHashingHashTable(deletion=Deletion.REHASH)
+        with self.assertRaises(ValueError):
+            DoubleHashingHashTable(insertion=Insertion.ROBIN_HOOD)
+
+    def test_max_load_factor(self):
+        """ Testing the table grows once it passes its max load factor """
+        dictionary = LinearProbeHashTable(31, 11, max_load_factor=0.5)
+        for i in range(6):
+            dictionary[str(i)] = i
+        self.assertEqual(dictionary.table_size, 11)
+        dictionary["6"] = 6
+        self.assertEqual(dictionary.table_size, 17)
+        self.assertEqual(dictionary.rehash_count, 1)
+
+    def test_incremental_rehash(self):
+        """ Testing lookups, updates and deletes while the old table is still being migrated """
+        for layout in Layout:
+            dictionary = LinearProbeHashTable(31, 11, layout, max_load_factor=0.5, incremental=True,
+                                              migration_batch=2)
+            expected = {}
+            seen_migration = False
+            for i in range(200):
+                dictionary[str(i)] = i
+                expected[str(i)] = i
+                if i % 3 == 0:
+                    dictionary[str(i // 2)] = -i    # update a key that may still be in the old table
+                    expected[str(i // 2)] = -i
+                if i % 5 == 0:
+                    del dictionary[str(i // 4)]
+                    del expected[str(i // 4)]
+                seen_migration = seen_migration or dictionary.old_table is not None
+                self.assertEqual(len(dictionary), len(expected))
+
+            self.assertTrue(seen_migration)
+            self.assertGreater(dictionary.rehash_count, 1)
+            for i in range(200):
+                if str(i) in expected:
+                    self.assertEqual(dictionary[str(i)], expected[str(i)], "Could not find item: " + str(i))
+                else:
+                    self.assertFalse(str(i) in dictionary)
+
 
 if __name__ == '__main__':
-    unittest.main()
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,177 @@
+""" Heap ADT
+
+Defines a binary heap stored in an array of fixed capacity. Rather than
+comparing items with <, the heap is ordered by a function before(a, b)
+that says whether a should come out of the heap before b, so the same
+class serves as a min-heap, a max-heap or anything in between.
+"""
+__docformat__ = 'reStructuredText'
+
+from referential_array import ArrayR
+from typing import TypeVar, Generic, Callable, Iterable
+import unittest
+T = TypeVar('T')
+
+
+class Heap(Generic[T]):
+    """
+    Binary Heap
+
+    The children of the item at index i are at 2 * i + 1 and 2 * i + 2.
+
+    attributes:
+        before: whether its first argument comes out of the heap before its second
+        count: number of items in the heap
+        array: the items, with the first to come out at index 0
+    """
+    def __init__(self, capacity: int, before: Callable[[T, T], bool], items: Iterable[T] = None) -> None:
+        """
+        Creates a heap with room for capacity items, holding the given items if any.
+        The items are put in place all at once (bottom-up heapify) rather than one by one.
+        :raises IndexError: when there are more items than capacity
+        :complexity: O(C + N) where C is the capacity and N the number of items
+        """
+        self.before = before
+        self.array = ArrayR(max(1, capacity))
+        self.count = 0
+        if items is not None:
+            for item in items:
+                if self.count == len(self.array):
+                    raise IndexError("Heap is full")
+                self.array[self.count] = item
+                self.count += 1
+            for index in range(self.count // 2 - 1, -1, -1):
+                self.__sink(index)
+
+    def __len__(self) -> int:
+        """
+        Returns the number of items in the heap
+        :complexity: O(1)
+        """
+        return self.count
+
+    def is_empty(self) -> bool:
+        """
+        Returns whether the heap is empty
+        :complexity: O(1)
+        """
+        return self.count == 0
+
+    def is_full(self) -> bool:
+        """
+        Returns whether the heap is full
+        :complexity: O(1)
+        """
+        return self.count == len(self.array)
+
+    def add(self, item: T) -> None:
+        """
+        Adds an item to the heap
+        :raises IndexError: when the heap is full
+        :complexity: O(log N) comparisons where N is the number of items
+        """
+        if self.is_full():
+            raise IndexError("Heap is full")
+        self.array[self.count] = item
+        self.count += 1
+        self.__rise(self.count - 1)
+
+    def peek(self) -> T:
+        """
+        Returns the item that comes out first, without removing it
+        :raises IndexError: when the heap is empty
+        :complexity: O(1)
+        """
+        if self.is_empty():
+            raise IndexError("Heap is empty")
+        return self.array[0]
+
+    def extract(self) -> T:
+        """
+        Removes and returns the item that comes out first
+        :raises IndexError: when the heap is empty
+        :complexity: O(log N) comparisons where N is the number of items
+        """
+        item = self.peek()
+        self.count -= 1
+        self.array[0] = self.array[self.count]
+        self.array[self.count] = None
+        if self.count > 0:
+            self.__sink(0)
+        return item
+
+    def replace(self, item: T) -> T:
+        """
+        Removes and returns the item that comes out first, putting item in its place,
+        in a single pass down the heap
+        :raises IndexError: when the heap is empty
+        :complexity: O(log N) comparisons where N is the number of items
+        """
+        first = self.peek()
+        self.array[0] = item
+        self.__sink(0)
+        return first
+
+    def __rise(self, index: int) -> None:
+        """
+        Moves the item at index up until its parent comes out before it
+        :complexity: O(log N) comparisons where N is the number of items
+        """
+        item = self.array[index]
+        while index > 0:
+            parent = (index - 1) // 2
+            if not self.before(item, self.array[parent]):
+                break
+            self.array[index] = self.array[parent]
+            index = parent
+        self.array[index] = item
+
+    def __sink(self, index: int) -> None:
+        """
+        Moves the item at index down until it comes out before both its children
+        :complexity: O(log N) comparisons where N is the number of items
+        """
+        item = self.array[index]
+        while 2 * index + 1 < self.count:
+            child = 2 * index + 1
+            if child + 1 < self.count and self.before(self.array[child + 1], self.array[child]):
+                child += 1
+            if not self.before(self.array[child], item):
+                break
+            self.array[index] = self.array[child]
+            index = child
+        self.array[index] = item
+
+
+class TestHeap(unittest.TestCase):
+    def test_add_extract(self):
+        """ Testing items come out in order, for a min-heap and a max-heap """
+        items = [5, 3, 9, 1, 5, 7, 2, 8, 0, 6]
+        heap = Heap(len(items), lambda a, b: a < b)
+        for item in items:
+            heap.add(item)
+        self.assertTrue(heap.is_full())
+        with self.assertRaises(IndexError):
+            heap.add(4)
+        self.assertEqual([heap.extract() for _ in range(len(items))], sorted(items))
+        self.assertTrue(heap.is_empty())
+        with self.assertRaises(IndexError):
+            heap.peek()
+
+        heap = Heap(20, lambda a, b: a > b, items)
+        self.assertEqual(len(heap), len(items))
+        self.assertEqual([heap.extract() for _ in range(len(items))], sorted(items, reverse=True))
+
+    def test_replace(self):
+        """ Testing replace keeps the k largest items in a bounded min-heap """
+        heap = Heap(3, lambda a, b: a < b)
+        for item in range(20):
+            if not heap.is_full():
+                heap.add(item)
+            elif item > heap.peek():
+                heap.replace(item)
+        self.assertEqual([heap.extract() for _ in range(3)], [17, 18, 19])
+
+
+if __name__ == '__main__':
+    unittest.main()
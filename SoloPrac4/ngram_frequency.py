@@ -0,0 +1,186 @@
+""" Frequencies of n-grams, the sequences of consecutive words of a text.
+
+NGramFrequency counts the bigrams, trigrams and so on up to n-grams of the
+counted words in the same pass as the words themselves. Each word is given
+an id the first time it is counted, kept in a hash table of its own (the
+dictionary is left alone, so it can be shared or frozen), so the ids of a
+batch of words come from one batch lookup. An n-gram is
+keyed by the string of the n ids as code points: a fixed width key whose
+hash, with a base over the highest code point, is the n ids read as the digits
+of one integer taken modulo 2 ** 64, so no two bigrams or trigrams share a full
+hash however long the words are.
+"""
+__docformat__ = 'reStructuredText'
+
+from frequency import Frequency, ranks_before, top_pairs
+from hash_table import LinearProbeHashTable
+from list_adt import ArrayList
+from referential_array import ArrayR
+from heap import Heap
+from sorting import stable_sort
+from typing import Iterator
+import operator
+
+
+class NGramFrequency(Frequency):
+    """
+    Frequency of the words and of their n-grams. The n-grams of a file are made of
+    the words counted in a row, the words outside the dictionary being skipped, and
+    don't run on from one file into the next.
+
+    attributes (besides those of Frequency):
+        n: number of words in the longest n-grams counted
+        ids: hash table of the id of each word counted
+        words: the word of each id
+        next_id: id the next word counted for the first time is given
+        ngrams: ngrams[m] is the hash table of the m-gram counts, for 2 <= m <= n
+    """
+    NO_ID = 0  # what ids gives for a word that hasn't been counted, so the ids start at 1
+    MAX_ID = 0x10FFFF  # the highest code point
+    NGRAM_HASH_BASE = 1114117  # the first prime over MAX_ID; a small base, with ids this dense, hashes
+                               # hundreds of n-grams to the same value
+
+    def __init__(self, n: int = 3, hash_base: int = Frequency.INIT_HASH_BASE,
+                 table_size: int = Frequency.INIT_TABLE_SIZE, snapshot: str = None) -> None:
+        """
+        :param n: The number of words in the longest n-grams counted
+        :raises ValueError: when n is under 2, or the dictionary has more words than there are code points
+        :see: Frequency.__init__
+        """
+        if n < 2:
+            raise ValueError("N-grams should have at least 2 words")
+        Frequency.__init__(self, hash_base, table_size, snapshot)
+        self.n = n
+        self.ngrams = ArrayR(n + 1)
+        for m in range(2, n + 1):
+            self.ngrams[m] = LinearProbeHashTable(NGramFrequency.NGRAM_HASH_BASE, table_size)
+        if len(self.dictionary.hash_table) > NGramFrequency.MAX_ID:
+            raise ValueError("Too many words to intern: " + str(len(self.dictionary.hash_table)))
+        self.ids = LinearProbeHashTable(hash_base, table_size)
+        self.words = ArrayR(len(self.dictionary.hash_table) + 1)
+        self.next_id = NGramFrequency.NO_ID + 1
+        self.__previous = ''
+
+    def add_file(self, filename: str) -> None:
+        """
+        Counts the words of a file and their n-grams
+        :complexity: O(N * n) where N is the number of characters in the file, with a good hash base
+        :see: Frequency.add_file
+        """
+        self.__previous = ''
+        Frequency.add_file(self, filename)
+
+    def add_files(self, filenames: list, workers: int = None, shard_size: int = Frequency.SHARD_SIZE) -> None:
+        """
+        Adds the files in turn in this process, as the n-grams that cross a shard
+        can't be counted from the shards
+        :see: #self.add_file(filename: str)
+        """
+        for filename in filenames:
+            self.add_file(filename)
+
+    def _count(self, words: list) -> None:
+        """
+        Counts a batch of words, then the n-grams ending on each of them, carrying
+        the ids of the last n - 1 words over to the next batch
+        :complexity: O(N * n) where N is the total size of the words, with a good hash base
+        """
+        Frequency._count(self, words)
+        ids = self.ids.get_many(words, NGramFrequency.NO_ID)
+        for i in range(len(ids)):
+            if ids[i] == NGramFrequency.NO_ID:
+                ids[i] = self.__intern(words[i])
+        text = self.__previous + ''.join(map(chr, ids))
+        for m in range(2, self.n + 1):
+            start = max(0, len(self.__previous) - m + 1)  # the earlier n-grams were counted with the last batch
+            keys = [text[i:i + m] for i in range(start, len(text) - m + 1)]
+            if len(keys) > 0:
+                self.ngrams[m].merge_many(keys, 1, operator.add)
+        self.__previous = text[len(text) - min(len(text), self.n - 1):]
+
+    def __intern(self, word: str) -> int:
+        """
+        Returns the id of a dictionary word, giving it the next id if it has none yet
+        (it may have been given one earlier in the same batch)
+        :complexity: O(K) where K is the size of the word, with a good hash base
+        """
+        word_id = self.ids.get_or_default(word, NGramFrequency.NO_ID)
+        if word_id == NGramFrequency.NO_ID:
+            word_id = self.next_id
+            self.ids[word] = word_id
+            self.words[word_id] = word
+            self.next_id += 1
+        return word_id
+
+    def count(self, ngram: tuple) -> int:
+        """
+        Returns the count of an n-gram (or of a word, given a 1-tuple), 0 when it hasn't been counted
+        :raises ValueError: when the n-gram has no words, or more than n
+        :complexity: O(K) where K is the total size of the words, with a good hash base
+        """
+        if len(ngram) == 1:
+            return self.hash_table.get_or_default(ngram[0], 0)
+        table = self.__table(len(ngram))
+        ids = self.ids.get_many(list(ngram), NGramFrequency.NO_ID)
+        if min(ids) == NGramFrequency.NO_ID:  # some word hasn't been counted
+            return 0
+        return table.get_or_default(''.join(map(chr, ids)), 0)
+
+    def ranking(self, n: int = 1) -> ArrayList[tuple]:
+        """
+        Returns the (n-gram, count) pairs, most frequent first (ties go to the n-gram
+        first in alphabetical order), where each n-gram is a tuple of words.
+        Gives the (word, count) pairs, as Frequency does, when n is 1.
+        :raises ValueError: when n is under 1 or over the longest n-grams counted
+        :complexity: O(N log N) where N is the number of distinct n-grams
+        """
+        if n == 1:
+            return Frequency.ranking(self)
+        rank_list = ArrayList(len(self.__table(n)))
+        for pair in self.__pairs(n):
+            rank_list.append(pair)
+        stable_sort(rank_list, key=lambda entry: (-entry[1], entry[0]))
+        return rank_list
+
+    def top_k(self, k: int, n: int = 1) -> ArrayList[tuple]:
+        """
+        Returns the k most frequent (n-gram, count) pairs, most frequent first
+        :raises ValueError: when n is under 1 or over the longest n-grams counted
+        :complexity: O(N log k) where N is the number of distinct n-grams
+        :see: #self.ranking(n: int)
+        """
+        if n == 1:
+            return Frequency.top_k(self, k)
+        return top_pairs(self.__pairs(n), len(self.__table(n)), k)
+
+    def iter_ranking(self, n: int = 1) -> Iterator[tuple]:
+        """
+        Yields the (n-gram, count) pairs in the order of top_k, one at a time
+        :raises ValueError: when n is under 1 or over the longest n-grams counted
+        :complexity: O(N + R log N) where N is the number of distinct n-grams and R the number of pairs taken
+        :see: Frequency.iter_ranking
+        """
+        if n == 1:
+            yield from Frequency.iter_ranking(self)
+            return
+        heap = Heap(len(self.__table(n)), ranks_before, self.__pairs(n))
+        while not heap.is_empty():
+            yield heap.extract()
+
+    def __table(self, n: int) -> LinearProbeHashTable[int]:
+        """
+        Returns the hash table of the n-gram counts
+        :raises ValueError: when n is under 2 or over the longest n-grams counted
+        :complexity: O(1)
+        """
+        if not 2 <= n <= self.n:
+            raise ValueError("Only n-grams of 1 to " + str(self.n) + " words are counted, not " + str(n))
+        return self.ngrams[n]
+
+    def __pairs(self, n: int) -> Iterator[tuple]:
+        """
+        Yields the (n-gram, count) pairs of the n-grams counted, as tuples of words
+        :complexity: O(N * n) where N is the table size of the n-gram counts
+        """
+        for (key, count) in self.__table(n).items():
+            yield tuple(self.words[ord(c)] for c in key), count
@@ -0,0 +1,286 @@
+""" Perfect Hash Table ADT
+
+Defines a read-only Hash Table built once from a fixed set of keys using
+hash and displace (as in CHD). Every key hashes to a bucket holding a few
+keys, and each bucket keeps a displacement chosen so that its keys land
+in distinct free slots. The table is minimal (one slot per key), and
+finding a key, or finding it isn't there, always looks at exactly one slot.
+"""
+__docformat__ = 'reStructuredText'
+
+from referential_array import ArrayR
+from typing import TypeVar, Generic, Tuple
+import unittest
+T = TypeVar('T')
+
+
+class PerfectHashTable(Generic[T]):
+    """
+    Perfect Hash Table
+
+    The displacement multiple + shift * table_size moves a key to
+    (offset + multiple * step + shift) % table_size,
+    where its offset and step come from its second hash.
+
+    constants:
+        HASH_BASE: hash base of the polynomial hash, above every code point
+        MAX_SEED: number of seeds tried before giving up
+        FIRST_MODULUS: prime the hash choosing the bucket is reduced by
+        SECOND_MODULUS: prime the hash choosing the offset and step is reduced by
+        BUCKET_SIZE: average number of keys per bucket
+
+    attributes:
+        count: number of elements in the hash table
+        table_size: number of slots, equal to count (at least 1)
+        bucket_count: number of buckets
+        seed: seed mixed into the hashes, the first one that separates all the keys
+        displacements: displacement chosen for each bucket
+        keys: key stored in each slot
+        values: data stored in each slot
+    """
+    HASH_BASE = 0x110000
+    FIRST_MODULUS = 2 ** 61 - 1
+    SECOND_MODULUS = 2 ** 64 - 59
+    BUCKET_SIZE = 2
+    MAX_SEED = 32
+
+    def __init__(self, keys: list, values: list) -> None:
+        """
+        Builds the table from distinct keys and their data (values[i] goes with keys[i]),
+        starting again with the next seed whenever the keys can't be separated
+        :raises ValueError: when the keys can't be separated with any of MAX_SEED seeds,
+                            which only happens when they aren't distinct
+        :complexity: O(N * D) where N is the number of keys and D the number of displacements tried per key
+        """
+        self.count = len(keys)
+        self.table_size = max(1, self.count)
+        self.bucket_count = max(1, -(-self.count // self.BUCKET_SIZE))
+        self.seed = 0
+        while not self.__build(keys, values):
+            self.seed += 1
+            if self.seed == self.MAX_SEED:
+                raise ValueError("Keys should be distinct")
+
+    def __build(self, keys: list, values: list) -> bool:
+        """
+        Places the keys using the current seed. The biggest buckets pick their
+        displacements first, while most slots are still free, and buckets of
+        a single key take any free slot.
+        :returns: whether every bucket found a displacement
+        :complexity: O(N * D) where N is the number of keys and D the number of displacements tried per key
+        """
+        self.displacements = ArrayR(self.bucket_count)
+        self.keys = ArrayR(self.table_size)
+        self.values = ArrayR(self.table_size)
+
+        buckets = [[] for _ in range(self.bucket_count)]  # (offset, step, index of the key)
+        for i in range(self.count):
+            (first, second) = self.__hashes(keys[i])
+            buckets[first % self.bucket_count].append(self.__offset_step(second) + (i,))
+        order = sorted(range(self.bucket_count), key=lambda bucket: len(buckets[bucket]), reverse=True)
+
+        taken = bytearray(self.table_size)
+        free = list(range(self.table_size))  # free slots, in no particular order
+        index = list(range(self.table_size))  # where each free slot is in free
+        for bucket in order:
+            entries = buckets[bucket]
+            displacement = self.__displace(entries, taken, free)
+            if displacement < 0:
+                return False
+            self.displacements[bucket] = displacement
+            for (offset, step, i) in entries:
+                position = self.__position(offset, step, displacement)
+                taken[position] = 1
+                last = free.pop()  # move the last free slot into the place of this one
+                if last != position:
+                    free[index[position]] = last
+                    index[last] = index[position]
+                self.keys[position] = keys[i]
+                self.values[position] = values[i]
+        return True
+
+    def __displace(self, entries: list, taken: bytearray, free: list) -> int:
+        """
+        Returns a displacement that sends every entry of a bucket to a distinct free slot.
+        Rather than trying displacements blindly, each free slot is tried for
+        the first entry, which fixes the displacement for the others.
+        :returns: the displacement, or -1 when there is none
+        :complexity: O(B * D) where B is the size of the bucket and D the number of displacements tried
+        """
+        if len(entries) == 0:
+            return 0
+        (first_offset, first_step, _) = entries[0]
+        for multiple in range(self.table_size):
+            start = first_offset + multiple * first_step
+            for slot in free:
+                shift = (slot - start) % self.table_size
+                positions = set([slot])
+                for (offset, step, _) in entries[1:]:
+                    position = (offset + multiple * step + shift) % self.table_size
+                    if taken[position] or position in positions:
+                        break
+                    positions.add(position)
+                else:
+                    return multiple + shift * self.table_size
+            if len(entries) == 1 or len(set((offset, step) for (offset, step, _) in entries)) < len(entries):
+                break  # nothing left to try, or two entries always share a slot
+        return -1
+
+    def __hashes(self, key: str) -> Tuple[int, int]:
+        """
+        Returns the two hashes of the key: its polynomial hash reduced by
+        FIRST_MODULUS and by SECOND_MODULUS, each offset by the seed and scrambled by __mix
+        :complexity: O(K) where K is the size of the key
+        """
+        value = 0
+        for c in key:
+            value = value * self.HASH_BASE + ord(c)
+        return self.__mix(value % self.FIRST_MODULUS + self.seed), self.__mix(value % self.SECOND_MODULUS + self.seed)
+
+    def __mix(self, value: int) -> int:
+        """
+        Scrambles the bits of a 64 bit value (the splitmix64 finaliser), so that
+        similar keys end up with unrelated buckets, offsets and steps
+        :complexity: O(1)
+        """
+        value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+        value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+        return value ^ (value >> 31)
+
+    def __offset_step(self, second: int) -> Tuple[int, int]:
+        """
+        Returns the offset and step of a key with the given second hash
+        :complexity: O(1)
+        """
+        return second % self.table_size, 1 + (second // self.table_size) % max(1, self.table_size - 1)
+
+    def __position(self, offset: int, step: int, displacement: int) -> int:
+        """
+        Returns the slot a key with the given offset and step is sent to by a displacement
+        :complexity: O(1)
+        """
+        (shift, multiple) = divmod(displacement, self.table_size)
+        return (offset + multiple * step + shift) % self.table_size
+
+    def __find(self, key: str) -> int:
+        """
+        Returns the only slot the key can be in
+        :complexity: O(K) where K is the size of the key
+        """
+        (first, second) = self.__hashes(key)
+        (offset, step) = self.__offset_step(second)
+        return self.__position(offset, step, self.displacements[first % self.bucket_count])
+
+    def __len__(self) -> int:
+        """
+        Returns number of elements in the hash table
+        :complexity: O(1)
+        """
+        return self.count
+
+    def __contains__(self, key: str) -> bool:
+        """
+        Checks to see if the given key is in the Hash Table
+        :complexity: O(K) where K is the size of the key
+        """
+        return self.keys[self.__find(key)] == key
+
+    def __getitem__(self, key: str) -> T:
+        """
+        Get the item at a certain key
+        :raises KeyError: when the item doesn't exist
+        :complexity: O(K) where K is the size of the key
+        """
+        position = self.__find(key)
+        if self.keys[position] != key:
+            raise KeyError(key)
+        return self.values[position]
+
+    def get_or_default(self, key: str, default: T = None) -> T:
+        """
+        Get the item at a certain key, or default when the key doesn't exist
+        :complexity: O(K) where K is the size of the key
+        """
+        position = self.__find(key)
+        if self.keys[position] != key:
+            return default
+        return self.values[position]
+
+    def __setitem__(self, key: str, data: T) -> None:
+        """
+        :raises TypeError: always, as the table is read-only
+        """
+        raise TypeError("PerfectHashTable is read-only")
+
+    def __delitem__(self, key: str) -> None:
+        """
+        :raises TypeError: always, as the table is read-only
+        """
+        raise TypeError("PerfectHashTable is read-only")
+
+    def is_empty(self) -> bool:
+        """
+        Returns whether the hash table is empty
+        :complexity: O(1)
+        """
+        return self.count == 0
+
+    def is_full(self) -> bool:
+        """
+        Returns whether the hash table is full, which it always is unless empty
+        :complexity: O(1)
+        """
+        return self.count == self.table_size
+
+    def __str__(self) -> str:
+        """
+        Returns all they key/value pairs in our hash table (no particular order)
+        :complexity: O(N) where N is the table size
+        """
+        result = ""
+        for i in range(self.count):
+            result += "(" + str(self.keys[i]) + "," + str(self.values[i]) + ")\n"
+        return result
+
+
+class TestPerfectHashTable(unittest.TestCase):
+    def test_init(self):
+        """ Testing every key lands in its own slot of a minimal table """
+        keys = [str(i) for i in range(1000)] + ["", "Aa", "BB", "déjà vu"]
+        dictionary = PerfectHashTable(keys, list(range(len(keys))))
+        self.assertEqual(len(dictionary), len(keys))
+        self.assertEqual(dictionary.table_size, len(keys))
+        self.assertTrue(dictionary.is_full())
+        for i in range(len(keys)):
+            self.assertEqual(dictionary[keys[i]], i, "Could not find item: " + keys[i])
+            self.assertTrue(keys[i] in dictionary)
+        self.assertEqual(len(str(dictionary).split("\n")), len(keys) + 1)
+
+    def test_missing(self):
+        """ Testing keys that are not in the table, including in an empty table """
+        dictionary = PerfectHashTable(["a", "b", "c"], [1, 2, 3])
+        for key in ["d", "", "abc", "A"]:
+            self.assertFalse(key in dictionary)
+            self.assertIsNone(dictionary.get_or_default(key))
+            with self.assertRaises(KeyError):
+                _ = dictionary[key]
+
+        empty = PerfectHashTable([], [])
+        self.assertTrue(empty.is_empty())
+        self.assertFalse("a" in empty)
+
+        with self.assertRaises(ValueError):
+            PerfectHashTable(["a", "b", "a"], [1, 2, 3])
+
+    def test_read_only(self):
+        """ Testing the table can't be changed """
+        dictionary = PerfectHashTable(["a"], [1])
+        with self.assertRaises(TypeError):
+            dictionary["b"] = 2
+        with self.assertRaises(TypeError):
+            del dictionary["a"]
+        self.assertEqual(dictionary["a"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
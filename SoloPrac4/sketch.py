@@ -0,0 +1,371 @@
+""" Sketches of a stream of words.
+
+Defines two summaries whose size is fixed when they are made, however many
+distinct words go through them, and which can be merged, so a stream can be
+split between workers and their summaries put together afterwards.
+
+CountMinSketch estimates the count of any word. SpaceSaving keeps the words
+with the highest counts.
+"""
+__docformat__ = 'reStructuredText'
+
+from bloom_filter import key_hashes, mix
+from hash_table import LinearProbeHashTable
+from referential_array import ArrayR
+from list_adt import ArrayList
+from sorting import stable_sort
+from typing import Tuple, Iterator
+from array import array
+import math
+import unittest
+
+
+class CountMinSketch:
+    """
+    Count-Min sketch
+
+    depth rows of width counters. Adding a word adds its count to one counter in
+    each row, picked by scrambling a hash of the word (see bloom_filter.key_hashes)
+    together with the row, and the estimate of a word is the smallest of its counters.
+
+    Error bound: with width = ceil(e / epsilon) and depth = ceil(ln(1 / delta)),
+    an estimate is never under the true count, and is over it by more than
+    epsilon * total with probability at most delta, where total is the sum of
+    the counts added. Merging adds the counters, so a merged sketch is the sketch
+    of both streams and keeps the bound for their combined total.
+
+    attributes:
+        epsilon: error allowed, as a fraction of the total
+        delta: chance of an estimate going over the error allowed
+        width: number of counters in a row
+        depth: number of rows
+        counts: the counters, row after row
+        total: sum of the counts added
+    """
+    ROW_SEED = 0x9E3779B97F4A7C15
+
+    def __init__(self, epsilon: float, delta: float) -> None:
+        """
+        :raises ValueError: when epsilon or delta is not between 0 and 1
+        :complexity: O(W * D) where W is the width and D the depth
+        """
+        if not 0 < epsilon < 1 or not 0 < delta < 1:
+            raise ValueError("Epsilon and delta should be between 0 and 1")
+        self.epsilon = epsilon
+        self.delta = delta
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        self.counts = array('q', bytes(8 * self.width * self.depth))
+        self.total = 0
+
+    def __columns(self, word: str) -> Iterator[int]:
+        """
+        Yields the position in counts of the word's counter in each row
+        :complexity: O(K + D) where K is the size of the word and D the depth
+        """
+        value = key_hashes(word)[0]
+        for row in range(self.depth):
+            yield row * self.width + mix(value ^ (row * self.ROW_SEED & 0xFFFFFFFFFFFFFFFF)) % self.width
+
+    def add(self, word: str, count: int = 1) -> None:
+        """
+        Adds count to the word
+        :complexity: O(K + D) where K is the size of the word and D the depth
+        """
+        for position in self.__columns(word):
+            self.counts[position] += count
+        self.total += count
+
+    def __getitem__(self, word: str) -> int:
+        """
+        Returns the estimate of the word's count, 0 when nothing added shares its counters
+        :complexity: O(K + D) where K is the size of the word and D the depth
+        """
+        return min(self.counts[position] for position in self.__columns(word))
+
+    def error(self) -> float:
+        """
+        Returns the error allowed for an estimate: epsilon * total
+        :complexity: O(1)
+        """
+        return self.epsilon * self.total
+
+    def merge(self, other: 'CountMinSketch') -> None:
+        """
+        Adds the counters of another sketch of the same size
+        :raises ValueError: when the sketches are not the same size
+        :complexity: O(W * D) where W is the width and D the depth
+        """
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Only sketches of the same size can be merged")
+        for i in range(len(self.counts)):
+            self.counts[i] += other.counts[i]
+        self.total += other.total
+
+
+class SpaceSaving:
+    """
+    Space-Saving summary of the words with the highest counts
+
+    Monitors at most capacity words, with a count and an error for each. A word
+    already monitored gets its count added; a new word takes a free counter, or
+    when there is none, the counter of the word with the lowest count, which it
+    keeps adding to (that count becomes its error). The counters form a min-heap
+    on count, and a hash table maps each monitored word to its place in the heap.
+
+    Error bounds, where total is the sum of the counts added: a monitored word with
+    count c and error e has a true count between c - e and c, and e <= total / capacity.
+    Every word whose true count is over total / capacity is monitored. Merging two
+    summaries of the same capacity keeps these bounds for their combined total.
+
+    attributes:
+        capacity: number of words monitored at most
+        words: the monitored words, in heap order
+        counts: counts[i] is the count of words[i]
+        errors: errors[i] is the most counts[i] can be over the true count of words[i]
+        positions: hash table mapping each monitored word to its index
+        size: number of monitored words
+        total: sum of the counts added
+    """
+    def __init__(self, capacity: int, hash_base: int = LinearProbeHashTable.DEFAULT_HASH_BASE) -> None:
+        """
+        :raises ValueError: when capacity is under 1
+        :complexity: O(C) where C is the capacity
+        """
+        if capacity < 1:
+            raise ValueError("Capacity should be at least 1")
+        self.capacity = capacity
+        self.words = ArrayR(capacity)
+        self.counts = array('q', bytes(8 * capacity))
+        self.errors = array('q', bytes(8 * capacity))
+        self.positions = LinearProbeHashTable(hash_base, 2 * capacity + 1)
+        self.size = 0
+        self.total = 0
+
+    def __len__(self) -> int:
+        """
+        Returns the number of monitored words
+        :complexity: O(1)
+        """
+        return self.size
+
+    def __contains__(self, word: str) -> bool:
+        """
+        Returns whether the word is monitored
+        :complexity: O(K) where K is the size of the word, with a good hash base
+        """
+        return word in self.positions
+
+    def __getitem__(self, word: str) -> Tuple[int, int]:
+        """
+        Returns the count and error of a monitored word
+        :raises KeyError: when the word is not monitored
+        :complexity: O(K) where K is the size of the word, with a good hash base
+        """
+        index = self.positions[word]
+        return self.counts[index], self.errors[index]
+
+    def min_count(self) -> int:
+        """
+        Returns the count a new word would take over, 0 while there is a free counter;
+        no word that isn't monitored has a true count above it
+        :complexity: O(1)
+        """
+        return self.counts[0] if self.size == self.capacity else 0
+
+    def add(self, word: str, count: int = 1) -> int:
+        """
+        Adds count to the word, and returns its count
+        :complexity: O(K + log C) where K is the size of the word and C the capacity, with a good hash base
+        """
+        self.total += count
+        index = self.positions.get_or_default(word)
+        if index is None and self.size < self.capacity:
+            index = self.size
+            self.size += 1
+            self.words[index] = word
+            self.counts[index] = count
+            self.errors[index] = 0
+            self.positions[word] = index
+            self.__rise(index)
+            return count
+        if index is None:  # takes over the counter with the lowest count
+            index = 0
+            del self.positions[self.words[0]]
+            self.words[0] = word
+            self.errors[0] = self.counts[0]
+            self.positions[word] = 0
+        self.counts[index] += count
+        count = self.counts[index]
+        self.__sink(index)
+        return count
+
+    def items(self) -> Iterator[Tuple[str, int, int]]:
+        """
+        Yields the (word, count, error) triple of each monitored word, in no particular order
+        :complexity: O(C) where C is the capacity
+        """
+        for i in range(self.size):
+            yield self.words[i], self.counts[i], self.errors[i]
+
+    def error(self) -> float:
+        """
+        Returns the most a count can be over the true count: total / capacity
+        :complexity: O(1)
+        """
+        return self.total / self.capacity
+
+    def merge(self, other: 'SpaceSaving') -> None:
+        """
+        Adds the words of another summary with the same capacity. A word missing from
+        one summary is counted as that summary's min_count, with the same error, and of
+        all the words the capacity with the highest counts are kept.
+        :raises ValueError: when the summaries don't have the same capacity
+        :complexity: O(C log C) where C is the capacity
+        """
+        if self.capacity != other.capacity:
+            raise ValueError("Only summaries of the same capacity can be merged")
+        (mine, theirs) = (self.min_count(), other.min_count())
+        merged = LinearProbeHashTable(self.positions.hash_base, 4 * self.capacity + 1)
+        for (word, count, error) in self.items():
+            merged[word] = (count + theirs, error + theirs)
+        for (word, count, error) in other.items():
+            (my_count, my_error) = merged.get_or_default(word, (mine + theirs, mine + theirs))
+            merged[word] = (my_count - theirs + count, my_error - theirs + error)
+        entries = ArrayList(len(merged))
+        for entry in merged.items():
+            entries.append(entry)
+        stable_sort(entries, key=lambda entry: -entry[1][0])
+        self.positions = LinearProbeHashTable(self.positions.hash_base, 2 * self.capacity + 1)
+        self.size = min(self.capacity, len(entries))
+        self.total += other.total
+        for i in range(self.size):
+            (word, (count, error)) = entries[i]
+            self.words[i] = word
+            self.counts[i] = count
+            self.errors[i] = error
+            self.positions[word] = i
+        for index in range(self.size // 2 - 1, -1, -1):
+            self.__sink(index)
+
+    def __rise(self, index: int) -> None:
+        """
+        Moves the counter at index up the heap until its count is at least the count of its parent
+        :complexity: O(log C) where C is the capacity, with a good hash base
+        """
+        start = index
+        word = self.words[index]
+        (count, error) = (self.counts[index], self.errors[index])
+        while index > 0:
+            parent = (index - 1) // 2
+            if self.counts[parent] <= count:
+                break
+            self.words[index] = self.words[parent]
+            self.counts[index] = self.counts[parent]
+            self.errors[index] = self.errors[parent]
+            self.positions[self.words[index]] = index
+            index = parent
+        if index != start:
+            self.words[index] = word
+            self.counts[index] = count
+            self.errors[index] = error
+            self.positions[word] = index
+
+    def __sink(self, index: int) -> None:
+        """
+        Moves the counter at index down the heap until its count is at most the counts of its children
+        :complexity: O(log C) where C is the capacity, with a good hash base
+        """
+        start = index
+        word = self.words[index]
+        (count, error) = (self.counts[index], self.errors[index])
+        while 2 * index + 1 < self.size:
+            child = 2 * index + 1
+            if child + 1 < self.size and self.counts[child + 1] < self.counts[child]:
+                child += 1
+            if self.counts[child] >= count:
+                break
+            self.words[index] = self.words[child]
+            self.counts[index] = self.counts[child]
+            self.errors[index] = self.errors[child]
+            self.positions[self.words[index]] = index
+            index = child
+        if index != start:
+            self.words[index] = word
+            self.counts[index] = count
+            self.errors[index] = error
+            self.positions[word] = index
+
+
+class TestCountMinSketch(unittest.TestCase):
+    def test_bounds(self):
+        """ Testing estimates are never under the true counts, and within the error allowed """
+        sketch = CountMinSketch(0.01, 0.01)
+        self.assertEqual((sketch.width, sketch.depth), (272, 5))
+        for i in range(1000):
+            sketch.add(str(i % 300), i % 7 + 1)
+        over = 0
+        for i in range(300):
+            true = sum(j % 7 + 1 for j in range(i, 1000, 300))
+            self.assertGreaterEqual(sketch[str(i)], true)
+            over += sketch[str(i)] > true + sketch.error()
+        self.assertLessEqual(over, 2 * sketch.delta * 300)  # each is over with probability at most delta
+        with self.assertRaises(ValueError):
+            CountMinSketch(0, 0.5)
+
+    def test_merge(self):
+        """ Testing a merged sketch is the sketch of both streams """
+        (first, second, both) = (CountMinSketch(0.05, 0.1), CountMinSketch(0.05, 0.1), CountMinSketch(0.05, 0.1))
+        for i in range(200):
+            (first if i % 3 else second).add(str(i % 40))
+            both.add(str(i % 40))
+        first.merge(second)
+        self.assertEqual(first.counts, both.counts)
+        self.assertEqual(first.total, 200)
+        with self.assertRaises(ValueError):
+            first.merge(CountMinSketch(0.5, 0.1))
+
+
+class TestSpaceSaving(unittest.TestCase):
+    def check_bounds(self, summary: SpaceSaving, counts: dict) -> None:
+        """ Checks the bounds of every monitored word, and that every frequent word is monitored """
+        for (word, count, error) in summary.items():
+            self.assertLessEqual(count - error, counts[word])
+            self.assertGreaterEqual(count, counts[word])
+            self.assertLessEqual(error, summary.error())
+            self.assertEqual(summary.words[summary.positions[word]], word)
+        for (word, count) in counts.items():
+            if count > summary.error():
+                self.assertTrue(word in summary, word)
+
+    def test_add(self):
+        """ Testing the bounds on a skewed stream, with far more words than counters """
+        summary = SpaceSaving(10)
+        counts = {}
+        for i in range(1, 2000):
+            word = str(i % 7) if i % 3 else str(i % 501)
+            counts[word] = counts.get(word, 0) + 1
+            summary.add(word)
+        self.assertEqual(len(summary), 10)
+        self.assertEqual(summary.total, 1999)
+        self.check_bounds(summary, counts)
+        for i in range(1, summary.size):
+            self.assertLessEqual(summary.counts[(i - 1) // 2], summary.counts[i])
+
+    def test_merge(self):
+        """ Testing the bounds after merging summaries of two different streams """
+        (first, second) = (SpaceSaving(8), SpaceSaving(8))
+        counts = {}
+        for i in range(3000):
+            word = str(i % 5) if i % 2 else str(i % 97)
+            counts[word] = counts.get(word, 0) + 1
+            (first if i < 1000 else second).add(word, 1)
+        first.merge(second)
+        self.assertEqual(first.total, 3000)
+        self.check_bounds(first, counts)
+        with self.assertRaises(ValueError):
+            first.merge(SpaceSaving(3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,426 @@
+""" Sorting for lists and arrays.
+
+Both sorts work in place on anything indexable with a length (ArrayList,
+ArrayR, list). The key of each item is worked out once and kept in a
+parallel array, which is permuted along with the items.
+
+sort is an introsort, a quicksort that
+    1. picks the median of the first, middle and last keys as pivot, or for
+       ranges over NINTHER_CUTOFF the median of three such medians (Tukey's
+       ninther), which copes with the sorted and interleaved ranges that
+       three way partitioning tends to leave behind,
+    2. partitions three ways (smaller, equal, greater), so runs of equal keys
+       are finished with at once rather than split again and again,
+    3. recurses on the smaller side and loops on the larger, so the stack
+       never goes deeper than log n,
+    4. hands ranges of INSERTION_CUTOFF items or fewer to insertion sort,
+    5. switches to heapsort for a range once 2 log n partitions have been
+       nested, which keeps the worst case O(n log n).
+It is not stable.
+
+stable_sort is a merge sort in the style of timsort. It splits the array
+into the runs already in order (reversing strictly descending ones),
+stretches short runs to a minimum length by binary insertion, and merges
+neighbouring runs as it goes so their lengths on the stack keep growing.
+Before each merge the items already in place at either end are skipped,
+and all merges share one buffer, of half the array, made once per call.
+Items with equal keys keep their order, and input that is already nearly
+sorted takes close to linear time.
+"""
+__docformat__ = 'reStructuredText'
+
+from referential_array import ArrayR
+from list_adt import ArrayList
+from typing import Callable, Any
+import math
+import operator
+import random
+import unittest
+
+INSERTION_CUTOFF = 16
+NINTHER_CUTOFF = 128
+MIN_MERGE = 64
+
+
+def sort(array, key: Callable[[Any], Any] = None, reverse: bool = False) -> None:
+    """
+    Sorts array in place by key(item) (by the items themselves when key is None),
+    in ascending order, or descending order when reverse is True
+
+    :complexity best: O(N) all keys equal, where N is len(array)
+    :complexity worst: O(N log N) comparisons
+    """
+    size = len(array)
+    if size < 2:
+        return
+    keys = _keys(array, key)
+    less = operator.gt if reverse else operator.lt
+    _introsort(array, keys, 0, size - 1, 2 * int(math.log2(size)), less)
+
+
+def stable_sort(array, key: Callable[[Any], Any] = None, reverse: bool = False) -> None:
+    """
+    Sorts array in place by key(item) (by the items themselves when key is None),
+    in ascending order, or descending order when reverse is True, keeping items
+    with equal keys in the order they were in. For several keys give a tuple, e.g.
+    (-count, word) for count descending then word ascending
+
+    :complexity best: O(N) already sorted, where N is len(array)
+    :complexity worst: O(N log N) comparisons
+    """
+    size = len(array)
+    if size < 2:
+        return
+    keys = _keys(array, key)
+    less = operator.gt if reverse else operator.lt
+    min_run = _min_run(size)
+    runs = ArrayList(size // min_run + 1)
+    buffer = (ArrayR(max(1, size // 2)), ArrayR(max(1, size // 2)))
+    low = 0
+    while low < size:
+        length = _count_run(array, keys, low, size, less)
+        if length < min_run:
+            extended = min(min_run, size - low)
+            _binary_insertion_sort(array, keys, low, low + extended, low + length, less)
+            length = extended
+        runs.append((low, length))
+        _collapse(array, keys, runs, buffer, less)
+        low += length
+    while len(runs) > 1:
+        _merge_at(array, keys, runs, len(runs) - 2, buffer, less)
+
+
+def _keys(array, key: Callable[[Any], Any]) -> ArrayR:
+    """ Returns an array with the key of each item of array """
+    keys = ArrayR(len(array))
+    for i in range(len(array)):
+        keys[i] = array[i] if key is None else key(array[i])
+    return keys
+
+
+def _swap(array, keys: ArrayR, i: int, j: int) -> None:
+    """ Swaps the items, and their keys, at i and j """
+    array[i], array[j] = array[j], array[i]
+    keys[i], keys[j] = keys[j], keys[i]
+
+
+def _introsort(array, keys: ArrayR, low: int, high: int, depth: int, less: Callable[[Any, Any], bool]) -> None:
+    """
+    Sorts array[low..high], partitioning at most depth more times on any path
+    before falling back on heapsort
+    """
+    while high - low + 1 > INSERTION_CUTOFF:
+        if depth == 0:
+            _heapsort(array, keys, low, high, less)
+            return
+        depth -= 1
+        pivot = keys[_pivot(keys, low, high, less)]
+        (lower, upper) = _partition(array, keys, low, high, pivot, less)
+        if lower - low < high - upper:  # recurse on the smaller side, loop on the larger
+            _introsort(array, keys, low, lower - 1, depth, less)
+            low = upper + 1
+        else:
+            _introsort(array, keys, upper + 1, high, depth, less)
+            high = lower - 1
+    _insertion_sort(array, keys, low, high, less)
+
+
+def _pivot(keys: ArrayR, low: int, high: int, less: Callable[[Any, Any], bool]) -> int:
+    """ Returns the position of the pivot for array[low..high] """
+    middle = (low + high) // 2
+    if high - low + 1 <= NINTHER_CUTOFF:
+        return _median_of_three(keys, low, middle, high, less)
+    step = (high - low + 1) // 8
+    return _median_of_three(keys, _median_of_three(keys, low, low + step, low + 2 * step, less),
+                            _median_of_three(keys, middle - step, middle, middle + step, less),
+                            _median_of_three(keys, high - 2 * step, high - step, high, less), less)
+
+
+def _median_of_three(keys: ArrayR, first: int, middle: int, last: int, less: Callable[[Any, Any], bool]) -> int:
+    """ Returns whichever of the three positions holds the median of their keys """
+    if less(keys[middle], keys[first]):
+        (first, middle) = (middle, first)
+    if less(keys[last], keys[middle]):
+        middle = last
+        if less(keys[middle], keys[first]):
+            middle = first
+    return middle
+
+
+def _partition(array, keys: ArrayR, low: int, high: int, pivot: Any, less: Callable[[Any, Any], bool]) -> tuple:
+    """
+    Three way (Dutch national flag) partition of array[low..high] around pivot
+    :returns: (lower, upper) such that the keys before lower come before pivot,
+    those from lower to upper equal it, and those after upper come after it
+    """
+    lower = low
+    i = low
+    upper = high
+    while i <= upper:
+        if less(keys[i], pivot):
+            _swap(array, keys, lower, i)
+            lower += 1
+            i += 1
+        elif less(pivot, keys[i]):
+            _swap(array, keys, i, upper)
+            upper -= 1
+        else:
+            i += 1
+    return lower, upper
+
+
+def _insertion_sort(array, keys: ArrayR, low: int, high: int, less: Callable[[Any, Any], bool]) -> None:
+    """ Sorts array[low..high] by insertion, shifting items rather than swapping them """
+    for i in range(low + 1, high + 1):
+        item = array[i]
+        item_key = keys[i]
+        j = i - 1
+        while j >= low and less(item_key, keys[j]):
+            array[j + 1] = array[j]
+            keys[j + 1] = keys[j]
+            j -= 1
+        array[j + 1] = item
+        keys[j + 1] = item_key
+
+
+def _heapsort(array, keys: ArrayR, low: int, high: int, less: Callable[[Any, Any], bool]) -> None:
+    """ Sorts array[low..high] with an in-place heap whose root holds the key that goes last """
+    size = high - low + 1
+    for start in range(size // 2 - 1, -1, -1):
+        _sift_down(array, keys, low, start, size, less)
+    for end in range(size - 1, 0, -1):
+        _swap(array, keys, low, low + end)
+        _sift_down(array, keys, low, 0, end, less)
+
+
+def _sift_down(array, keys: ArrayR, low: int, index: int, size: int, less: Callable[[Any, Any], bool]) -> None:
+    """ Moves the item at low + index down the heap in array[low..low + size - 1] """
+    while 2 * index + 1 < size:
+        child = 2 * index + 1
+        if child + 1 < size and less(keys[low + child], keys[low + child + 1]):
+            child += 1
+        if not less(keys[low + index], keys[low + child]):
+            return
+        _swap(array, keys, low + index, low + child)
+        index = child
+
+
+def _min_run(size: int) -> int:
+    """
+    Returns the shortest run worth merging, between MIN_MERGE / 2 and MIN_MERGE,
+    chosen so size / min_run is a power of two or just under one
+    """
+    extra = 0
+    while size >= MIN_MERGE:
+        extra |= size & 1
+        size >>= 1
+    return size + extra
+
+
+def _count_run(array, keys: ArrayR, low: int, high: int, less: Callable[[Any, Any], bool]) -> int:
+    """
+    Returns the length of the run starting at low, ending at high at the latest,
+    reversing it first when it is strictly descending (so no equal keys swap places)
+    """
+    end = low + 1
+    if end == high:
+        return 1
+    if less(keys[end], keys[low]):
+        while end + 1 < high and less(keys[end + 1], keys[end]):
+            end += 1
+        (first, last) = (low, end)
+        while first < last:
+            _swap(array, keys, first, last)
+            first += 1
+            last -= 1
+    else:
+        while end + 1 < high and not less(keys[end + 1], keys[end]):
+            end += 1
+    return end - low + 1
+
+
+def _bisect_right(keys: ArrayR, key: Any, low: int, high: int, less: Callable[[Any, Any], bool]) -> int:
+    """ Returns the first position in keys[low..high - 1] whose key comes after key, high if none does """
+    while low < high:
+        mid = (low + high) // 2
+        if less(key, keys[mid]):
+            high = mid
+        else:
+            low = mid + 1
+    return low
+
+
+def _bisect_left(keys: ArrayR, key: Any, low: int, high: int, less: Callable[[Any, Any], bool]) -> int:
+    """ Returns the first position in keys[low..high - 1] whose key does not come before key, high if none """
+    while low < high:
+        mid = (low + high) // 2
+        if less(keys[mid], key):
+            low = mid + 1
+        else:
+            high = mid
+    return low
+
+
+def _binary_insertion_sort(array, keys: ArrayR, low: int, high: int, start: int,
+                           less: Callable[[Any, Any], bool]) -> None:
+    """ Sorts array[low..high - 1], given array[low..start - 1] is sorted already """
+    for i in range(start, high):
+        item = array[i]
+        item_key = keys[i]
+        position = _bisect_right(keys, item_key, low, i, less)
+        for j in range(i, position, -1):
+            array[j] = array[j - 1]
+            keys[j] = keys[j - 1]
+        array[position] = item
+        keys[position] = item_key
+
+
+def _collapse(array, keys: ArrayR, runs: ArrayList, buffer: tuple, less: Callable[[Any, Any], bool]) -> None:
+    """
+    Merges runs at the top of the stack until, from the top down, each run is
+    shorter than the one below it and the two above it together are shorter still
+    """
+    while len(runs) > 1:
+        n = len(runs) - 2
+        if (n > 0 and runs[n - 1][1] <= runs[n][1] + runs[n + 1][1]) or \
+                (n > 1 and runs[n - 2][1] <= runs[n - 1][1] + runs[n][1]):
+            if runs[n - 1][1] < runs[n + 1][1]:
+                n -= 1
+        elif runs[n][1] > runs[n + 1][1]:
+            return
+        _merge_at(array, keys, runs, n, buffer, less)
+
+
+def _merge_at(array, keys: ArrayR, runs: ArrayList, n: int, buffer: tuple, less: Callable[[Any, Any], bool]) -> None:
+    """ Merges the runs at n and n + 1 on the stack, skipping whatever is in place at either end """
+    (start, left_length) = runs[n]
+    right_length = runs[n + 1][1]
+    runs[n] = (start, left_length + right_length)
+    runs.delete_at_index(n + 1)
+    middle = start + left_length
+    low = _bisect_right(keys, keys[middle], start, middle, less)
+    high = _bisect_left(keys, keys[middle - 1], middle, middle + right_length, less)
+    if low == middle or high == middle:
+        return
+    if middle - low <= high - middle:
+        _merge_low(array, keys, low, middle, high, buffer, less)
+    else:
+        _merge_high(array, keys, low, middle, high, buffer, less)
+
+
+def _merge_low(array, keys: ArrayR, low: int, middle: int, high: int, buffer: tuple,
+               less: Callable[[Any, Any], bool]) -> None:
+    """ Merges array[low..middle - 1] and array[middle..high - 1], moving the left run, the shorter, to the buffer """
+    (items, item_keys) = buffer
+    length = middle - low
+    for i in range(length):
+        items[i] = array[low + i]
+        item_keys[i] = keys[low + i]
+    i = 0
+    j = middle
+    destination = low
+    while i < length and j < high:
+        if less(keys[j], item_keys[i]):
+            array[destination] = array[j]
+            keys[destination] = keys[j]
+            j += 1
+        else:
+            array[destination] = items[i]
+            keys[destination] = item_keys[i]
+            i += 1
+        destination += 1
+    while i < length:
+        array[destination] = items[i]
+        keys[destination] = item_keys[i]
+        i += 1
+        destination += 1
+
+
+def _merge_high(array, keys: ArrayR, low: int, middle: int, high: int, buffer: tuple,
+                less: Callable[[Any, Any], bool]) -> None:
+    """ Merges array[low..middle - 1] and array[middle..high - 1] from the back, moving the right run to the buffer """
+    (items, item_keys) = buffer
+    length = high - middle
+    for j in range(length):
+        items[j] = array[middle + j]
+        item_keys[j] = keys[middle + j]
+    i = middle - 1
+    j = length - 1
+    destination = high - 1
+    while i >= low and j >= 0:
+        if less(item_keys[j], keys[i]):
+            array[destination] = array[i]
+            keys[destination] = keys[i]
+            i -= 1
+        else:
+            array[destination] = items[j]
+            keys[destination] = item_keys[j]
+            j -= 1
+        destination -= 1
+    while j >= 0:
+        array[destination] = items[j]
+        keys[destination] = item_keys[j]
+        j -= 1
+        destination -= 1
+
+
+class TestSort(unittest.TestCase):
+    def test_sort(self):
+        """ Testing random, tied, sorted and reversed inputs against the built-in sort """
+        random.seed(1008)
+        inputs = [[], [1], [random.randrange(1000) for _ in range(500)], [random.randrange(3) for _ in range(500)],
+                  list(range(300)), list(range(300, 0, -1)), [7] * 100]
+        for values in inputs:
+            for reverse in [False, True]:
+                array = list(values)
+                sort(array, reverse=reverse)
+                self.assertEqual(array, sorted(values, reverse=reverse))
+
+    def test_key(self):
+        """ Testing an ArrayList of (word, count) pairs sorted by count, most frequent first """
+        pairs = [("w" + str(i), i % 7 if i % 3 else 1) for i in range(200)]
+        array = ArrayList(len(pairs))
+        for pair in pairs:
+            array.append(pair)
+        sort(array, key=lambda pair: pair[1], reverse=True)
+        self.assertEqual(sorted(array[i] for i in range(len(array))), sorted(pairs))
+        for i in range(1, len(array)):
+            self.assertGreaterEqual(array[i - 1][1], array[i][1])
+
+    def test_heapsort_fallback(self):
+        """ Testing the heapsort fallback on its own, as when the depth limit runs out straight away """
+        values = [random.randrange(50) for _ in range(100)]
+        array = list(values)
+        keys = ArrayR(len(array))
+        for i in range(len(array)):
+            keys[i] = array[i]
+        _introsort(array, keys, 0, len(array) - 1, 0, operator.lt)
+        self.assertEqual(array, sorted(values))
+
+    def test_stable_sort(self):
+        """ Testing equal keys keep their order, whatever the direction and shape of the input """
+        random.seed(1008)
+        runs = list(range(500)) + list(range(400, 0, -1)) + list(range(300))
+        nearly = list(range(2000))
+        for i in range(0, 2000, 97):
+            nearly[i] = random.randrange(2000)
+        inputs = [[], [1], [random.randrange(50) for _ in range(1000)], runs, nearly, [3] * 200]
+        for values in inputs:
+            pairs = [(value, position) for (position, value) in enumerate(values)]
+            for reverse in [False, True]:
+                array = list(pairs)
+                stable_sort(array, key=lambda pair: pair[0], reverse=reverse)
+                self.assertEqual(array, sorted(pairs, key=lambda pair: pair[0], reverse=reverse))
+
+    def test_composite_key(self):
+        """ Testing an ArrayList of (word, count) pairs sorted by count descending, then word """
+        pairs = [("w" + str(i), i % 7 if i % 3 else 1) for i in range(200)]
+        array = ArrayList(len(pairs))
+        for pair in pairs:
+            array.append(pair)
+        stable_sort(array, key=lambda pair: (-pair[1], pair[0]))
+        self.assertEqual([array[i] for i in range(len(array))], sorted(pairs, key=lambda pair: (-pair[1], pair[0])))
+
+
+if __name__ == '__main__':
+    unittest.main()
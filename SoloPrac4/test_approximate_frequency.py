@@ -0,0 +1,75 @@
+"""Unit Testing for the approximate word frequencies"""
+__docformat__ = 'reStructuredText'
+
+import unittest
+from frequency import Frequency, Rarity
+from approximate_frequency import ApproximateFrequency
+
+
+class TestApproximateFrequency(unittest.TestCase):
+    FILENAMES = ['84-0.txt', '215-0.txt']
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """ Counts the files exactly and approximately, once for every test """
+        cls.exact = Frequency()
+        cls.approximate = ApproximateFrequency()
+        for filename in TestApproximateFrequency.FILENAMES:
+            cls.exact.add_file(filename)
+            cls.approximate.add_file(filename)
+
+    def test_init(self) -> None:
+        self.assertIsNone(ApproximateFrequency(capacity=10).hash_table)
+        with self.assertRaises(ValueError):
+            ApproximateFrequency(epsilon=0)
+        with self.assertRaises(ValueError):
+            ApproximateFrequency(capacity=0)
+
+    def test_bounds(self) -> None:
+        """ Estimates and ranked counts are within their error bounds of the true counts """
+        (estimate_error, ranking_error) = self.approximate.error_bounds()
+        self.assertEqual(self.approximate.sketch.total, self.approximate.heavy.total)
+        over = 0
+        for (word, count) in self.exact.hash_table.items():
+            self.assertGreaterEqual(self.approximate.estimate(word), count)
+            over += self.approximate.estimate(word) > count + estimate_error
+            if count > ranking_error:
+                self.assertTrue(word in self.approximate.heavy, word)
+        self.assertLessEqual(over, self.approximate.sketch.delta * len(self.exact.hash_table))
+        for (word, count, error) in self.approximate.heavy.items():
+            self.assertLessEqual(count - error, self.exact.hash_table[word])
+            self.assertLessEqual(self.exact.hash_table[word], count)
+        self.assertEqual(len(self.approximate.ranking()), self.approximate.heavy.capacity)
+
+    def test_ranking(self) -> None:
+        """ The most frequent words, and their rarity, are the same as when counting exactly """
+        top = self.approximate.top_k(10)
+        expected = self.exact.top_k(10)
+        self.assertEqual([top[i] for i in range(len(top))], [expected[i] for i in range(len(expected))])
+        self.assertEqual(self.approximate.max_word, self.exact.max_word)
+        self.assertEqual(next(self.approximate.iter_ranking()), top[0])
+        for word in ['the', 'monster', 'dog', 'xyzzyq', 'papaya']:
+            self.assertEqual(self.approximate.rarity(word), self.exact.rarity(word), word)
+        self.assertEqual(self.approximate.rarity('xyzzyq'), Rarity.MISSPELT)
+
+    def test_merge(self) -> None:
+        """ Merging the frequencies of each file, or counting ranges of them in workers, gives the same sketch """
+        merged = ApproximateFrequency()
+        merged.add_file(TestApproximateFrequency.FILENAMES[0])
+        other = ApproximateFrequency()
+        other.add_file(TestApproximateFrequency.FILENAMES[1])
+        merged.merge(other)
+        self.assertEqual(merged.sketch.counts, self.approximate.sketch.counts)
+        self.assertEqual(merged.max_word, self.exact.max_word)
+        for (word, count, error) in merged.heavy.items():
+            self.assertLessEqual(count - error, self.exact.hash_table[word])
+            self.assertLessEqual(self.exact.hash_table[word], count)
+
+        sharded = ApproximateFrequency()
+        sharded.add_files(TestApproximateFrequency.FILENAMES, workers=1, shard_size=1 << 14)
+        self.assertEqual(sharded.sketch.counts, self.approximate.sketch.counts)
+        self.assertEqual(sharded.top_k(10)[0], self.exact.max_word)
+
+
+if __name__ == '__main__':
+    unittest.main()
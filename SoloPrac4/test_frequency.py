@@ -4,10 +4,13 @@ __docformat__ = 'reStructuredText'
 __modified__ = '30/05/2020'
 __since__ = '22/05/2020'
 
+import os
+import tempfile
 import unittest
 import sys
 from hash_table import LinearProbeHashTable
-from frequency import Frequency, Rarity
+from list_adt import ArrayList
+from frequency import Frequency, Rarity, CountHistogram, tokenize, normalise
 
 
 class TestFrequency(unittest.TestCase):
@@ -19,12 +22,143 @@ class TestFrequency(unittest.TestCase):
         self.assertEqual(self.frequency.dictionary.find_word('test'), 1)
 
     def test_add_file(self) -> None:
-        # TODO: Add 2 or more unit tests
-        raise NotImplementedError
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'text.txt')
+            with open(filename, 'w', encoding='utf-8') as file:
+                file.write("The cat sat.\nThe CAT,  the hat... xyzzyq!\n")
+
+            # Test 1: words are counted whatever their case or punctuation
+            self.frequency.add_file(filename)
+            for (word, count) in [('the', 3), ('cat', 2), ('sat', 1), ('hat', 1)]:
+                self.assertEqual(self.frequency.hash_table[word], count)
+            self.assertEqual(len(self.frequency.hash_table), 4)
+            self.assertEqual(self.frequency.max_word, ('the', 3))
+
+            # Test 2: words not in the dictionary are skipped
+            self.assertFalse('xyzzyq' in self.frequency.hash_table)
+            self.assertEqual(self.frequency.throughput['tokenize'].items, 8)
+            self.assertEqual(self.frequency.throughput['count'].items, 8 - 1)
+
+            # Test 3: counts add up across files
+            self.frequency.add_file(filename)
+            self.assertEqual(self.frequency.hash_table['cat'], 4)
+            self.assertEqual(self.frequency.max_word, ('the', 6))
+
+    def test_pipeline(self) -> None:
+        text = "The cat's  hat,\nTHE end... xyzzyq"
+        for size in [1, 4, len(text)]:
+            chunks = [text[i:i + size] for i in range(0, len(text), size)]
+            words = [word for batch in normalise(tokenize(chunks)) for word in batch]
+            self.assertEqual(words, ["the", "cat's", "hat", "the", "end", "xyzzyq"])
+
+        self.frequency.add_file('215-0.txt')
+        tokens = self.frequency.throughput['tokenize'].items
+        self.assertEqual(tokens, self.frequency.throughput['normalise'].items)
+        self.assertGreater(tokens, self.frequency.throughput['filter'].items)
+        self.assertEqual(self.frequency.throughput['count'].items, self.frequency.throughput['filter'].items)
+        self.assertEqual(self.frequency.hash_table[self.frequency.max_word[0]], self.frequency.max_word[1])
+        for throughput in self.frequency.throughput.values():
+            self.assertGreaterEqual(throughput.seconds(), 0)
+
+    def test_add_files(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            filenames = ['215-0.txt']
+            for (i, text) in enumerate(["cat dog dog cat " * 50, "dog cat\n" * 3 + "\u00e9t\u00e9 cat " * 40]):
+                filenames.append(os.path.join(directory, str(i) + '.txt'))
+                with open(filenames[-1], 'w', encoding='utf-8') as file:
+                    file.write(text)
+            filenames.append(filenames[1])
+            self.frequency.add_file('84-0.txt')
+            for filename in filenames:
+                self.frequency.add_file(filename)
+
+            parallel = Frequency()
+            parallel.add_file('84-0.txt')
+            parallel.add_files(filenames, workers=2, shard_size=100)
+            self.assertEqual(str(parallel.hash_table), str(self.frequency.hash_table))
+            self.assertEqual(parallel.max_word, self.frequency.max_word)
+
+            parallel = Frequency()
+            parallel.add_files(filenames[1:2], workers=1, shard_size=7)
+            self.assertEqual(parallel.max_word, ('dog', 100), "Dog reaches 100 first")
+
+    def test_top_k(self) -> None:
+        self.frequency.add_file('215-0.txt')
+        top = self.frequency.top_k(10)
+        self.assertEqual(len(top), 10)
+        self.assertEqual(top[0], self.frequency.max_word)
+        ranking = self.frequency.iter_ranking()
+        previous = None
+        for i in range(len(self.frequency.hash_table)):
+            entry = next(ranking)
+            if i < len(top):
+                self.assertEqual(entry, top[i])
+            if previous is not None:
+                self.assertTrue(previous[1] > entry[1] or (previous[1] == entry[1] and previous[0] < entry[0]))
+            previous = entry
+        with self.assertRaises(StopIteration):
+            next(ranking)
+        self.assertEqual(len(self.frequency.top_k(len(self.frequency.hash_table) + 5)), len(self.frequency.hash_table))
+
+    def test_ranking(self) -> None:
+        """ Ties are ranked by word, so the ranking is the same every run and matches iter_ranking """
+        self.frequency.add_file('215-0.txt')
+        ranking = self.frequency.ranking()
+        self.assertEqual([ranking[i] for i in range(len(ranking))], list(self.frequency.iter_ranking()))
 
     def test_rarity(self) -> None:
-        # TODO: Add 2 or more unit tests
-        raise NotImplementedError
+        self.assertEqual(self.frequency.rarity('test'), Rarity.MISSPELT)
+        self.frequency.add_file('215-0.txt')
+        self.frequency.add_file('84-0.txt')
+        (word, max_count) = self.frequency.max_word
+        self.assertEqual(self.frequency.rarity(word), Rarity.COMMON)
+        self.assertEqual(self.frequency.rarity('xyzzyq'), Rarity.MISSPELT)
+
+        tally = [0, 0, 0]
+        words = []
+        for (word, count) in self.frequency.hash_table.items():
+            expected = Rarity.COMMON if count >= max_count / 100 else \
+                Rarity.RARE if count < max_count / 1000 else Rarity.UNCOMMON
+            self.assertEqual(self.frequency.rarity(word), expected, word)
+            tally[expected.value] += 1
+            words.append(word)
+        self.assertEqual(self.frequency.rarity_counts(), tuple(tally))
+        self.assertGreater(tally[Rarity.RARE.value], 0)
+        self.assertEqual(list(self.frequency.rarities(words)), [self.frequency.rarity(word) for word in words])
+
+    def test_rarity_many(self) -> None:
+        self.frequency.add_file('84-0.txt')
+        words = ['the', 'xyzzyq', 'monster', 'Monster', ''] + [word for (word, _) in self.frequency.hash_table.items()]
+        codes = self.frequency.rarity_many(words)
+        self.assertEqual(codes.typecode, 'b')
+        self.assertEqual(list(codes), [self.frequency.rarity(word).value for word in words])
+        array_list = ArrayList(len(words) + 10)
+        for word in words:
+            array_list.append(word)
+        self.assertEqual(self.frequency.rarity_many(array_list), codes)
+        self.assertEqual(self.frequency.rarity_many(iter(words)), codes)
+        self.assertEqual(len(self.frequency.rarity_many([])), 0)
+
+    def test_histogram(self) -> None:
+        """ Counts past DENSE_LIMIT are kept sparse, and the tallies still match the counts """
+        histogram = CountHistogram()
+        counts = [0] * 6
+        for (word, new) in [(0, 3), (1, 70000), (2, 5 * 10 ** 9), (3, 5 * 10 ** 9), (4, 10 ** 7), (5, 200),
+                            (2, 0), (3, 12), (4, 40), (1, 0)]:
+            histogram.move(counts[word], new)
+            counts[word] = new
+            max_count = max(counts)
+            self.assertEqual(histogram.max_count, max_count)
+            tally = [0, 0, 0]
+            for count in counts:
+                if count > 0:
+                    tally[histogram.classify(count)] += 1
+                    self.assertEqual(histogram.classify(count), Rarity.COMMON.value if count >= max_count / 100 else
+                                     Rarity.RARE.value if count < max_count / 1000 else Rarity.UNCOMMON.value)
+            self.assertEqual(histogram.tally(), tuple(tally))
+            self.assertLessEqual(len(histogram.array), CountHistogram.DENSE_LIMIT)
+        self.assertEqual(histogram[200], 1)
+        self.assertEqual(len(histogram.sparse), 0)
 
 
 if __name__ == '__main__':
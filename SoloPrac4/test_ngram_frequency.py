@@ -0,0 +1,89 @@
+"""Unit Testing for the n-gram frequencies"""
+__docformat__ = 'reStructuredText'
+
+import os
+import tempfile
+import unittest
+from dictionary import Dictionary
+from frequency import Frequency, read_text, tokenize, normalise
+from ngram_frequency import NGramFrequency
+
+
+def ngram_counts(frequency: Frequency, filenames: list, n: int) -> dict:
+    """Returns how many times each n-gram of the words frequency counts is in the files"""
+    counts = {}
+    for filename in filenames:
+        batches = normalise(tokenize(read_text(filename, Frequency.CHUNK_SIZE, Dictionary.DEFAULT_ENCODING)))
+        words = [word for words in batches for word in words if word != '' and word in frequency.dictionary.hash_table]
+        for i in range(len(words) - n + 1):
+            counts[tuple(words[i:i + n])] = counts.get(tuple(words[i:i + n]), 0) + 1
+    return counts
+
+
+class TestNGramFrequency(unittest.TestCase):
+    FILENAMES = ['215-0.txt', '84-0.txt']
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """ Counts the files once for every test """
+        cls.frequency = NGramFrequency()
+        cls.frequency.add_files(TestNGramFrequency.FILENAMES)
+
+    def test_init(self) -> None:
+        with self.assertRaises(ValueError):
+            NGramFrequency(1)
+        frequency = self.frequency
+        word_id = frequency.ids['the']
+        self.assertGreater(word_id, NGramFrequency.NO_ID)
+        self.assertEqual(frequency.words[word_id], 'the')
+        self.assertEqual(frequency.dictionary.hash_table['the'], 1, "The dictionary should be left alone")
+        self.assertFalse('papaya' in frequency.ids)
+        self.assertTrue(frequency.dictionary.find_word('papaya'))
+        with self.assertRaises(ValueError):
+            frequency.ranking(4)
+        with self.assertRaises(ValueError):
+            frequency.count(())
+
+    def test_frozen_dictionary(self) -> None:
+        """ The ids are kept apart from the dictionary, so a frozen dictionary can be used """
+        frequency = NGramFrequency()
+        frequency.dictionary.freeze()
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'text.txt')
+            with open(filename, 'w', encoding='utf-8') as file:
+                file.write("The cat sat on the cat mat\n")
+            frequency.add_file(filename)
+        self.assertEqual(frequency.count(('the', 'cat')), 2)
+        self.assertEqual(frequency.count(('the', 'cat', 'sat')), 1)
+        self.assertEqual(frequency.count(('cat', 'the')), 0)
+
+    def test_counts(self) -> None:
+        """ The n-grams are counted across batches, but not from one file into the next """
+        frequency = self.frequency
+        for n in [2, 3]:
+            expected = ngram_counts(frequency, TestNGramFrequency.FILENAMES, n)
+            self.assertEqual(dict(frequency.iter_ranking(n)), expected)
+            for ngram in list(expected)[:100]:
+                self.assertEqual(frequency.count(ngram), expected[ngram])
+        self.assertEqual(frequency.count(('the',)), frequency.hash_table['the'])
+        self.assertEqual(frequency.count(('of', 'xyzzyq')), 0)
+        self.assertEqual(frequency.count(('of', 'papaya', 'the')), 0)
+
+    def test_ranking(self) -> None:
+        """ ranking, top_k and iter_ranking give the n-grams in the same order """
+        frequency = self.frequency
+        expected = ngram_counts(frequency, TestNGramFrequency.FILENAMES, 2)
+        expected = sorted(expected.items(), key=lambda entry: (-entry[1], entry[0]))
+        ranking = frequency.ranking(2)
+        self.assertEqual([ranking[i] for i in range(len(ranking))], expected)
+        top = frequency.top_k(10, 2)
+        self.assertEqual([top[i] for i in range(len(top))], expected[:10])
+        self.assertEqual(top[0], (('of', 'the'), 590))
+        iterator = frequency.iter_ranking(2)
+        self.assertEqual([next(iterator) for _ in range(10)], expected[:10])
+        self.assertEqual(frequency.top_k(1)[0], frequency.max_word)
+        self.assertEqual(frequency.ranking(3)[0], frequency.top_k(1, 3)[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+"""Unit Testing for the windowed and decayed word frequencies"""
+__docformat__ = 'reStructuredText'
+
+import unittest
+from dictionary import Dictionary
+from hash_table import Deletion
+from frequency import Frequency, Rarity, read_text, tokenize, normalise
+from windowed_frequency import WindowedFrequency, DecayedFrequency, TOKENS
+
+
+def counted_words(frequency: Frequency, filename: str) -> list:
+    """Returns the words of a file that frequency counts, in order"""
+    batches = normalise(tokenize(read_text(filename, Frequency.CHUNK_SIZE, Dictionary.DEFAULT_ENCODING)))
+    return [word for words in batches for word in words if word != '' and word in frequency.dictionary.hash_table]
+
+
+def tally(words: list) -> dict:
+    """Returns how many times each word is in words"""
+    counts = {}
+    for word in words:
+        counts[word] = counts.get(word, 0) + 1
+    return counts
+
+
+class TestWindowedFrequency(unittest.TestCase):
+    FILENAMES = ['215-0.txt', '84-0.txt', '215-0.txt']
+
+    def test_init(self) -> None:
+        self.assertEqual(WindowedFrequency(5, TOKENS).hash_table.deletion, Deletion.TOMBSTONE)
+        with self.assertRaises(ValueError):
+            WindowedFrequency(0)
+        with self.assertRaises(ValueError):
+            WindowedFrequency(5, 'pages')
+        with self.assertRaises(ValueError):
+            DecayedFrequency(0)
+
+    def test_document_window(self) -> None:
+        """ Only the last documents are counted, as if the earlier ones had never been added """
+        frequency = WindowedFrequency(1)
+        expected = Frequency()
+        expected.add_file(TestWindowedFrequency.FILENAMES[-1])
+        for filename in TestWindowedFrequency.FILENAMES:
+            frequency.add_file(filename)
+            if filename == '84-0.txt':
+                self.assertEqual(frequency.rarity('monster'), Rarity.UNCOMMON)
+        self.assertEqual(dict(frequency.hash_table.items()), dict(expected.hash_table.items()))
+        self.assertEqual(frequency.max_word, expected.max_word)
+        self.assertEqual(frequency.rarity_counts(), expected.rarity_counts())
+        self.assertEqual(frequency.rarity('monster'), Rarity.MISSPELT)
+        self.assertEqual(frequency.ranking()[0], expected.ranking()[0])
+
+    def test_token_window(self) -> None:
+        """ Only the last tokens are counted, and the words that drop out of the window are deleted """
+        frequency = WindowedFrequency(5000, TOKENS)
+        words = []
+        for filename in TestWindowedFrequency.FILENAMES:
+            frequency.add_file(filename)
+            words += counted_words(frequency, filename)
+        expected = tally(words[-5000:])
+        self.assertEqual(dict(frequency.hash_table.items()), expected)
+        self.assertEqual(frequency.histogram.words, len(expected))
+        self.assertEqual(frequency.max_word[1], max(expected.values()))
+        self.assertEqual(frequency.top_k(1)[0], frequency.max_word)
+
+
+class TestDecayedFrequency(unittest.TestCase):
+    def test_documents(self) -> None:
+        """ With a half life of one document, each earlier document weighs half as much """
+        frequency = DecayedFrequency(1)
+        frequency.add_file('215-0.txt')
+        frequency.add_file('84-0.txt')
+        first = tally(counted_words(frequency, '215-0.txt'))
+        second = tally(counted_words(frequency, '84-0.txt'))
+        for word in ['the', 'dog', 'monster', 'xyzzyq']:
+            self.assertEqual(frequency.weight(word), first.get(word, 0) / 4 + second.get(word, 0) / 2)
+        self.assertEqual(frequency.top_k(1)[0], ('the', frequency.weight('the')))
+
+    def check_weights(self, frequency: DecayedFrequency, filename: str) -> dict:
+        """ Checks the weight of every word counted, or that it has faded away, and returns the weights """
+        words = counted_words(frequency, filename)
+        expected = {}
+        for i in range(len(words)):
+            expected[words[i]] = expected.get(words[i], 0) + 2 ** ((i - len(words)) / frequency.half_life)
+        for (word, weight) in expected.items():
+            if word in frequency.hash_table:
+                self.assertAlmostEqual(frequency.weight(word), weight)
+            else:
+                self.assertLess(weight, DecayedFrequency.PRUNE_BELOW)
+        return expected
+
+    def test_tokens(self) -> None:
+        """ Weights halve every half life tokens """
+        frequency = DecayedFrequency(50, TOKENS)
+        frequency.add_file('215-0.txt')
+        expected = self.check_weights(frequency, '215-0.txt')
+
+        heaviest = max(expected.values())
+        ranking = frequency.ranking()
+        self.assertAlmostEqual(ranking[0][1], heaviest)
+        counts = [0, 0, 0]
+        for i in range(len(ranking)):
+            (word, weight) = ranking[i]
+            rarity = Rarity.COMMON if weight >= heaviest / 100 else \
+                Rarity.RARE if weight < heaviest / 1000 else Rarity.UNCOMMON
+            self.assertEqual(frequency.rarity(word), rarity)
+            counts[rarity.value] += 1
+        self.assertEqual(frequency.rarity_counts(), tuple(counts))
+
+    def test_rescale(self) -> None:
+        """ With a short half life the weights are rescaled, and those that have faded away are deleted """
+        frequency = DecayedFrequency(1, TOKENS)
+        frequency.add_file('215-0.txt')
+        self.assertLess(frequency.scale, DecayedFrequency.RESCALE_AT)
+        expected = self.check_weights(frequency, '215-0.txt')
+        self.assertLess(len(frequency.hash_table), len(expected))
+        self.assertLess(frequency.hash_table.table_size, Frequency.INIT_TABLE_SIZE)
+        self.assertEqual(frequency.top_k(1)[0], (frequency.max_word[0], frequency.weight(frequency.max_word[0])))
+
+
+if __name__ == '__main__':
+    unittest.main()
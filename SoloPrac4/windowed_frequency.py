@@ -0,0 +1,290 @@
+""" Word frequencies over a live feed.
+
+WindowedFrequency counts only the words of the last few documents (each call
+of add_file is a document) or the last few counted words. The counts of
+whatever leaves the window are taken off as it goes, so ranking, top_k and
+rarity always describe the window without the counts being rebuilt.
+
+DecayedFrequency keeps every word but weighs each occurrence by how recent
+it is, halving its weight every half life.
+"""
+__docformat__ = 'reStructuredText'
+
+from frequency import Frequency
+from hash_table import LinearProbeHashTable, Deletion
+from list_adt import ArrayList
+from referential_array import ArrayR
+from typing import Tuple, Iterator
+
+DOCUMENTS = 'documents'
+TOKENS = 'tokens'
+
+
+class WindowedFrequency(Frequency):
+    """
+    Frequency of the words in the last window documents or tokens
+
+    attributes (besides those of Frequency):
+        window: number of documents or tokens counted
+        unit: DOCUMENTS or TOKENS
+        recent: ring of the window latest documents, as arrays of (word, count) pairs,
+        or of the window latest words
+        next: position in recent of the next document or word, which replaces the oldest
+    """
+    def __init__(self, window: int, unit: str = DOCUMENTS, hash_base: int = Frequency.INIT_HASH_BASE,
+                 table_size: int = Frequency.INIT_TABLE_SIZE, snapshot: str = None) -> None:
+        """
+        :param window: The number of documents or tokens counted
+        :param unit: DOCUMENTS or TOKENS
+        :raises ValueError: when the window is under 1 or the unit is neither DOCUMENTS nor TOKENS
+        :see: Frequency.__init__
+        """
+        if window < 1:
+            raise ValueError("Window should be at least 1")
+        if unit not in [DOCUMENTS, TOKENS]:
+            raise ValueError("Unknown unit: " + str(unit))
+        self.__max_word = (None, 0)
+        Frequency.__init__(self, hash_base, table_size, snapshot)
+        self.window = window
+        self.unit = unit
+        self.recent = ArrayR(window)
+        self.next = 0
+        self.__document = None
+
+    def _make_table(self, hash_base: int, table_size: int) -> LinearProbeHashTable[int]:
+        """
+        Returns a count table that deletes with tombstones, as words leave the window all
+        the time and Deletion.REHASH would insert the rest of the cluster again on each one
+        :complexity: O(N) where N is the table size
+        """
+        return LinearProbeHashTable(hash_base, table_size, deletion=Deletion.TOMBSTONE)
+
+    @property
+    def max_word(self) -> Tuple[str, int]:
+        """
+        The (word, count) pair with the highest count in the window (ties go to the word first
+        in alphabetical order), found again only when the word that had it has lost some of its count
+        :complexity: O(1) unless found again, then O(N) where N is the table size
+        """
+        if self.__max_word is None:
+            top = self.top_k(1)
+            self.__max_word = top[0] if len(top) > 0 else (None, 0)
+        return self.__max_word
+
+    @max_word.setter
+    def max_word(self, max_word: Tuple[str, int]) -> None:
+        self.__max_word = max_word
+
+    def add_file(self, filename: str) -> None:
+        """
+        Counts the words of a file, as one document, then takes off the counts
+        of whatever has left the window
+        :complexity: O(N + D) where N is the number of characters in the file and D the
+        number of distinct words of the document leaving the window, with a good hash base
+        :see: Frequency.add_file
+        """
+        if self.unit == TOKENS:
+            Frequency.add_file(self, filename)
+            return
+        self.__document = LinearProbeHashTable(self.hash_table.hash_base)
+        Frequency.add_file(self, filename)
+        oldest = self.recent[self.next]
+        self.recent[self.next] = self.__document.to_array()
+        self.next = (self.next + 1) % self.window
+        self.__document = None
+        if oldest is not None:
+            for i in range(len(oldest)):
+                if oldest[i] is not None:
+                    self.__take(oldest[i][0], oldest[i][1])
+
+    def add_files(self, filenames: list, workers: int = None, shard_size: int = Frequency.SHARD_SIZE) -> None:
+        """
+        Adds the files in turn, each as a document, in this process
+        :see: #self.add_file(filename: str)
+        """
+        for filename in filenames:
+            self.add_file(filename)
+
+    def _count(self, words: list) -> None:
+        """
+        Counts a batch of words, remembering them for when they leave the window
+        :complexity: O(N) where N is the total size of the words, with a good hash base
+        """
+        for word in words:
+            count = self.hash_table.increment(word)
+            self.histogram.move(count - 1, count)
+            if self.__max_word is not None and count > self.__max_word[1]:
+                self.__max_word = (word, count)
+            if self.unit == DOCUMENTS:
+                self.__document.increment(word)
+            else:
+                oldest = self.recent[self.next]
+                self.recent[self.next] = word
+                self.next = (self.next + 1) % self.window
+                if oldest is not None:
+                    self.__take(oldest, 1)
+
+    def __take(self, word: str, amount: int) -> None:
+        """
+        Takes amount off the count of word, which is deleted once it reaches 0
+        :complexity: O(K) where K is the size of the word, with a good hash base
+        """
+        count = self.hash_table.decrement(word, amount)
+        self.histogram.move(count + amount, count)
+        if self.__max_word is not None and self.__max_word[0] == word:
+            self.__max_word = None
+
+
+class DecayedFrequency(Frequency):
+    """
+    Frequency of the words where each occurrence weighs half as much every half life
+    documents or tokens later.
+
+    Rather than every weight going down after each document or token, each new
+    occurrence weighs scale, which goes up by a factor of 2 ** (1 / half_life)
+    instead, and the weights are divided by scale when they are given out. This
+    leaves the order of the words, and so ranking and rarity (whose thresholds
+    are fractions of the highest weight), as they are. Once scale passes
+    RESCALE_AT, close to the largest float, the stored weights are divided by it,
+    scale goes back to 1 and the words whose weight has dropped under PRUNE_BELOW
+    are deleted. That happens once every log2(RESCALE_AT) * half_life documents or tokens.
+
+    attributes (besides those of Frequency):
+        half_life: number of documents or tokens after which a weight halves
+        unit: DOCUMENTS or TOKENS
+        growth: factor scale goes up by after each document or token
+        scale: weight of an occurrence now
+    max_word holds the stored weight; top_k(1) gives the weight now.
+    """
+    RESCALE_AT = 2.0 ** 1000  # a stored weight is at most about 1.44 * half_life * scale, under 2 ** 1024
+    PRUNE_BELOW = 1e-3
+
+    def __init__(self, half_life: float, unit: str = DOCUMENTS, hash_base: int = Frequency.INIT_HASH_BASE,
+                 table_size: int = Frequency.INIT_TABLE_SIZE, snapshot: str = None) -> None:
+        """
+        :param half_life: The number of documents or tokens after which a weight halves
+        :param unit: DOCUMENTS or TOKENS
+        :raises ValueError: when the half life is not over 0 or the unit is neither DOCUMENTS nor TOKENS
+        :see: Frequency.__init__
+        """
+        if not half_life > 0:
+            raise ValueError("Half life should be over 0")
+        if unit not in [DOCUMENTS, TOKENS]:
+            raise ValueError("Unknown unit: " + str(unit))
+        Frequency.__init__(self, hash_base, table_size, snapshot)
+        self.half_life = half_life
+        self.unit = unit
+        self.growth = 2.0 ** (1.0 / half_life)
+        self.scale = 1.0
+
+    def add_file(self, filename: str) -> None:
+        """
+        Counts the words of a file as one document, so with DOCUMENTS they all weigh the same
+        :see: Frequency.add_file
+        """
+        Frequency.add_file(self, filename)
+        if self.unit == DOCUMENTS:
+            self.__advance()
+
+    def add_files(self, filenames: list, workers: int = None, shard_size: int = Frequency.SHARD_SIZE) -> None:
+        """
+        Adds the files in turn, each as a document, in this process
+        :see: #self.add_file(filename: str)
+        """
+        for filename in filenames:
+            self.add_file(filename)
+
+    def _count(self, words: list) -> None:
+        """
+        Adds the weight of each word in the batch
+        :complexity: O(N) where N is the total size of the words, with a good hash base
+        """
+        for word in words:
+            weight = self.hash_table.increment(word, self.scale)
+            if weight > self.max_word[1]:
+                self.max_word = (word, weight)
+            if self.unit == TOKENS:
+                self.__advance()
+
+    def weight(self, word: str) -> float:
+        """
+        Returns the weight of a word now, 0 when it hasn't been counted (or has faded away)
+        :complexity: O(K) where K is the size of the word, with a good hash base
+        """
+        return self.hash_table.get_or_default(word, 0) / self.scale
+
+    def ranking(self) -> ArrayList[tuple]:
+        """
+        Returns the (word, weight) pairs, heaviest first (ties go to the word first in alphabetical order)
+        :see: Frequency.ranking
+        """
+        return self.__weighed(Frequency.ranking(self))
+
+    def top_k(self, k: int) -> ArrayList[tuple]:
+        """
+        Returns the k heaviest (word, weight) pairs, heaviest first
+        :see: Frequency.top_k
+        """
+        return self.__weighed(Frequency.top_k(self, k))
+
+    def iter_ranking(self) -> Iterator[tuple]:
+        """
+        Yields the (word, weight) pairs in the order of top_k, one at a time
+        :see: Frequency.iter_ranking
+        """
+        for (word, weight) in Frequency.iter_ranking(self):
+            yield word, weight / self.scale
+
+    def rarity_counts(self) -> Tuple[int, int, int]:
+        """
+        Returns the number of COMMON, UNCOMMON and RARE words right now
+        :complexity: O(N) where N is the table size, as weights have no histogram
+        """
+        (common_from, rare_below) = self._thresholds()
+        tally = [0, 0, 0]
+        for weight in self.hash_table.values():
+            tally[2 if weight < rare_below else 0 if weight >= common_from else 1] += 1
+        return tally[0], tally[1], tally[2]
+
+    def _thresholds(self) -> Tuple[float, float]:
+        """
+        Returns the lowest COMMON stored weight, and the stored weight the RARE ones are under
+        :complexity: O(1)
+        """
+        return self.max_word[1] / 100, self.max_word[1] / 1000
+
+    def __weighed(self, pairs: ArrayList[tuple]) -> ArrayList[tuple]:
+        """
+        Replaces the stored weight of each (word, weight) pair with the weight now
+        :complexity: O(N) where N is the number of pairs
+        """
+        for i in range(len(pairs)):
+            pairs[i] = (pairs[i][0], pairs[i][1] / self.scale)
+        return pairs
+
+    def __advance(self) -> None:
+        """
+        Moves on by one document or token, rescaling the weights once scale passes RESCALE_AT
+        :complexity: O(1) unless rescaling, then O(N) where N is the table size, which
+        is O(N / (log2(RESCALE_AT) * half_life)) amortised over the documents or tokens between rescales.
+        The words left go into a new table sized for them, so the next rescale only goes over those
+        and the words counted since.
+        """
+        self.scale *= self.growth
+        if self.scale <= DecayedFrequency.RESCALE_AT:
+            return
+        self.hash_table = LinearProbeHashTable.from_iterable(self.__rescaled(), len(self.hash_table),
+                                                             self.hash_table.hash_base)
+        self.max_word = (self.max_word[0], self.max_word[1] / self.scale)
+        self.scale = 1.0
+
+    def __rescaled(self) -> Iterator[Tuple[str, float]]:
+        """
+        Yields the (word, weight) pairs with the weights divided by scale, leaving out
+        the words whose weight has dropped under PRUNE_BELOW (except max_word)
+        :complexity: O(N) where N is the table size
+        """
+        for (word, weight) in self.hash_table.items():
+            weight /= self.scale
+            if weight >= DecayedFrequency.PRUNE_BELOW or word == self.max_word[0]:
+                yield word, weight